@@ -3,81 +3,73 @@
 Пример группового чата с несколькими агентами
 """
 
-from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
-from autogen_agentchat.teams import GroupChat, GroupChatManager
+import asyncio
 
-# Устанавливаем OpenAI API ключ из переменной окружения
-import os
+from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
+from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
+from autogen_agentchat.teams import SelectorGroupChat
+from autogen_agentchat.ui import Console
+from model_cache import create_model_client
 
-def main():
-    # Проверяем наличие API ключа
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        print("❌ Ошибка: OPENAI_API_KEY не установлен!")
+async def main():
+    # Клиент OpenAI с кэшем ответов (AGENT_CACHE_MODE=replay работает без ключа)
+    try:
+        model_client = create_model_client("gpt-4", temperature=0.7)
+    except ValueError as e:
+        print(f"❌ Ошибка: {e}")
         print("💡 Установите переменную окружения:")
         print("   export OPENAI_API_KEY='ваш_ключ_здесь'")
         return
 
-    # Конфигурация для OpenAI
-    config_list = [
-        {
-            "model": "gpt-4",
-            "api_key": api_key,
-        }
-    ]
-
     # Создаем агентов с разными ролями
     coder = AssistantAgent(
         name="coder",
+        description="Программист: код и технические решения",
         system_message="Ты опытный программист. Помогай с написанием кода и решением технических проблем.",
-        llm_config={"config_list": config_list, "temperature": 0.7}
+        model_client=model_client
     )
     
     analyst = AssistantAgent(
         name="analyst",
+        description="Аналитик: анализ, планирование и стратегия",
         system_message="Ты аналитик данных. Помогай с анализом, планированием и стратегией.",
-        llm_config={"config_list": config_list, "temperature": 0.7}
+        model_client=model_client
     )
     
     writer = AssistantAgent(
         name="writer",
+        description="Писатель: тексты, документация и презентации",
         system_message="Ты писатель и редактор. Помогай с созданием текстов, документации и презентаций.",
-        llm_config={"config_list": config_list, "temperature": 0.7}
+        model_client=model_client
     )
 
-    # Создаем пользователя-прокси
+    # Пользователь отвечает в консоли, когда его выбирает менеджер чата
     user_proxy = UserProxyAgent(
         name="user_proxy",
-        human_input_mode="ALWAYS",
-        max_consecutive_auto_reply=10,
-        is_termination_msg=lambda x: x.get("content", "").rstrip().endswith("TERMINATE"),
-        code_execution_config={"work_dir": "workspace"},
-        llm_config={"config_list": config_list}
+        description="Пользователь, который ставит задачу и принимает решения"
     )
 
-    # Создаем групповой чат
-    groupchat = GroupChat(
-        agents=[user_proxy, coder, analyst, writer],
-        messages=[],
-        max_round=50
-    )
-
-    # Создаем менеджер группового чата
-    manager = GroupChatManager(
-        groupchat=groupchat,
-        llm_config={"config_list": config_list}
+    # Групповой чат: следующего участника выбирает модель, завершение по
+    # слову TERMINATE или после 50 сообщений
+    team = SelectorGroupChat(
+        participants=[user_proxy, coder, analyst, writer],
+        model_client=model_client,
+        termination_condition=TextMentionTermination("TERMINATE") | MaxMessageTermination(50)
     )
 
     # Начинаем групповой чат
     print("🤖 AutoGen GroupChat запущен!")
     print("👥 Участники: Программист, Аналитик, Писатель")
-    print("💬 Начните обсуждение (введите 'quit' для выхода)")
+    print("💬 Отвечайте, когда вас спросят (напишите TERMINATE для выхода)")
     print("-" * 50)
     
-    user_proxy.initiate_chat(
-        manager,
-        message="Привет всем! Давайте обсудим, как создать веб-приложение для управления проектами. Каждый из вас может предложить свой взгляд на задачу."
-    )
+    await Console(team.run_stream(
+        task="Привет всем! Давайте обсудим, как создать веб-приложение для управления проектами. Каждый из вас может предложить свой взгляд на задачу."
+    ))
+
+    if hasattr(model_client, "store"):
+        print(f"💾 Кэш ответов: {model_client.store.stats()}")
+    await model_client.close()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Кэш ответов модели на диске для примеров AutoGen AgentChat
+
+CachingChatCompletionClient оборачивает любой ChatCompletionClient (обычно
+OpenAIChatCompletionClient). Ответ хранится в файле, имя которого - SHA-256
+от модели, параметров генерации, сообщений, инструментов и формата ответа,
+поэтому одинаковый запрос повторно не тратит токены.
+
+Режимы (AGENT_CACHE_MODE):
+    record - ответ берется из кэша, при промахе запрашивается у модели и сохраняется
+    replay - только записанные ответы, без сети и ключа API; промах - ошибка
+    off    - кэш не используется
+
+Пример:
+    model_client = create_model_client("gpt-4")
+    assistant = AssistantAgent(name="assistant", model_client=model_client)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+CACHE_MODES = ('record', 'replay', 'off')
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / '.model_cache'
+
+# Ключ API не нужен для воспроизведения, но клиент OpenAI без него не создается
+REPLAY_API_KEY = 'replay-mode'
+
+
+class ReplayMissError(KeyError):
+    """В режиме replay для запроса нет записанного ответа"""
+
+
+class DiskResponseStore:
+    """Ответы в файлах <ключ[:2]>/<ключ>.json с ограничением общего размера.
+
+    Чтение обновляет время изменения файла, поэтому при переполнении
+    удаляются давно не использованные ответы (до 90% лимита).
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = sum(path.stat().st_size for path in self.directory.glob('*/*.json'))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            record = json.loads(path.read_text(encoding='utf-8'))
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def put(self, key: str, record: dict):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = json.dumps(record, ensure_ascii=False).encode('utf-8')
+
+        # Запись через временный файл: параллельный запуск не прочитает половину ответа
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as file:
+            file.write(data)
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(file.name, path)
+            self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            'directory': str(self.directory),
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+def _jsonable(value: Any) -> Any:
+    """Приведение сообщений, инструментов и моделей pydantic к JSON для ключа"""
+    if isinstance(value, type):
+        # Формат структурированного ответа (класс pydantic) - по его JSON-схеме
+        return value.model_json_schema() if hasattr(value, 'model_json_schema') else value.__name__
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if hasattr(value, 'schema') and not isinstance(value, Mapping):
+        return value.schema
+    if isinstance(value, Mapping):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+class CachingChatCompletionClient(ChatCompletionClient):
+    """ChatCompletionClient с кэшем ответов на диске и режимом воспроизведения"""
+
+    def __init__(self, client: ChatCompletionClient, store: DiskResponseStore, mode: str = 'record'):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Неизвестный режим кэша: {mode}, допустимо: {', '.join(CACHE_MODES)}")
+        self.client = client
+        self.store = store
+        self.mode = mode
+
+    def cache_key(self, messages: Sequence[LLMMessage], tools: Sequence[Any] = (),
+                  json_output: Any = None, extra_create_args: Mapping[str, Any] = None,
+                  **kwargs: Any) -> str:
+        """SHA-256 от всего, что влияет на ответ модели"""
+        material = {
+            # Модель и параметры генерации (temperature и т.п.) без ключа API
+            'create_args': _jsonable(getattr(self.client, '_create_args', {})),
+            'model_info': _jsonable(dict(self.client.model_info)),
+            'messages': _jsonable(list(messages)),
+            'tools': _jsonable(list(tools)),
+            'json_output': _jsonable(json_output),
+            'extra_create_args': _jsonable(dict(extra_create_args or {})),
+            'options': _jsonable(kwargs)
+        }
+        payload = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[CreateResult]:
+        if self.mode == 'off':
+            return None
+        record = self.store.get(key)
+        if record is None:
+            if self.mode == 'replay':
+                raise ReplayMissError(
+                    f"Нет записанного ответа {key[:12]}: запустите пример с AGENT_CACHE_MODE=record"
+                )
+            return None
+        return CreateResult.model_validate(record['result']).model_copy(update={'cached': True})
+
+    def _record(self, key: str, result: CreateResult):
+        if self.mode == 'record':
+            self.store.put(key, {
+                'model': getattr(self.client, '_create_args', {}).get('model'),
+                'recorded_at': time.time(),
+                'result': result.model_dump(mode='json')
+            })
+
+    async def create(self, messages: Sequence[LLMMessage], *, tools: Sequence[Any] = [],
+                     json_output: Any = None, extra_create_args: Mapping[str, Any] = {},
+                     cancellation_token: Optional[CancellationToken] = None,
+                     **kwargs: Any) -> CreateResult:
+        key = self.cache_key(messages, tools, json_output, extra_create_args, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        result = await self.client.create(
+            messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token, **kwargs
+        )
+        self._record(key, result)
+        return result
+
+    async def create_stream(self, messages: Sequence[LLMMessage], *, tools: Sequence[Any] = [],
+                            json_output: Any = None, extra_create_args: Mapping[str, Any] = {},
+                            cancellation_token: Optional[CancellationToken] = None,
+                            **kwargs: Any) -> AsyncGenerator[Union[str, CreateResult], None]:
+        key = self.cache_key(messages, tools, json_output, extra_create_args, **kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            # Записанный ответ отдается одним фрагментом и итоговым результатом
+            if isinstance(cached.content, str):
+                yield cached.content
+            yield cached
+            return
+
+        async for chunk in self.client.create_stream(
+            messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args,
+            cancellation_token=cancellation_token, **kwargs
+        ):
+            if isinstance(chunk, CreateResult):
+                self._record(key, chunk)
+            yield chunk
+
+    async def close(self):
+        await self.client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        # Ответы из кэша токенов не расходуют и в расход не попадают
+        return self.client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self.client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Any] = []) -> int:
+        return self.client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Any] = []) -> int:
+        return self.client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self):
+        return self.client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.client.model_info
+
+
+def create_model_client(model: str = 'gpt-4', **kwargs: Any) -> ChatCompletionClient:
+    """OpenAIChatCompletionClient с кэшем ответов по настройкам окружения.
+
+    AGENT_CACHE_MODE - record (по умолчанию), replay или off;
+    AGENT_CACHE_DIR - каталог кэша (по умолчанию agents/.model_cache);
+    AGENT_CACHE_MAX_MB - предельный размер кэша.
+    """
+    mode = os.getenv('AGENT_CACHE_MODE', 'record')
+    api_key = kwargs.pop('api_key', None) or os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        if mode != 'replay':
+            raise ValueError("OPENAI_API_KEY не установлен (без ключа доступен только AGENT_CACHE_MODE=replay)")
+        api_key = REPLAY_API_KEY
+
+    client = OpenAIChatCompletionClient(model=model, api_key=api_key, **kwargs)
+    if mode == 'off':
+        return client
+
+    store = DiskResponseStore(
+        os.getenv('AGENT_CACHE_DIR', DEFAULT_CACHE_DIR),
+        int(float(os.getenv('AGENT_CACHE_MAX_MB', 200)) * 1024 * 1024)
+    )
+    return CachingChatCompletionClient(client, store, mode)
@@ -5,25 +5,19 @@
 
 import asyncio
 from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
+from model_cache import create_model_client
 
 async def main():
-    # Проверяем наличие API ключа
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        print("❌ Ошибка: OPENAI_API_KEY не установлен!")
+    # Клиент OpenAI с кэшем ответов (AGENT_CACHE_MODE=replay работает без ключа)
+    try:
+        model_client = create_model_client("gpt-4")
+    except ValueError as e:
+        print(f"❌ Ошибка: {e}")
         print("💡 Установите переменную окружения:")
         print("   export OPENAI_API_KEY='ваш_ключ_здесь'")
         return
 
-    print("🔑 API ключ найден, создаем клиента...")
-
-    # Создаем клиент OpenAI
-    model_client = OpenAIChatCompletionClient(
-        model="gpt-4",
-        api_key=api_key
-    )
+    print("🔑 Клиент модели создан")
 
     # Создаем агента-ассистента
     assistant = AssistantAgent(
@@ -44,5 +38,9 @@ async def main():
     print("📝 Ответ ассистента:")
     print(result.messages[-1].content if result.messages else "Нет ответа")
 
+    if hasattr(model_client, "store"):
+        print(f"💾 Кэш ответов: {model_client.store.stats()}")
+    await model_client.close()
+
 if __name__ == "__main__":
     asyncio.run(main())
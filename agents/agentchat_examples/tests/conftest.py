@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Примеры импортируют model_cache как модуль верхнего уровня
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
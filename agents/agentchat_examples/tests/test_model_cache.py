@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('autogen_agentchat')
+pytest.importorskip('autogen_ext.models.openai')
+
+from autogen_agentchat.agents import AssistantAgent  # noqa: E402
+from autogen_core.models import CreateResult, RequestUsage, SystemMessage, UserMessage  # noqa: E402
+from autogen_ext.models.replay import ReplayChatCompletionClient  # noqa: E402
+
+from model_cache import (  # noqa: E402
+    CachingChatCompletionClient,
+    DiskResponseStore,
+    ReplayMissError,
+    create_model_client,
+)
+
+MESSAGES = [SystemMessage(content='Ты ассистент.'), UserMessage(content='Привет!', source='user')]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class CountingClient(ReplayChatCompletionClient):
+    """Модель без сети, которая считает обращения к себе"""
+
+    def __init__(self, responses: list):
+        super().__init__(responses)
+        self._create_args = {'model': 'gpt-4', 'temperature': 0}
+        self.calls = 0
+        self.set_cached_bool_value(False)
+
+    async def create(self, messages, **kwargs):
+        self.calls += 1
+        return await super().create(messages, **kwargs)
+
+    async def create_stream(self, messages, **kwargs):
+        self.calls += 1
+        async for chunk in super().create_stream(messages, **kwargs):
+            yield chunk
+
+
+class OfflineError(AssertionError):
+    pass
+
+
+async def no_network(*args, **kwargs):
+    raise OfflineError('Запрос к модели в режиме replay')
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DiskResponseStore(tmp_path / 'cache', 1024 * 1024)
+
+
+def test_second_identical_request_is_served_from_disk(store):
+    inner = CountingClient(['Первый ответ', 'Второй ответ'])
+    client = CachingChatCompletionClient(inner, store, 'record')
+
+    first = run(client.create(MESSAGES))
+    second = run(client.create(MESSAGES))
+
+    assert inner.calls == 1
+    assert second.content == first.content == 'Первый ответ'
+    assert not first.cached and second.cached
+    assert store.stats()['hits'] == 1
+
+
+def test_key_depends_on_messages_and_parameters(store):
+    client = CachingChatCompletionClient(CountingClient(['ответ']), store, 'record')
+    key = client.cache_key(MESSAGES)
+
+    assert key == client.cache_key(list(MESSAGES))
+    assert key != client.cache_key(MESSAGES[:1])
+    assert key != client.cache_key(MESSAGES, extra_create_args={'temperature': 1})
+
+    client.client._create_args = {'model': 'gpt-4o', 'temperature': 0}
+    assert key != client.cache_key(MESSAGES)
+
+
+def test_replay_serves_recording_without_model(store):
+    run(CachingChatCompletionClient(CountingClient(['Записанный ответ']), store, 'record').create(MESSAGES))
+
+    offline = CountingClient([])
+    offline.create = no_network
+    replay = CachingChatCompletionClient(offline, store, 'replay')
+
+    results = [run(replay.create(MESSAGES)) for _ in range(3)]
+
+    assert {result.content for result in results} == {'Записанный ответ'}
+    with pytest.raises(ReplayMissError):
+        run(replay.create([UserMessage(content='Другой вопрос', source='user')]))
+
+
+def test_streamed_response_is_recorded_and_replayed(store):
+    async def collect(client):
+        return [chunk async for chunk in client.create_stream(MESSAGES)]
+
+    inner = CountingClient(['Потоковый ответ'])
+    recorded = run(collect(CachingChatCompletionClient(inner, store, 'record')))
+    replayed = run(collect(CachingChatCompletionClient(CountingClient([]), store, 'replay')))
+
+    assert inner.calls == 1
+    assert isinstance(recorded[-1], CreateResult) and isinstance(replayed[-1], CreateResult)
+    assert replayed[-1].content == recorded[-1].content == 'Потоковый ответ'
+    assert ''.join(chunk for chunk in replayed[:-1]) == 'Потоковый ответ'
+
+
+def test_least_recently_used_responses_are_evicted(tmp_path):
+    store = DiskResponseStore(tmp_path, 2000)
+    for index in range(10):
+        store.put(f'{index:02d}' * 32, {'result': 'x' * 300})
+        store.get('00' * 32)
+
+    assert store.stats()['bytes'] <= 2000
+    assert store.evictions > 0
+    assert store.get('00' * 32) is not None
+    assert store.get('01' * 32) is None
+
+
+def test_agent_workflow_replays_offline_without_api_key(tmp_path, monkeypatch):
+    monkeypatch.setenv('AGENT_CACHE_DIR', str(tmp_path))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setenv('AGENT_CACHE_MODE', 'record')
+
+    async def fake_openai(messages, **kwargs):
+        return CreateResult(finish_reason='stop', content='Ответ модели', cached=False,
+                            usage=RequestUsage(prompt_tokens=10, completion_tokens=3))
+
+    async def ask():
+        model_client = create_model_client('gpt-4')
+        model_client.client.create = fake_openai if recording else no_network
+        agent = AssistantAgent(name='assistant', model_client=model_client, system_message='Ты ассистент.')
+        result = await agent.run(task='Расскажи о проекте')
+        await model_client.close()
+        return result.messages[-1]
+
+    recording = True
+    recorded = run(ask())
+
+    monkeypatch.delenv('OPENAI_API_KEY')
+    monkeypatch.setenv('AGENT_CACHE_MODE', 'replay')
+    recording = False
+    replayed = run(ask())
+
+    assert replayed.content == recorded.content == 'Ответ модели'
@@ -1,42 +1,120 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
+from functools import wraps
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
-from services.auth_service import AuthService
-from services.company_service import CompanyService
-from services.project_service import ProjectService
-from utils.database import get_supabase_client
+import uuid
+from services.auth_service import get_auth_service
+from services.company_service import get_company_service
+from services.dashboard_service import get_dashboard_service
+from services.member_import_service import (
+    IMPORT_FORMATS, ImportTooLarge, get_max_import_bytes, get_member_import_service
+)
+from services.project_service import MAX_BATCH_SIZE, get_project_service
+from models.repository import get_repository, peek_repository
+from utils import metrics
+from utils.activity_log import get_activity_log
+from utils.hashing import HashingPoolBusy
+from utils.cache import get_user_companies_cache
+from utils.http_cache import compress_response, etag_matches, make_etag
+from utils.pagination import parse_limit
+from utils.rate_limit import RateLimited, get_auth_throttle
 
 # Загружаем переменные окружения
 load_dotenv('../.env')
 
-app = Flask(__name__)
-CORS(app)
+api = Blueprint('api', __name__)
 
-# Инициализируем сервисы
-auth_service = AuthService()
-company_service = CompanyService()
-project_service = ProjectService()
+# Сервисы создаются при первом запросе (или в warm_up), а не при импорте:
+# импорт модуля не требует переменных окружения и не создает клиентов базы
+SERVICES = (
+    get_auth_service,
+    get_company_service,
+    get_dashboard_service,
+    get_project_service,
+    get_member_import_service
+)
 
-@app.route('/api/health', methods=['GET'])
+# Запас на заголовки частей multipart сверх размера файла импорта
+MULTIPART_OVERHEAD = 64 * 1024
+
+def with_etag(response, etag: str, vary: str = None):
+    """ETag и обязательная ревалидация: браузер сам пришлет If-None-Match"""
+    if etag:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'private, no-cache'
+    if vary:
+        response.vary.add(vary)
+    return response
+
+def not_modified(etag: str, vary: str = None):
+    """Ответ 304 без тела"""
+    return with_etag(Response(status=304), etag, vary)
+
+def throttled(route: str):
+    """Лимиты AuthThrottle для маршрута входа или регистрации"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Тело проверяет сам маршрут; лимит по email - только для строки в JSON-объекте
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            try:
+                with get_auth_throttle().admit(route, request.remote_addr, email):
+                    return view(*args, **kwargs)
+            except RateLimited as e:
+                return jsonify({'error': str(e)}), e.status, {'Retry-After': e.retry_after_header()}
+        return wrapper
+    return decorator
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
-    """Проверка состояния API"""
-    return jsonify({'status': 'ok', 'message': 'API работает'})
+    """Проверка состояния API (процесс жив); к базе не обращается"""
+    repository = peek_repository()
+    return jsonify({
+        'status': 'ok',
+        'message': 'API работает',
+        'cache': {'user_companies': get_user_companies_cache().stats()},
+        'pool': repository.pool_stats() if repository else None,
+        'auth_limits': get_auth_throttle().stats(),
+        'activity_log': get_activity_log().stats()
+    })
 
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Готовность принимать трафик: сервисы созданы и база отвечает"""
+    try:
+        warm_up()
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+    
+    return jsonify({'status': 'ready'})
+
+@api.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Метрики запросов и вызовов базы в формате Prometheus"""
+    body, content_type = metrics.render_metrics()
+    return Response(body, content_type=content_type)
+
+@api.route('/api/auth/register', methods=['POST'])
+@throttled('register')
 def register():
     """Регистрация нового пользователя и создание компании"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Тело запроса должно быть JSON-объектом'}), 400
         
         # Валидация данных
         required_fields = ['email', 'password', 'firstName', 'lastName', 'companyName']
         for field in required_fields:
-            if not data.get(field):
+            if not data.get(field) or not isinstance(data[field], str):
                 return jsonify({'error': f'Поле {field} обязательно'}), 400
         
         # Регистрация пользователя и создание компании
-        result = auth_service.register_user_and_company(
+        result = get_auth_service().register_user_and_company(
             email=data['email'],
             password=data['password'],
             first_name=data['firstName'],
@@ -54,19 +132,26 @@ def register():
         else:
             return jsonify({'error': result['error']}), 400
             
+    except HashingPoolBusy as e:
+        metrics.auth_rejections.labels('register', 'hashing').inc()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
+@throttled('login')
 def login():
     """Вход пользователя в систему"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Тело запроса должно быть JSON-объектом'}), 400
         
-        if not data.get('email') or not data.get('password'):
+        if (not data.get('email') or not data.get('password')
+                or not isinstance(data['email'], str) or not isinstance(data['password'], str)):
             return jsonify({'error': 'Email и пароль обязательны'}), 400
         
-        result = auth_service.login_user(
+        result = get_auth_service().login_user(
             email=data['email'],
             password=data['password']
         )
@@ -80,10 +165,13 @@ def login():
         else:
             return jsonify({'error': result['error']}), 401
             
+    except HashingPoolBusy as e:
+        metrics.auth_rejections.labels('login', 'hashing').inc()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/companies', methods=['GET'])
+@api.route('/api/companies', methods=['GET'])
 def get_user_companies():
     """Получение компаний пользователя"""
     try:
@@ -91,16 +179,160 @@ def get_user_companies():
         if not user_id:
             return jsonify({'error': 'Необходима авторизация'}), 401
         
-        companies = company_service.get_user_companies(user_id)
-        return jsonify({
+        companies = get_company_service().get_user_companies(user_id)
+        
+        # Список компаний небольшой и берется из кэша, поэтому ETag считаем по нему
+        etag = make_etag('companies', user_id, companies)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return not_modified(etag, vary='X-User-ID')
+        
+        response = jsonify({
             'success': True,
             'data': companies
+        })
+        return with_etag(response, etag, vary='X-User-ID'), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """Компании пользователя и первая страница проектов выбранной компании"""
+    try:
+        user_id = request.headers.get('X-User-ID')
+        if not user_id:
+            return jsonify({'error': 'Необходима авторизация'}), 401
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            dashboard = get_dashboard_service().get_dashboard(
+                user_id, company_id=request.args.get('company_id'), limit=limit
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        etag = make_etag('dashboard', user_id, dashboard)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return not_modified(etag, vary='X-User-ID')
+        
+        response = jsonify({
+            'success': True,
+            'data': dashboard
+        })
+        return with_etag(response, etag, vary='X-User-ID'), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/api/companies/<company_id>/stats', methods=['GET'])
+def get_company_stats(company_id):
+    """Статистика компании для шапки главной страницы и отчетов"""
+    try:
+        user_id = request.headers.get('X-User-ID')
+        if not user_id:
+            return jsonify({'error': 'Необходима авторизация'}), 401
+        
+        if get_company_service().get_user_role(user_id, company_id) is None:
+            return jsonify({'error': 'Нет доступа к компании'}), 403
+        
+        stats = get_company_service().get_company_stats(company_id)
+        if stats is None:
+            return jsonify({'error': 'Статистика компании не найдена'}), 404
+        
+        return jsonify({
+            'success': True,
+            'data': stats
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/api/companies/<company_id>/activity', methods=['GET'])
+def get_company_activity(company_id):
+    """Лента действий компании: входы, проекты и участники"""
+    try:
+        user_id = request.headers.get('X-User-ID')
+        if not user_id:
+            return jsonify({'error': 'Необходима авторизация'}), 401
+        
+        if get_company_service().get_user_role(user_id, company_id) is None:
+            return jsonify({'error': 'Нет доступа к компании'}), 403
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            page = get_company_service().get_company_activity(
+                company_id, limit=limit, cursor=request.args.get('cursor')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            'data': page['data'],
+            'next_cursor': page['next_cursor']
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/projects', methods=['GET'])
+@api.route('/api/companies/<company_id>/members/import', methods=['POST'])
+def import_company_members(company_id):
+    """Запуск фонового импорта участников компании из CSV или NDJSON"""
+    try:
+        user_id = request.headers.get('X-User-ID')
+        if not user_id:
+            return jsonify({'error': 'Необходима авторизация'}), 401
+        
+        if get_company_service().get_user_role(user_id, company_id) not in ('owner', 'admin'):
+            return jsonify({'error': 'Недостаточно прав для импорта участников'}), 403
+        
+        if (request.content_length or 0) > get_max_import_bytes() + MULTIPART_OVERHEAD:
+            raise ImportTooLarge()
+        
+        # Файл можно передать как multipart-поле file или телом запроса
+        upload = request.files.get('file')
+        filename = upload.filename if upload else ''
+        file_format = request.args.get('format') or filename.rsplit('.', 1)[-1].lower()
+        if file_format == 'jsonl':
+            file_format = 'ndjson'
+        if file_format not in IMPORT_FORMATS:
+            return jsonify({'error': 'Формат должен быть csv или ndjson'}), 400
+        
+        job = get_member_import_service().start_import(
+            company_id=company_id,
+            stream=upload.stream if upload else request.stream,
+            file_format=file_format,
+            requested_by=user_id
+        )
+        
+        return jsonify({
+            'success': True,
+            'message': 'Импорт запущен',
+            'data': job
+        }), 202
+        
+    except (ImportTooLarge, RequestEntityTooLarge):
+        return jsonify({'error': str(ImportTooLarge())}), 413
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/api/imports/<job_id>', methods=['GET'])
+def get_import_status(job_id):
+    """Прогресс импорта участников"""
+    user_id = request.headers.get('X-User-ID')
+    if not user_id:
+        return jsonify({'error': 'Необходима авторизация'}), 401
+    
+    job = get_member_import_service().get_job(job_id)
+    if not job or job['requested_by'] != user_id:
+        return jsonify({'error': 'Импорт не найден'}), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job
+    }), 200
+
+@api.route('/api/projects', methods=['GET'])
 def get_company_projects():
     """Получение проектов компании"""
     try:
@@ -108,16 +340,116 @@ def get_company_projects():
         if not company_id:
             return jsonify({'error': 'ID компании обязателен'}), 400
         
-        projects = project_service.get_company_projects(company_id)
-        return jsonify({
+        try:
+            uuid.UUID(company_id)
+        except ValueError:
+            return jsonify({'error': 'Некорректный ID компании'}), 400
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Версию читаем до выборки: если данные успеют измениться, ETag окажется
+        # устаревшим и следующий запрос просто получит полный ответ
+        cursor = request.args.get('cursor')
+        version = get_project_service().get_company_version(company_id)
+        etag = make_etag('projects', company_id, version, limit, cursor) if version is not None else None
+        if etag and etag_matches(request.headers.get('If-None-Match'), etag):
+            return not_modified(etag)
+        
+        try:
+            page = get_project_service().get_company_projects(company_id, limit=limit, cursor=cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        response = jsonify({
             'success': True,
-            'data': projects
-        }), 200
+            'data': page['data'],
+            'next_cursor': page['next_cursor']
+        })
+        return with_etag(response, etag), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/projects', methods=['POST'])
+@api.route('/api/projects/search', methods=['GET'])
+def search_projects():
+    """Полнотекстовый поиск проектов компании"""
+    try:
+        user_id = request.headers.get('X-User-ID')
+        if not user_id:
+            return jsonify({'error': 'Необходима авторизация'}), 401
+        
+        company_id = request.args.get('company_id')
+        if not company_id:
+            return jsonify({'error': 'ID компании обязателен'}), 400
+        
+        try:
+            uuid.UUID(company_id)
+        except ValueError:
+            return jsonify({'error': 'Некорректный ID компании'}), 400
+        
+        # Проверка до ETag: 304 тоже не должен подтверждать чужие данные
+        if get_company_service().get_user_role(user_id, company_id) is None:
+            return jsonify({'error': 'Нет доступа к компании'}), 403
+        
+        query = request.args.get('q', '')
+        cursor = request.args.get('cursor')
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        version = get_project_service().get_company_version(company_id)
+        etag = make_etag('search', company_id, version, query, limit, cursor) if version is not None else None
+        if etag and etag_matches(request.headers.get('If-None-Match'), etag):
+            return not_modified(etag)
+        
+        try:
+            page = get_project_service().search_projects(company_id, query, limit=limit, cursor=cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        response = jsonify({
+            'success': True,
+            'data': page['data'],
+            'next_cursor': page['next_cursor']
+        })
+        return with_etag(response, etag), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/api/projects/members', methods=['GET'])
+def get_projects_members():
+    """Участники и их число для нескольких проектов компании"""
+    try:
+        user_id = request.headers.get('X-User-ID')
+        if not user_id:
+            return jsonify({'error': 'Необходима авторизация'}), 401
+        
+        company_id = request.args.get('company_id')
+        if not company_id:
+            return jsonify({'error': 'ID компании обязателен'}), 400
+        
+        # Список участников содержит email, поэтому только для участников компании
+        if get_company_service().get_user_role(user_id, company_id) is None:
+            return jsonify({'error': 'Нет доступа к компании'}), 403
+        
+        project_ids = [value.strip() for value in request.args.get('ids', '').split(',') if value.strip()]
+        counts_only = request.args.get('counts_only', '').lower() in ('1', 'true', 'yes')
+        try:
+            members = get_project_service().get_projects_members(company_id, project_ids, counts_only)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({'success': True, 'data': members}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/api/projects', methods=['POST'])
 def create_project():
     """Создание нового проекта"""
     try:
@@ -132,7 +464,7 @@ def create_project():
             if not data.get(field):
                 return jsonify({'error': f'Поле {field} обязательно'}), 400
         
-        result = project_service.create_project(
+        result = get_project_service().create_project(
             name=data['name'],
             description=data.get('description', ''),
             company_id=data['company_id'],
@@ -151,8 +483,71 @@ def create_project():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api.route('/api/projects/batch', methods=['POST'])
+def batch_projects():
+    """Пакетное создание, изменение и удаление проектов"""
+    try:
+        data = request.get_json()
+        user_id = request.headers.get('X-User-ID')
+        
+        if not user_id:
+            return jsonify({'error': 'Необходима авторизация'}), 401
+        
+        if not data.get('company_id'):
+            return jsonify({'error': 'Поле company_id обязательно'}), 400
+        
+        operations = data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'Поле operations должно быть непустым массивом'}), 400
+        
+        if len(operations) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Не более {MAX_BATCH_SIZE} операций за запрос'}), 400
+        
+        results = get_project_service().apply_batch(data['company_id'], user_id, operations)
+        succeeded = sum(1 for item in results if item['success'])
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results,
+                'succeeded': succeeded,
+                'failed': len(results) - succeeded
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def create_app() -> Flask:
+    """Создание Flask-приложения"""
+    app = Flask(__name__)
+    # Самое большое тело запроса - файл импорта участников
+    app.config['MAX_CONTENT_LENGTH'] = get_max_import_bytes() + MULTIPART_OVERHEAD
+    # За обратным прокси адрес клиента (для лимитов по IP) берется из
+    # X-Forwarded-For; PROXY_COUNT - число доверенных прокси перед приложением
+    proxy_count = int(os.getenv('PROXY_COUNT', 0))
+    if proxy_count:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count, x_proto=proxy_count)
+    CORS(app)
+    app.register_blueprint(api)
+    metrics.init_app(app)
+    
+    @app.after_request
+    def compress(response):
+        return compress_response(response, request.headers.get('Accept-Encoding'))
+    
+    return app
+
+def warm_up():
+    """Создание сервисов и прогрев соединений с базой до приема трафика"""
+    for get_service in SERVICES:
+        get_service()
+    get_repository().ping()
+
+# Модуль не создает приложение при импорте: gunicorn вызывает create_app()
+# сам (app:create_app()), asgi.py - при своей загрузке
 if __name__ == '__main__':
     port = int(os.environ.get('BACKEND_PORT', 5003))
-    app.run(debug=True, host='0.0.0.0', port=port)
+    create_app().run(debug=True, host='0.0.0.0', port=port)
 
 
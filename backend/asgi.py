@@ -0,0 +1,550 @@
+"""
+ASGI-вариант бэкенда.
+
+GET /api/companies, GET /api/dashboard и GET /api/projects обслуживаются
+асинхронно: пока запрос ждет ответа базы, процесс принимает другие. Остальные
+маршруты передаются Flask-приложению через адаптер WSGI -> ASGI.
+
+GET /api/projects/stream (Server-Sent Events) есть только здесь: открытое
+соединение стоит корутину, а не поток воркера. Здесь же работает очередь
+задач агентов (/api/projects/<id>/agent-runs, /api/agent-runs/<id>): ее
+воркеры - задачи того же цикла событий.
+
+Запуск из каталога backend:
+    uvicorn asgi:application --host 0.0.0.0 --port 5003
+"""
+
+import asyncio
+import json
+import os
+import re
+import uuid
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from models.async_repository import create_async_repository
+from services.agent_run_service import create_agent_queue, parse_agent_task
+from services.dashboard_service import dashboard_page
+from utils.agent_queue import AgentQueueFull
+from utils.cache import get_user_companies_cache
+from utils.metrics import finish_request, sse_subscribers, start_request
+from utils.notify_listener import create_notify_listener
+from utils.http_cache import (
+    COMPRESS_MIN_SIZE,
+    choose_encoding,
+    compress_body,
+    encoded_etag,
+    etag_matches,
+    make_etag,
+)
+from utils.pagination import decode_cursor, paginate, parse_limit
+
+flask_application = WsgiToAsgi(create_app())
+repository = create_async_repository()
+user_companies_cache = get_user_companies_cache()
+project_changes = create_notify_listener('project_changes')
+agent_queue = create_agent_queue()
+
+# Комментарий-пинг не дает прокси закрыть простаивающее соединение
+SSE_HEARTBEAT = float(os.getenv('SSE_HEARTBEAT', 25))
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', 5000))
+
+
+async def send_response(send, status: int, payload: bytes = b'', headers: list = None):
+    headers = [
+        (b'content-length', str(len(payload)).encode('ascii')),
+        # Тот же заголовок, что добавляет Flask-CORS для остальных маршрутов
+        (b'access-control-allow-origin', b'*')
+    ] + [(key.encode('latin-1'), value.encode('latin-1')) for key, value in (headers or [])]
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def send_json(send, body: dict, status: int = 200, scope=None, etag: str = None,
+                    vary: str = None):
+    payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    headers = [('content-type', 'application/json')]
+    if vary:
+        headers.append(('vary', vary))
+
+    if status == 200 and scope is not None:
+        headers.append(('vary', 'Accept-Encoding'))
+        encoding = choose_encoding(get_header(scope, 'Accept-Encoding'))
+        if encoding and len(payload) >= COMPRESS_MIN_SIZE:
+            payload = compress_body(payload, encoding)
+            headers.append(('content-encoding', encoding))
+            etag = encoded_etag(etag, encoding)
+
+    if etag:
+        headers += [('etag', etag), ('cache-control', 'private, no-cache')]
+
+    await send_response(send, status, payload, headers)
+
+
+async def send_preflight(send):
+    """Ответ на CORS preflight для POST с JSON (маршруты Flask отвечает Flask-CORS)"""
+    await send_response(send, 204, headers=[
+        ('access-control-allow-methods', 'GET, POST, OPTIONS'),
+        ('access-control-allow-headers', 'Content-Type, X-User-ID'),
+        ('access-control-max-age', '600')
+    ])
+
+
+async def send_not_modified(send, etag: str, vary: str = None):
+    headers = [('etag', etag), ('cache-control', 'private, no-cache')]
+    if vary:
+        headers.append(('vary', vary))
+    await send_response(send, 304, headers=headers)
+
+
+def get_header(scope, name: str) -> str:
+    name = name.lower().encode('latin-1')
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def get_query(scope) -> dict:
+    query = parse_qs(scope['query_string'].decode('latin-1'))
+    return {key: values[0] for key, values in query.items()}
+
+
+# Тело POST-запроса к асинхронным маршрутам - короткий JSON
+MAX_BODY_SIZE = 64 * 1024
+
+
+async def read_json(receive) -> dict:
+    """Тело запроса как JSON-объект; ValueError, если это не объект или тело слишком большое"""
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ValueError('Клиент закрыл соединение')
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_SIZE:
+            raise ValueError('Слишком большое тело запроса')
+        if not message.get('more_body'):
+            break
+
+    data = json.loads(body or b'{}')
+    if not isinstance(data, dict):
+        raise ValueError('Ожидается JSON-объект')
+    return data
+
+
+async def get_user_companies(scope, send):
+    """Получение компаний пользователя"""
+    try:
+        user_id = get_header(scope, 'X-User-ID')
+        if not user_id:
+            return await send_json(send, {'error': 'Необходима авторизация'}, 401)
+
+        companies = user_companies_cache.get(user_id)
+        if companies is None:
+            companies = await repository.get_user_companies(user_id)
+            user_companies_cache.set(user_id, companies)
+
+        etag = make_etag('companies', user_id, companies)
+        if etag_matches(get_header(scope, 'If-None-Match'), etag):
+            return await send_not_modified(send, etag, vary='X-User-ID')
+
+        await send_json(send, {'success': True, 'data': companies}, scope=scope, etag=etag, vary='X-User-ID')
+
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+
+
+async def get_company_projects(scope, send):
+    """Получение страницы проектов компании"""
+    try:
+        query = get_query(scope)
+        company_id = query.get('company_id')
+        if not company_id:
+            return await send_json(send, {'error': 'ID компании обязателен'}, 400)
+
+        try:
+            uuid.UUID(company_id)
+        except ValueError:
+            return await send_json(send, {'error': 'Некорректный ID компании'}, 400)
+
+        cursor = query.get('cursor')
+        try:
+            limit = parse_limit(query.get('limit'))
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return await send_json(send, {'error': str(e)}, 400)
+
+        version = await repository.get_company_version(company_id)
+        etag = make_etag('projects', company_id, version, limit, cursor) if version is not None else None
+        if etag and etag_matches(get_header(scope, 'If-None-Match'), etag):
+            return await send_not_modified(send, etag)
+
+        projects, next_cursor = paginate(
+            await repository.list_company_projects(company_id, limit + 1, after), limit
+        )
+        await send_json(send, {'success': True, 'data': projects, 'next_cursor': next_cursor},
+                        scope=scope, etag=etag)
+
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+
+
+async def get_dashboard(scope, send):
+    """Компании пользователя и первая страница проектов выбранной компании"""
+    try:
+        user_id = get_header(scope, 'X-User-ID')
+        if not user_id:
+            return await send_json(send, {'error': 'Необходима авторизация'}, 401)
+
+        query = get_query(scope)
+        company_id = query.get('company_id')
+        try:
+            limit = parse_limit(query.get('limit'))
+            if company_id:
+                uuid.UUID(company_id)
+        except ValueError as e:
+            return await send_json(send, {'error': str(e)}, 400)
+
+        dashboard = dashboard_page(
+            await repository.get_dashboard(user_id, company_id, limit + 1) or {}, limit
+        )
+        user_companies_cache.set(user_id, dashboard['companies'])
+
+        etag = make_etag('dashboard', user_id, dashboard)
+        if etag_matches(get_header(scope, 'If-None-Match'), etag):
+            return await send_not_modified(send, etag, vary='X-User-ID')
+
+        await send_json(send, {'success': True, 'data': dashboard}, scope=scope, etag=etag, vary='X-User-ID')
+
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+
+
+async def user_company_ids(user_id: str) -> set:
+    companies = user_companies_cache.get(user_id)
+    if companies is None:
+        companies = await repository.get_user_companies(user_id)
+        user_companies_cache.set(user_id, companies)
+    return {company['company_id'] for company in companies or []}
+
+
+async def stream_project_changes(scope, receive, send):
+    """Поток изменений проектов компании (Server-Sent Events)"""
+    query = get_query(scope)
+    # EventSource не умеет передавать заголовки, поэтому пользователь
+    # может быть указан и в параметре запроса
+    user_id = get_header(scope, 'X-User-ID') or query.get('user_id')
+    company_id = query.get('company_id')
+    if not user_id:
+        return await send_json(send, {'error': 'Необходима авторизация'}, 401)
+    if not company_id:
+        return await send_json(send, {'error': 'ID компании обязателен'}, 400)
+    if project_changes is None:
+        return await send_json(send, {'error': 'Поток изменений недоступен: не задан DATABASE_URL'}, 503)
+
+    try:
+        if company_id not in await user_company_ids(user_id):
+            return await send_json(send, {'error': 'Нет доступа к компании'}, 403)
+    except Exception as e:
+        return await send_json(send, {'error': str(e)}, 500)
+
+    subscription = project_changes.subscribe(company_id)
+    sse_subscribers.inc()
+
+    async def wait_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscription.close()
+
+    watcher = asyncio.create_task(wait_disconnect())
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': sse_headers()})
+        await send({'type': 'http.response.body', 'body': f'retry: {SSE_RETRY_MS}\n\n'.encode(),
+                    'more_body': True})
+
+        while not subscription.closed:
+            event = await subscription.next_event(SSE_HEARTBEAT)
+            if subscription.closed:
+                break
+            if event is None:
+                chunk = b': ping\n\n'
+            else:
+                data = json.dumps(event, ensure_ascii=False)
+                chunk = f'event: project_change\ndata: {data}\n\n'.encode('utf-8')
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        # Остановка сервера или отключение клиента: ответ завершается
+        await send({'type': 'http.response.body', 'body': b''})
+
+    except OSError:
+        pass
+    finally:
+        watcher.cancel()
+        project_changes.unsubscribe(subscription)
+        sse_subscribers.dec()
+
+
+def sse_headers() -> list:
+    return [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+        (b'access-control-allow-origin', b'*')
+    ]
+
+
+async def authorized_project(scope, send, user_id: str, project_id: str) -> dict:
+    """Проект, если пользователь состоит в его компании; иначе ответ с ошибкой и None"""
+    if not user_id:
+        return await send_json(send, {'error': 'Необходима авторизация'}, 401)
+    if agent_queue is None:
+        return await send_json(send, {
+            'error': 'Задачи агентов недоступны: не установлен autogen-agentchat или не задан OPENAI_API_KEY'
+        }, 503)
+    try:
+        uuid.UUID(project_id)
+    except ValueError:
+        return await send_json(send, {'error': 'Некорректный ID проекта'}, 400)
+
+    project = await repository.get_project(project_id)
+    if project is None:
+        return await send_json(send, {'error': 'Проект не найден'}, 404)
+    if project['company_id'] not in await user_company_ids(user_id):
+        return await send_json(send, {'error': 'Нет доступа к проекту'}, 403)
+    return project
+
+
+async def authorized_agent_job(scope, send, user_id: str, job_id: str):
+    """Задача агентов, если пользователь состоит в компании ее проекта"""
+    if not user_id:
+        return await send_json(send, {'error': 'Необходима авторизация'}, 401)
+    job = agent_queue.get(job_id) if agent_queue is not None else None
+    if job is None:
+        return await send_json(send, {'error': 'Задача не найдена'}, 404)
+    if job.company_id not in await user_company_ids(user_id):
+        return await send_json(send, {'error': 'Нет доступа к задаче'}, 403)
+    return job
+
+
+async def create_agent_run(scope, receive, send, project_id: str):
+    """Постановка задачи агентов по проекту в очередь"""
+    try:
+        try:
+            task, mode = parse_agent_task(await read_json(receive))
+        except ValueError as e:
+            return await send_json(send, {'error': str(e)}, 400)
+
+        project = await authorized_project(scope, send, get_header(scope, 'X-User-ID'), project_id)
+        if project is None:
+            return
+
+        try:
+            job = agent_queue.submit(project['company_id'], project, get_header(scope, 'X-User-ID'),
+                                     task, mode)
+        except AgentQueueFull as e:
+            return await send_json(send, {
+                'error': str(e), 'budget': agent_queue.budget.stats(project['company_id'])
+            }, e.status)
+
+        await send_json(send, {'success': True, 'data': job.to_dict()}, 202)
+
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+
+
+async def list_agent_runs(scope, receive, send, project_id: str):
+    """Задачи агентов проекта (новые первыми) и бюджет токенов компании"""
+    try:
+        project = await authorized_project(scope, send, get_header(scope, 'X-User-ID'), project_id)
+        if project is None:
+            return
+
+        await send_json(send, {
+            'success': True,
+            'data': [job.to_dict() for job in agent_queue.list_project_jobs(project_id)],
+            'budget': agent_queue.budget.stats(project['company_id'])
+        })
+
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+
+
+async def get_agent_run(scope, receive, send, job_id: str):
+    """Статус задачи агентов и ее сообщения"""
+    try:
+        job = await authorized_agent_job(scope, send, get_header(scope, 'X-User-ID'), job_id)
+        if job is not None:
+            await send_json(send, {'success': True, 'data': job.to_dict(with_events=True)}, scope=scope)
+
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+
+
+async def cancel_agent_run(scope, receive, send, job_id: str):
+    """Отмена задачи агентов в очереди или в работе"""
+    try:
+        job = await authorized_agent_job(scope, send, get_header(scope, 'X-User-ID'), job_id)
+        if job is None:
+            return
+        if not agent_queue.cancel(job):
+            return await send_json(send, {'error': 'Задача уже завершена', 'data': job.to_dict()}, 409)
+
+        await send_json(send, {'success': True, 'data': job.to_dict()}, 202)
+
+    except Exception as e:
+        await send_json(send, {'error': str(e)}, 500)
+
+
+async def stream_agent_run(scope, receive, send, job_id: str):
+    """События задачи агентов (Server-Sent Events): status, chunk и message.
+
+    Поток начинается с начала журнала или после Last-Event-ID при
+    переподключении и закрывается после итогового статуса.
+    """
+    query = get_query(scope)
+    user_id = get_header(scope, 'X-User-ID') or query.get('user_id')
+    try:
+        job = await authorized_agent_job(scope, send, user_id, job_id)
+        if job is None:
+            return
+    except Exception as e:
+        return await send_json(send, {'error': str(e)}, 500)
+
+    last_event_id = get_header(scope, 'Last-Event-ID') or ''
+    seq = int(last_event_id) if last_event_id.isdigit() else 0
+
+    disconnected = asyncio.Event()
+
+    async def wait_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    sse_subscribers.inc()
+    watcher = asyncio.create_task(wait_disconnect())
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': sse_headers()})
+        await send({'type': 'http.response.body', 'body': f'retry: {SSE_RETRY_MS}\n\n'.encode(),
+                    'more_body': True})
+
+        while not disconnected.is_set():
+            events = await job.wait(seq, SSE_HEARTBEAT)
+            if disconnected.is_set():
+                break
+            if not events:
+                if job.done:
+                    break
+                await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                continue
+
+            chunk = ''
+            for event in events:
+                seq = event['seq']
+                data = json.dumps(event, ensure_ascii=False)
+                chunk += f"id: {seq}\nevent: {event['type']}\ndata: {data}\n\n"
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+        await send({'type': 'http.response.body', 'body': b''})
+
+    except OSError:
+        pass
+    finally:
+        watcher.cancel()
+        sse_subscribers.dec()
+
+
+# (метод, шаблон пути) -> обработчик с параметром пути; шаблон - метка метрик
+AGENT_ROUTES = {
+    ('POST', '/api/projects/{id}/agent-runs'): create_agent_run,
+    ('GET', '/api/projects/{id}/agent-runs'): list_agent_runs,
+    ('GET', '/api/agent-runs/{id}'): get_agent_run,
+    ('POST', '/api/agent-runs/{id}/cancel'): cancel_agent_run
+}
+AGENT_ROUTE_PATTERN = re.compile(r'^/api/(projects|agent-runs)/([^/]+)(/agent-runs|/cancel|/stream)?$')
+
+
+def match_agent_route(path: str) -> tuple:
+    """Шаблон маршрута и параметр пути или (None, None)"""
+    match = AGENT_ROUTE_PATTERN.match(path)
+    if not match:
+        return None, None
+    route = f'/api/{match.group(1)}/{{id}}{match.group(3) or ""}'
+    if route in ('/api/projects/{id}', '/api/projects/{id}/cancel', '/api/projects/{id}/stream'):
+        return None, None
+    return route, match.group(2)
+
+
+ASYNC_ROUTES = {
+    '/api/companies': get_user_companies,
+    '/api/dashboard': get_dashboard,
+    '/api/projects': get_company_projects
+}
+
+
+async def instrumented(handler, scope, send, route: str = None):
+    """Метрики асинхронного маршрута (маршруты Flask учитывает само приложение)"""
+    status = 500
+    method = scope['method']
+    route = route or scope['path']
+
+    async def send_with_status(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        await send(message)
+
+    started = start_request(method, route)
+    try:
+        await handler(scope, send_with_status)
+    finally:
+        finish_request(method, route, status, started)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await repository.open()
+            if project_changes is not None:
+                await project_changes.start()
+            if agent_queue is not None:
+                await agent_queue.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if agent_queue is not None:
+                await agent_queue.stop()
+            if project_changes is not None:
+                await project_changes.stop()
+            await repository.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == '/api/projects/stream':
+        return await stream_project_changes(scope, receive, send)
+
+    if scope['type'] == 'http':
+        route, item_id = match_agent_route(scope['path'])
+        if route and scope['method'] == 'OPTIONS':
+            return await send_preflight(send)
+        if route == '/api/agent-runs/{id}/stream' and scope['method'] == 'GET':
+            return await stream_agent_run(scope, receive, send, item_id)
+        handler = AGENT_ROUTES.get((scope['method'], route))
+        if handler:
+            return await instrumented(
+                lambda scope, send: handler(scope, receive, send, item_id), scope, send, route
+            )
+
+    handler = ASYNC_ROUTES.get(scope.get('path'))
+    if scope['type'] == 'http' and scope['method'] == 'GET' and handler:
+        return await instrumented(handler, scope, send)
+
+    await flask_application(scope, receive, send)
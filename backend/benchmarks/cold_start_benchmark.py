@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Время импорта приложения и холодного старта сервера
+
+Импорт: модуль app загружается в новом процессе без переменных Supabase
+(так его импортируют тесты и мастер gunicorn перед fork) - он не должен
+ни падать, ни создавать клиентов базы.
+Холодный старт: от запуска процесса сервера до первого 200 на /api/ready
+(сервисы созданы, база отвечает через заглушку PostgREST) и время первого
+запроса к API после этого.
+
+Медианы сравниваются с бюджетами; при превышении код выхода 1, поэтому
+бенчмарк можно запускать в CI перед изменением настроек автомасштабирования.
+
+Запуск из каталога backend:
+    python -m benchmarks.cold_start_benchmark --server gunicorn --runs 5
+"""
+
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_postgrest import seed_user
+from benchmarks.load_test import (
+    BACKEND_DIR,
+    SERVER_COMMANDS,
+    free_port,
+    start_process,
+    stop_process,
+)
+
+IMPORT_SNIPPET = (
+    'import time; started = time.perf_counter(); import {module}; '
+    'print((time.perf_counter() - started) * 1000)'
+)
+
+# Переменные, без которых импорт обязан проходить
+SUPABASE_ENV = ('SUPABASE_URL', 'SUPABASE_ANON_KEY', 'SUPABASE_SERVICE_ROLE_SECRET', 'DATABASE_URL')
+
+
+def measure_import(module: str) -> float:
+    """Время импорта модуля в новом процессе, мс"""
+    env = {key: value for key, value in os.environ.items() if key not in SUPABASE_ENV}
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET.format(module=module)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Импорт {module} без переменных окружения упал:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def get_status(port: int, path: str, headers: dict = None) -> int:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def measure_cold_start(server: str, env: dict, timeout: float) -> tuple:
+    """Время до готовности сервера и время первого запроса, мс"""
+    port = free_port()
+    env = dict(env, BACKEND_PORT=str(port), GUNICORN_PIDFILE=f'/tmp/master-plan-cold-start-{port}.pid')
+    log = tempfile.TemporaryFile()
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [part.format(port=port) for part in SERVER_COMMANDS[server]], cwd=BACKEND_DIR,
+        env=env, stdout=subprocess.DEVNULL, stderr=log
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None or time.monotonic() > deadline:
+                log.seek(0)
+                raise RuntimeError(f"Сервер {server} не стал готов:\n"
+                                   f"{log.read().decode(errors='replace')[-2000:]}")
+            try:
+                if get_status(port, '/api/ready') == 200:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.01)
+        ready_ms = (time.perf_counter() - started) * 1000
+
+        request_started = time.perf_counter()
+        status = get_status(port, '/api/companies', {'X-User-ID': seed_user(0, 0)['id']})
+        first_request_ms = (time.perf_counter() - request_started) * 1000
+        if status != 200:
+            raise RuntimeError(f"Первый запрос вернул {status}")
+
+        return ready_ms, first_request_ms
+    finally:
+        stop_process(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время импорта и холодного старта бэкенда')
+    parser.add_argument('--server', choices=SERVER_COMMANDS, default='gunicorn')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget', type=float, default=400, help='медиана импорта app, мс')
+    parser.add_argument('--ready-budget', type=float, default=3000,
+                        help='медиана времени до готовности, мс')
+    parser.add_argument('--first-request-budget', type=float, default=200,
+                        help='медиана первого запроса после готовности, мс')
+    parser.add_argument('--latency', type=float, default=5, help='задержка заглушки, мс')
+    parser.add_argument('--timeout', type=float, default=60, help='ожидание готовности, с')
+    args = parser.parse_args()
+
+    fake_port = free_port()
+    fake = start_process([
+        sys.executable, '-m', 'benchmarks.fake_postgrest', '--port', str(fake_port),
+        '--latency', str(args.latency), '--companies', '10'
+    ], dict(os.environ), fake_port)
+
+    env = dict(
+        os.environ,
+        SUPABASE_URL=f'http://127.0.0.1:{fake_port}',
+        SUPABASE_SERVICE_ROLE_SECRET='benchmark.service.key',
+        SUPABASE_ANON_KEY='benchmark.anon.key',
+        SUPABASE_HTTP2='false',
+        DATA_BACKEND='supabase'
+    )
+
+    try:
+        imports = [measure_import('app') for _ in range(args.runs)]
+        starts = [measure_cold_start(args.server, env, args.timeout) for _ in range(args.runs)]
+    finally:
+        stop_process(fake)
+
+    results = {
+        'import_app': (statistics.median(imports), max(imports), args.import_budget),
+        'ready': (statistics.median(run[0] for run in starts), max(run[0] for run in starts), args.ready_budget),
+        'first_request': (statistics.median(run[1] for run in starts), max(run[1] for run in starts),
+                          args.first_request_budget)
+    }
+
+    print(f"Сервер {args.server}, {args.runs} запусков\n")
+    print(f"{'этап':<16} {'медиана, мс':>12} {'макс, мс':>10} {'бюджет, мс':>11}")
+    failures = 0
+    for name, (median, worst, budget) in results.items():
+        over = median > budget
+        failures += over
+        print(f"{name:<16} {median:>12.1f} {worst:>10.1f} {budget:>11.1f}  {'превышен' if over else 'ok'}")
+
+    if failures:
+        print(f"\nПревышено бюджетов: {failures}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
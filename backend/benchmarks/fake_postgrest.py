@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Локальная замена PostgREST/Supabase для нагрузочных тестов
+
+Отвечает на запросы, которые делает SupabaseRepository, данными из памяти
+с заданной задержкой. Набор данных детерминирован (см. seed_user, seed_company),
+поэтому генератор нагрузки знает идентификаторы без обращения к серверу.
+
+Запуск из каталога backend:
+    python -m benchmarks.fake_postgrest --port 54321 --latency 20 --companies 100
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import bcrypt
+
+SEED_NAMESPACE = uuid.UUID('6f1c4b52-1d0e-4a53-9a52-0f3f5c1d2b7e')
+SEED_PASSWORD = 'benchmark-password'
+SEED_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+KEYSET_FILTER = re.compile(r'created_at\.lt\."([^"]+)".*id\.lt\.([0-9a-f-]{36})')
+
+
+def seed_user(company: int, member: int) -> dict:
+    """Пользователь member компании company (member 0 - владелец)"""
+    return {
+        'id': str(uuid.uuid5(SEED_NAMESPACE, f'user-{company}-{member}')),
+        'email': f'user-{company}-{member}@bench.local',
+        'first_name': 'Имя',
+        'last_name': f'Фамилия {member}'
+    }
+
+
+def seed_company(company: int) -> dict:
+    return {
+        'id': str(uuid.uuid5(SEED_NAMESPACE, f'company-{company}')),
+        'name': f'Компания {company}',
+        'description': 'Компания для нагрузочного теста'
+    }
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Store:
+    """Данные в памяти в формате ответов PostgREST"""
+
+    def __init__(self, companies: int, members: int, projects: int, bcrypt_rounds: int):
+        self.lock = threading.Lock()
+        self.users = {}
+        self.users_by_email = {}
+        self.companies = {}
+        self.memberships = {}
+        self.projects = {}
+        self.activity = {}
+
+        # Один хеш на всех: вход проверяет настоящий bcrypt, а заполнение остается быстрым
+        password_hash = bcrypt.hashpw(SEED_PASSWORD.encode(), bcrypt.gensalt(bcrypt_rounds)).decode()
+
+        for company_index in range(companies):
+            company = seed_company(company_index)
+            self._add_company(company['id'], company['name'], company['description'])
+
+            for member_index in range(members):
+                user = seed_user(company_index, member_index)
+                self._add_user(dict(user, password_hash=password_hash))
+                self._add_member(company['id'], user['id'], 'owner' if member_index == 0 else 'member')
+
+            owner_id = seed_user(company_index, 0)['id']
+            for project_index in range(projects):
+                created_at = SEED_EPOCH + timedelta(minutes=project_index)
+                self._add_project(company['id'], f'Проект {project_index}', '', owner_id,
+                                  created_at.isoformat())
+
+    def _add_user(self, user: dict):
+        self.users[user['id']] = user
+        self.users_by_email[user['email']] = user
+
+    def _add_company(self, company_id: str, name: str, description: str):
+        self.companies[company_id] = {
+            'id': company_id, 'name': name, 'description': description, 'data_version': 0
+        }
+        self.projects[company_id] = []
+
+    def _add_member(self, company_id: str, user_id: str, role: str):
+        self.memberships.setdefault(user_id, []).append({
+            'company_id': company_id, 'role': role, 'joined_at': now_iso()
+        })
+        self.companies[company_id]['data_version'] += 1
+
+    def _add_project(self, company_id: str, name: str, description: str, created_by: str,
+                     created_at: str) -> dict:
+        project = {
+            'id': str(uuid.uuid4()),
+            'company_id': company_id,
+            'name': name,
+            'description': description,
+            'created_by': created_by,
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+        # Список хранится по убыванию (created_at, id), как его отдает индекс
+        self.projects[company_id].insert(0, project)
+        self.companies[company_id]['data_version'] += 1
+        return project
+
+    def user_companies(self, user_id: str) -> list:
+        result = []
+        for membership in self.memberships.get(user_id, []):
+            company = self.companies[membership['company_id']]
+            result.append({
+                'company_id': company['id'],
+                'company_name': company['name'],
+                'company_description': company['description'],
+                'user_role': membership['role'],
+                'joined_at': membership['joined_at']
+            })
+        return result
+
+    def project_page(self, company_id: str, limit: int, after: tuple = None) -> list:
+        page = []
+        for project in self.projects.get(company_id, []):
+            if after and (project['created_at'], project['id']) >= after:
+                continue
+            creator = self.users.get(project['created_by'])
+            page.append({
+                'id': project['id'],
+                'name': project['name'],
+                'description': project['description'],
+                'created_at': project['created_at'],
+                'created_by': project['created_by'],
+                'users': {'first_name': creator['first_name'], 'last_name': creator['last_name']}
+                if creator else None
+            })
+            if len(page) >= limit:
+                break
+        return page
+
+    # Функции (POST /rest/v1/rpc/<name>)
+
+    def rpc_create_company_with_owner(self, params: dict):
+        with self.lock:
+            if params['owner_email'] in self.users_by_email:
+                raise ValueError('duplicate key value violates unique constraint "users_email_key"')
+            user_id = str(uuid.uuid4())
+            company_id = str(uuid.uuid4())
+            self._add_user({
+                'id': user_id,
+                'email': params['owner_email'],
+                'password_hash': params['owner_password_hash'],
+                'first_name': params['owner_first_name'],
+                'last_name': params['owner_last_name']
+            })
+            self._add_company(company_id, params['company_name'], params.get('company_description'))
+            self._add_member(company_id, user_id, 'owner')
+        return {'user_id': user_id, 'company_id': company_id, 'success': True}
+
+    def rpc_get_user_for_login(self, params: dict):
+        user = self.users_by_email.get(params['user_email'])
+        if not user:
+            return None
+        return {
+            'user_id': user['id'],
+            'email': user['email'],
+            'password_hash': user['password_hash'],
+            'first_name': user['first_name'],
+            'last_name': user['last_name'],
+            'companies': self.user_companies(user['id'])
+        }
+
+    def rpc_get_user_companies(self, params: dict):
+        return self.user_companies(params['user_id'])
+
+    def rpc_create_project_with_owner(self, params: dict):
+        with self.lock:
+            project = self._add_project(params['project_company_id'], params['project_name'],
+                                        params.get('project_description'), params['owner_id'],
+                                        now_iso())
+        return {'project': project, 'success': True}
+
+    def rpc_get_dashboard(self, params: dict):
+        companies = self.user_companies(params['dashboard_user_id'])
+        ids = [company['company_id'] for company in companies]
+        selected = params.get('dashboard_company_id')
+        if selected not in ids:
+            selected = ids[0] if ids else None
+        return {
+            'companies': companies,
+            'company_id': selected,
+            'projects': self.project_page(selected, params.get('page_size', 51)) if selected else []
+        }
+
+    def rpc_search_projects(self, params: dict):
+        # Упрощенно: все слова запроса как подстроки названия или описания, по новизне
+        words = params['search_query'].lower().split()
+        company_id = params['search_company_id']
+        matched = [
+            project for project in self.project_page(company_id, len(self.projects.get(company_id, [])))
+            if all(word in f"{project['name']} {project['description'] or ''}".lower() for word in words)
+        ]
+        offset = params.get('page_offset', 0)
+        return [dict(project, rank=1.0) for project in matched[offset:offset + params.get('page_size', 21)]]
+
+    def rpc_get_projects_members(self, params: dict):
+        # Упрощенно: единственный участник проекта - его создатель
+        wanted = set(params['member_project_ids'])
+        result = {}
+        for project in self.projects.get(params['members_company_id'], []):
+            if project['id'] not in wanted:
+                continue
+            creator = self.users.get(project['created_by'])
+            members = [{
+                'id': str(uuid.uuid5(SEED_NAMESPACE, 'member-' + project['id'])),
+                'role': 'owner',
+                'joined_at': project['created_at'],
+                'users': {key: creator[key] for key in ('id', 'email', 'first_name', 'last_name')}
+            }] if creator else []
+            result[project['id']] = {'count': len(members)} if params.get('counts_only') \
+                else {'count': len(members), 'members': members}
+        return result
+
+    def rpc_reconcile_company_stats(self, params: dict):
+        # Счетчики заглушки считаются при чтении, расходиться нечему
+        ids = sorted(self.companies)
+        after = params.get('after_company_id')
+        batch = [company_id for company_id in ids if after is None or company_id > after][:params.get('batch_size', 100)]
+        return {
+            'checked': len(batch),
+            'repaired': 0,
+            'last_company_id': batch[-1] if len(batch) == params.get('batch_size', 100) else None
+        }
+
+    def rpc_insert_activity_log(self, params: dict):
+        inserted = 0
+        for event in params['events']:
+            events = self.activity.setdefault(event['company_id'], {})
+            if event['id'] not in events:
+                events[event['id']] = dict(event)
+                inserted += 1
+        return inserted
+
+    def rpc_maintain_activity_log_partitions(self, params: dict):
+        return {'created': [], 'dropped': []}
+
+    # Таблицы (GET /rest/v1/<table>)
+
+    def select(self, table: str, query: dict) -> list:
+        def eq(name):
+            value = query.get(name, '')
+            return value[3:] if value.startswith('eq.') else None
+
+        limit = int(query.get('limit', 1000))
+
+        if table == 'users':
+            user = self.users_by_email.get(eq('email'))
+            return [{'id': user['id']}] if user else []
+
+        if table == 'companies':
+            company_id = eq('id')
+            if company_id is None:
+                return [{'id': company_id} for company_id in list(self.companies)[:limit]]
+            company = self.companies.get(company_id)
+            return [{'id': company['id'], 'data_version': company['data_version']}] if company else []
+
+        if table == 'company_stats':
+            company_id = eq('company_id')
+            if company_id not in self.companies:
+                return []
+            return [{
+                'project_count': len(self.projects[company_id]),
+                'member_count': sum(
+                    membership['company_id'] == company_id
+                    for memberships in self.memberships.values() for membership in memberships
+                ),
+                'last_activity_at': now_iso(),
+                'reconciled_at': None
+            }]
+
+        if table == 'activity_log':
+            events = sorted(self.activity.get(eq('company_id'), {}).values(),
+                            key=lambda event: (event['created_at'], event['id']), reverse=True)
+            match = KEYSET_FILTER.search(query.get('or', ''))
+            if match:
+                after = (match.group(1), match.group(2))
+                events = [event for event in events if (event['created_at'], event['id']) < after]
+            return [{key: value for key, value in event.items() if key != 'company_id'}
+                    for event in events[:limit]]
+
+        if table == 'projects' and eq('id'):
+            project_id = eq('id')
+            for projects in self.projects.values():
+                for project in projects:
+                    if project['id'] == project_id:
+                        return [{key: project[key] for key in ('id', 'company_id', 'name', 'description')}]
+            return []
+
+        if table == 'projects':
+            after = None
+            match = KEYSET_FILTER.search(query.get('or', ''))
+            if match:
+                after = (match.group(1), match.group(2))
+            return self.project_page(eq('company_id'), limit, after)
+
+        raise LookupError(f'relation "{table}" does not exist')
+
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят двумя записями: с алгоритмом Нейгла и отложенным
+    # ACK клиента каждый ответ на keep-alive соединении задерживался на ~40 мс
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        # Тело нужно дочитать всегда (postgrest-py шлет его и в GET), иначе
+        # следующий запрос на keep-alive соединении прочитается со сдвигом
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _delay(self):
+        server = self.server
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+    def _send(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, {'message': message, 'code': str(status), 'details': None, 'hint': None})
+
+    def do_GET(self):
+        self._read_body()
+        self._delay()
+        url = urlsplit(self.path)
+        table = url.path.rsplit('/', 1)[-1]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            self._send(200, self.server.store.select(table, query))
+        except LookupError as e:
+            self._error(404, str(e))
+
+    def do_POST(self):
+        body = self._read_body()
+        self._delay()
+        path = urlsplit(self.path).path
+        if '/rpc/' not in path:
+            return self._error(405, 'Метод не поддерживается заглушкой')
+
+        function = getattr(self.server.store, 'rpc_' + path.rsplit('/', 1)[-1], None)
+        if function is None:
+            return self._error(404, f'Could not find the function {path}')
+
+        try:
+            self._send(200, function(json.loads(body or b'{}')))
+        except (KeyError, ValueError) as e:
+            self._error(400, str(e))
+
+
+def create_server(port: int, latency_ms: float = 20, jitter_ms: float = 0, companies: int = 100,
+                  members: int = 5, projects: int = 200, bcrypt_rounds: int = 4) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', port), PostgrestHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000
+    server.jitter = jitter_ms / 1000
+    server.store = Store(companies, members, projects, bcrypt_rounds)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Заглушка PostgREST для нагрузочных тестов')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency', type=float, default=20, help='задержка ответа, мс')
+    parser.add_argument('--jitter', type=float, default=0, help='разброс задержки, мс')
+    parser.add_argument('--companies', type=int, default=100)
+    parser.add_argument('--members', type=int, default=5, help='участников в компании')
+    parser.add_argument('--projects', type=int, default=200, help='проектов в компании')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4)
+    args = parser.parse_args()
+
+    server = create_server(args.port, args.latency, args.jitter, args.companies,
+                           args.members, args.projects, args.bcrypt_rounds)
+    print(f"Заглушка PostgREST: http://127.0.0.1:{args.port}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
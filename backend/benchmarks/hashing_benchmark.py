@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк пропускной способности входа в зависимости от числа ядер
+
+Запуск из каталога backend:
+    python -m benchmarks.hashing_benchmark --rounds 10 --requests 200
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.hashing import HashingPoolBusy, PasswordHasher
+
+
+def run(workers: int, rounds: int, requests: int, concurrency: int) -> dict:
+    """Прогон проверок пароля через пул с заданным числом процессов"""
+    hasher = PasswordHasher(workers=workers, queue_size=concurrency, rounds=rounds, timeout=60)
+    hashed = hasher.hash('benchmark-password')
+    rejected = 0
+
+    def login(_):
+        nonlocal rejected
+        try:
+            hasher.verify('benchmark-password', hashed)
+        except HashingPoolBusy:
+            rejected += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(login, range(requests)))
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+
+    return {
+        'workers': workers,
+        'elapsed': elapsed,
+        'throughput': (requests - rejected) / elapsed,
+        'rejected': rejected
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пропускная способность bcrypt-пула')
+    parser.add_argument('--rounds', type=int, default=int(os.getenv('BCRYPT_ROUNDS', 12)))
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"bcrypt rounds={args.rounds}, запросов={args.requests}")
+    print(f"{'процессов':>10} {'время, с':>10} {'входов/с':>10} {'отклонено':>10}")
+
+    workers = 1
+    while workers <= args.max_workers:
+        stats = run(workers, args.rounds, args.requests, concurrency=workers * 4)
+        print(f"{stats['workers']:>10} {stats['elapsed']:>10.2f} "
+              f"{stats['throughput']:>10.1f} {stats['rejected']:>10}")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест бэкенда против локальной заглушки PostgREST
+
+Поднимает benchmarks.fake_postgrest и бэкенд (dev-сервер Flask, gunicorn или
+uvicorn), по очереди нагружает сценарии и печатает p50/p95/p99 и запросов/с.
+Результат сравнивается с базовой линией из benchmarks/baselines/<server>.json:
+если пропускная способность упала или p95 вырос больше допуска, код выхода 1.
+
+Запуск из каталога backend:
+    python -m benchmarks.load_test --server dev --duration 10 --concurrency 16
+    python -m benchmarks.load_test --server gunicorn --save-baseline
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from benchmarks.fake_postgrest import SEED_PASSWORD, seed_company, seed_user
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BASELINES_DIR = Path(__file__).resolve().parent / 'baselines'
+
+SCENARIOS = ('register', 'login', 'companies', 'projects_list', 'projects_create')
+
+SERVER_COMMANDS = {
+    'dev': [sys.executable, '-c',
+            'import os; from app import create_app; '
+            'create_app().run(host="127.0.0.1", port=int(os.environ["BACKEND_PORT"]), threaded=True)'],
+    'gunicorn': ['gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1',
+             '--port', '{port}', '--log-level', 'warning', '--no-access-log']
+}
+
+# Значения конфигурации, без совпадения которых сравнение с базовой линией бессмысленно
+COMPARED_CONFIG = ('server', 'concurrency', 'latency', 'companies', 'members', 'projects', 'bcrypt_rounds')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Процесс завершился с кодом {process.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Порт {port} не открылся за {timeout} с")
+
+
+def start_process(command: list, env: dict, port: int) -> subprocess.Popen:
+    # Журнал пишется в файл: непрочитанный канал заполнится и остановит сервер
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [part.format(port=port) for part in command], cwd=BACKEND_DIR,
+        env=env, stdout=subprocess.DEVNULL, stderr=log
+    )
+    try:
+        wait_for_port(port, process)
+    except RuntimeError as e:
+        process.kill()
+        log.seek(0)
+        raise RuntimeError(f"{e}\n{log.read().decode(errors='replace')[-2000:]}")
+    return process
+
+
+def stop_process(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+class Client:
+    """Keep-alive соединение одного виртуального пользователя"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def request(self, method: str, path: str, body: dict = None, user_id: str = None) -> int:
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        if user_id:
+            headers['X-User-ID'] = user_id
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            # Соединение закрыто сервером: переподключаемся к следующему запросу
+            self.connection.close()
+            self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            return 0
+
+
+def make_scenario(name: str, companies: int, members: int):
+    """Функция одного запроса сценария: client -> HTTP-статус"""
+
+    def random_member():
+        return random.randrange(companies), random.randrange(members)
+
+    if name == 'register':
+        def run(client):
+            return client.request('POST', '/api/auth/register', {
+                'email': f'load-{uuid.uuid4()}@bench.local',
+                'password': SEED_PASSWORD,
+                'firstName': 'Нагрузка',
+                'lastName': 'Тест',
+                'companyName': 'Нагрузочная компания'
+            })
+    elif name == 'login':
+        def run(client):
+            user = seed_user(*random_member())
+            return client.request('POST', '/api/auth/login', {
+                'email': user['email'], 'password': SEED_PASSWORD
+            })
+    elif name == 'companies':
+        def run(client):
+            return client.request('GET', '/api/companies', user_id=seed_user(*random_member())['id'])
+    elif name == 'projects_list':
+        def run(client):
+            company = seed_company(random.randrange(companies))
+            return client.request('GET', f"/api/projects?company_id={company['id']}")
+    elif name == 'projects_create':
+        def run(client):
+            company_index = random.randrange(companies)
+            return client.request('POST', '/api/projects', {
+                'name': f'Проект {uuid.uuid4().hex[:8]}',
+                'company_id': seed_company(company_index)['id']
+            }, user_id=seed_user(company_index, 0)['id'])
+    else:
+        raise ValueError(f"Неизвестный сценарий: {name}")
+
+    return run
+
+
+def percentile(values: list, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_scenario(port: int, scenario, concurrency: int, duration: float, warmup: float) -> dict:
+    """Замкнутая нагрузка: каждый поток шлет следующий запрос сразу после ответа"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    measure_from = time.monotonic() + warmup
+    stop_at = measure_from + duration
+
+    def worker():
+        nonlocal errors
+        client = Client(port)
+        local_latencies = []
+        local_errors = 0
+        while True:
+            started = time.monotonic()
+            if started >= stop_at:
+                break
+            status = scenario(client)
+            if started >= measure_from:
+                local_latencies.append(time.monotonic() - started)
+                if not 200 <= status < 300:
+                    local_errors += 1
+        client.connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    if not latencies:
+        return {'requests': 0, 'errors': errors, 'rps': 0.0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / duration, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Регрессии относительно базовой линии"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if not previous or not current['requests']:
+            continue
+        if current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']} запросов/с против {previous['rps']}")
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']} мс против {previous['p95_ms']}")
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{name}: ошибок {current['errors']} против {previous['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест бэкенда')
+    parser.add_argument('--server', choices=SERVER_COMMANDS, default='dev')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='длительность сценария, с')
+    parser.add_argument('--warmup', type=float, default=2, help='прогрев перед замером, с')
+    parser.add_argument('--latency', type=float, default=20, help='задержка заглушки, мс')
+    parser.add_argument('--jitter', type=float, default=5, help='разброс задержки, мс')
+    parser.add_argument('--companies', type=int, default=100)
+    parser.add_argument('--members', type=int, default=5)
+    parser.add_argument('--projects', type=int, default=200)
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help='стоимость bcrypt; по умолчанию низкая, чтобы замерять HTTP-путь')
+    parser.add_argument('--baseline', help='файл базовой линии (по умолчанию baselines/<server>.json)')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='допустимое ухудшение, доля')
+    parser.add_argument('--output', help='сохранить результат в JSON')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    config = {
+        'server': args.server,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'companies': args.companies,
+        'members': args.members,
+        'projects': args.projects,
+        'bcrypt_rounds': args.bcrypt_rounds,
+        'cpu_count': os.cpu_count()
+    }
+
+    fake_port = free_port()
+    fake = start_process([
+        sys.executable, '-m', 'benchmarks.fake_postgrest', '--port', str(fake_port),
+        '--latency', str(args.latency), '--jitter', str(args.jitter),
+        '--companies', str(args.companies), '--members', str(args.members),
+        '--projects', str(args.projects), '--bcrypt-rounds', str(args.bcrypt_rounds)
+    ], dict(os.environ), fake_port)
+
+    backend_port = free_port()
+    env = dict(
+        os.environ,
+        SUPABASE_URL=f'http://127.0.0.1:{fake_port}',
+        SUPABASE_SERVICE_ROLE_SECRET='benchmark.service.key',
+        SUPABASE_ANON_KEY='benchmark.anon.key',
+        SUPABASE_HTTP2='false',
+        DATA_BACKEND='supabase',
+        BACKEND_PORT=str(backend_port),
+        BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+        GUNICORN_PIDFILE=f'/tmp/master-plan-load-test-{backend_port}.pid'
+    )
+    # Очередь bcrypt вмещает всех клиентов: замеряется пропускная способность,
+    # а не отказы 503 при переполнении
+    env.setdefault('HASHING_QUEUE_SIZE', str(args.concurrency))
+    # Все клиенты идут с одного адреса и повторяют одни email: лимиты входа
+    # превратили бы замер в подсчет ответов 429
+    env.setdefault('AUTH_IP_RATE', '0')
+    env.setdefault('AUTH_EMAIL_RATE', '0')
+    # Плановый перезапуск воркеров gunicorn рвет keep-alive соединения посреди замера
+    env.setdefault('GUNICORN_MAX_REQUESTS', '0')
+
+    results = {}
+    try:
+        backend = start_process(SERVER_COMMANDS[args.server], env, backend_port)
+        try:
+            print(f"Сервер {args.server}, {args.concurrency} клиентов, задержка базы "
+                  f"{args.latency}±{args.jitter} мс, {args.duration} с на сценарий\n")
+            print(f"{'сценарий':<16} {'запросов/с':>11} {'p50, мс':>9} {'p95, мс':>9} "
+                  f"{'p99, мс':>9} {'ошибок':>7}")
+            for name in scenarios:
+                stats = run_scenario(backend_port, make_scenario(name, args.companies, args.members),
+                                     args.concurrency, args.duration, args.warmup)
+                results[name] = stats
+                print(f"{name:<16} {stats['rps']:>11} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                      f"{stats['p99_ms']:>9} {stats['errors']:>7}")
+        finally:
+            stop_process(backend)
+    finally:
+        stop_process(fake)
+
+    report = {'config': config, 'results': results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+
+    baseline_path = Path(args.baseline) if args.baseline else BASELINES_DIR / f'{args.server}.json'
+    if args.save_baseline:
+        baseline_path.parent.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+        print(f"\nБазовая линия сохранена: {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\nБазовой линии {baseline_path} нет, сравнение пропущено")
+        return
+
+    baseline = json.loads(baseline_path.read_text())
+    mismatched = [key for key in COMPARED_CONFIG if baseline['config'].get(key) != config[key]]
+    if mismatched:
+        print(f"\nКонфигурация отличается от базовой линии ({', '.join(mismatched)}), сравнение пропущено")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nРегрессии относительно {baseline_path.name} (допуск {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+    print(f"\nРегрессий относительно {baseline_path.name} нет")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Конфигурация gunicorn для production-запуска бэкенда
+#
+# Запуск из каталога backend:
+#     gunicorn -c gunicorn.conf.py "app:create_app()"
+#
+# Приложение загружается в мастер-процессе один раз (preload_app) и затем
+# форкается в воркеры. Соединения с базой открываются уже в воркерах
+# (post_worker_init), поэтому не разделяются между процессами.
+
+import math
+import multiprocessing
+import os
+import tempfile
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('BACKEND_PORT', 5003)}"
+workers = int(os.getenv('WEB_CONCURRENCY', cpu_count * 2 + 1))
+worker_class = 'gthread'
+# Запросы в основном ждут ответа базы, поэтому потоков больше, чем ядер
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Периодический перезапуск воркеров ограничивает рост памяти
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+pidfile = os.getenv('GUNICORN_PIDFILE', '/tmp/master-plan-backend.pid')
+accesslog = os.getenv('GUNICORN_ACCESSLOG')
+errorlog = '-'
+
+# Пул bcrypt создается в каждом воркере, HASHING_WORKERS здесь - размер пула
+# одного воркера: всего процессов bcrypt будет workers * HASHING_WORKERS. По
+# умолчанию ядра делятся между воркерами с округлением вверх, чтобы пулы вместе
+# занимали все ядра. При стандартных 2 * ядра + 1 воркерах это намеренно один
+# процесс на воркер: процессов bcrypt и так больше, чем ядер, а больший пул
+# только добавил бы процессов, конкурирующих за те же ядра. Пул растет сам,
+# если WEB_CONCURRENCY меньше числа ядер.
+os.environ.setdefault('HASHING_WORKERS', str(math.ceil(cpu_count / workers)))
+
+# Воркеры пишут метрики Prometheus в общий каталог, /api/metrics суммирует их.
+# Переменная задается до загрузки приложения и наследуется новым мастером при USR2,
+# поэтому счетчики переживают перезапуск без простоя.
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='master-plan-metrics-')
+
+
+def post_worker_init(worker):
+    """Прогрев соединений до того, как воркер начнет принимать запросы"""
+    from app import warm_up
+
+    try:
+        warm_up()
+    except Exception as e:
+        worker.log.warning(f"Прогрев соединений не удался: {e}")
+
+
+def child_exit(server, worker):
+    """Удаление метрик-датчиков завершившегося воркера"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """Запись остатка буфера журнала действий перед выходом воркера"""
+    from utils.activity_log import get_activity_log
+
+    get_activity_log().close()
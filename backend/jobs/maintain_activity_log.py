@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Обслуживание секций журнала действий (activity_log)
+
+Таблица из миграции 016 разбита на секции по месяцам. Задача создает секции
+на несколько месяцев вперед, чтобы события не попадали в секцию по
+умолчанию, и удаляет секции старше срока хранения целиком - без DELETE и
+без роста таблицы. События, уже лежащие в секции по умолчанию, переносятся
+в секцию своего месяца при ее создании (миграция 019).
+
+Задача блокирует журнал на время создания и удаления секций (ждут и запись,
+и чтение ленты), поэтому ее запускают в часы наименьшей нагрузки.
+
+Запуск из каталога backend (например, раз в сутки по cron ночью):
+    python -m jobs.maintain_activity_log --months-ahead 3 --keep-months 12
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+from models.repository import get_repository
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Создание и удаление секций activity_log')
+    parser.add_argument('--months-ahead', type=int, default=3, help='секций вперед от текущего месяца')
+    parser.add_argument('--keep-months', type=int, default=None,
+                        help='хранить столько месяцев до текущего (по умолчанию - все)')
+    args = parser.parse_args()
+    load_dotenv('../.env')
+
+    result = get_repository().maintain_activity_log(args.months_ahead, args.keep_months)
+    print(f"Создано секций: {len(result['created'])} {' '.join(result['created'])}".rstrip())
+    print(f"Удалено секций: {len(result['dropped'])} {' '.join(result['dropped'])}".rstrip())
+
+
+if __name__ == '__main__':
+    main()
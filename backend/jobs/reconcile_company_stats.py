@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Сверка сводной статистики компаний (company_stats) с таблицами
+
+Счетчики ведут триггеры миграции 015. Расхождение возможно после ручных
+правок с отключенными триггерами или восстановления из резервной копии.
+Сверка идет пачками компаний: каждая пачка - отдельная короткая транзакция,
+поэтому запись в остальные компании не ждет окончания всего обхода.
+
+Запуск из каталога backend (например, раз в сутки по cron):
+    python -m jobs.reconcile_company_stats --batch-size 100
+"""
+
+import argparse
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from models.repository import get_repository
+
+
+def reconcile(batch_size: int, pause: float) -> dict:
+    """Обход всех компаний; возвращает число проверенных и исправленных"""
+    repository = get_repository()
+    totals = {'checked': 0, 'repaired': 0}
+    after = None
+
+    while True:
+        result = repository.reconcile_company_stats(after, batch_size)
+        totals['checked'] += result['checked']
+        totals['repaired'] += result['repaired']
+        after = result.get('last_company_id')
+        if not after:
+            return totals
+        time.sleep(pause)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сверка company_stats с таблицами')
+    parser.add_argument('--batch-size', type=int, default=100, help='компаний за транзакцию')
+    parser.add_argument('--pause', type=float, default=0.1, help='пауза между пачками, с')
+    parser.add_argument('--fail-on-drift', action='store_true',
+                        help='код выхода 1, если были расхождения (для мониторинга)')
+    args = parser.parse_args()
+    load_dotenv('../.env')
+
+    started = time.perf_counter()
+    totals = reconcile(args.batch_size, args.pause)
+    print(f"Проверено компаний: {totals['checked']}, исправлено: {totals['repaired']}, "
+          f"{time.perf_counter() - started:.1f} с")
+
+    if args.fail_on_drift and totals['repaired']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
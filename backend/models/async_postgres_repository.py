@@ -0,0 +1,71 @@
+import os
+
+from models.async_repository import AsyncRepository
+from models.postgres_repository import (
+    CALL_GET_DASHBOARD,
+    SELECT_PROJECT,
+    SELECT_PROJECTS_AFTER_CURSOR,
+    SELECT_PROJECTS_FIRST_PAGE,
+    SELECT_COMPANY_VERSION,
+    SELECT_USER_COMPANIES,
+)
+from utils.metrics import observe_db_call, sql_target
+
+try:
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    AsyncConnectionPool = None
+
+
+class AsyncPostgresRepository(AsyncRepository):
+    """Асинхронные запросы к Postgres через AsyncConnectionPool и prepared statements"""
+
+    def __init__(self, dsn: str = None):
+        if AsyncConnectionPool is None:
+            raise ValueError("Для DATA_BACKEND=postgres необходимы пакеты psycopg и psycopg_pool")
+
+        self.dsn = dsn or os.getenv('DATABASE_URL')
+        if not self.dsn:
+            raise ValueError("Не найдена переменная окружения DATABASE_URL")
+
+        self.pool = None
+
+    async def open(self):
+        self.pool = AsyncConnectionPool(
+            self.dsn,
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            kwargs={'autocommit': True},
+            open=False
+        )
+        await self.pool.open()
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def _fetch_value(self, query: str, params: tuple):
+        with observe_db_call('postgres', sql_target(query)):
+            async with self.pool.connection() as connection:
+                cursor = await connection.execute(query, params, prepare=True)
+                row = await cursor.fetchone()
+                return row[0] if row else None
+
+    async def get_user_companies(self, user_id: str) -> list:
+        return await self._fetch_value(SELECT_USER_COMPANIES, (user_id,))
+
+    async def get_company_version(self, company_id: str) -> int:
+        return await self._fetch_value(SELECT_COMPANY_VERSION, (company_id,))
+
+    async def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        if after:
+            return await self._fetch_value(SELECT_PROJECTS_AFTER_CURSOR, (company_id, *after, limit))
+        return await self._fetch_value(SELECT_PROJECTS_FIRST_PAGE, (company_id, limit))
+
+    async def get_dashboard(self, user_id: str, company_id: str, limit: int) -> dict:
+        return await self._fetch_value(CALL_GET_DASHBOARD, (user_id, company_id, limit))
+
+    async def get_project(self, project_id: str) -> dict:
+        return await self._fetch_value(SELECT_PROJECT, (project_id,))
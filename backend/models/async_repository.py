@@ -0,0 +1,47 @@
+import os
+
+from models.repository import DATA_BACKENDS
+
+
+class AsyncRepository:
+    """Асинхронный доступ к данным для горячих эндпоинтов чтения.
+
+    Формат результатов совпадает с синхронным Repository.
+    """
+
+    async def open(self):
+        """Открытие соединений при старте сервера"""
+
+    async def close(self):
+        """Закрытие соединений при остановке сервера"""
+
+    async def get_user_companies(self, user_id: str) -> list:
+        raise NotImplementedError
+
+    async def get_company_version(self, company_id: str) -> int:
+        raise NotImplementedError
+
+    async def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        raise NotImplementedError
+
+    async def get_dashboard(self, user_id: str, company_id: str, limit: int) -> dict:
+        raise NotImplementedError
+
+    async def get_project(self, project_id: str) -> dict:
+        """Проект с company_id или None"""
+        raise NotImplementedError
+
+
+def create_async_repository(backend: str = None) -> AsyncRepository:
+    """Создание асинхронного репозитория по имени бэкенда (по умолчанию из DATA_BACKEND)"""
+    backend = backend or os.getenv('DATA_BACKEND', 'supabase')
+
+    if backend == 'supabase':
+        from models.async_supabase_repository import AsyncSupabaseRepository
+        return AsyncSupabaseRepository()
+
+    if backend == 'postgres':
+        from models.async_postgres_repository import AsyncPostgresRepository
+        return AsyncPostgresRepository()
+
+    raise ValueError(f"Неизвестный DATA_BACKEND: {backend}, допустимо: {', '.join(DATA_BACKENDS)}")
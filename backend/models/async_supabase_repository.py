@@ -0,0 +1,104 @@
+import os
+
+import httpx
+
+from models.async_repository import AsyncRepository
+from utils.http_pool import get_timeout
+from utils.metrics import db_call_errors, observe_db_call, postgrest_target
+from utils.pagination import keyset_filter
+
+PROJECTS_SELECT = 'id,name,description,created_at,created_by,users(first_name,last_name)'
+
+
+class InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    """Замер каждого запроса к PostgREST по таблице или функции"""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        target = postgrest_target(request.url.path)
+        with observe_db_call('supabase', target):
+            response = await super().handle_async_request(request)
+
+        if response.status_code >= 400:
+            db_call_errors.labels('supabase', target).inc()
+        return response
+
+
+class AsyncSupabaseRepository(AsyncRepository):
+    """Асинхронные запросы к PostgREST через общий httpx.AsyncClient"""
+
+    def __init__(self):
+        url = os.getenv('SUPABASE_URL')
+        self.key = os.getenv('SUPABASE_SERVICE_ROLE_SECRET')
+
+        if not url or not self.key:
+            raise ValueError("Не найдены переменные окружения SUPABASE_URL или SUPABASE_SERVICE_ROLE_SECRET")
+
+        self.rest_url = url.rstrip('/') + '/rest/v1'
+        self.client = None
+
+    async def open(self):
+        pool_size = int(os.getenv('SUPABASE_POOL_SIZE', 20))
+        self.client = httpx.AsyncClient(
+            base_url=self.rest_url,
+            headers={'apikey': self.key, 'Authorization': f'Bearer {self.key}'},
+            timeout=get_timeout(),
+            transport=InstrumentedAsyncTransport(
+                http2=os.getenv('SUPABASE_HTTP2', 'true').lower() in ('1', 'true', 'yes'),
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=int(os.getenv('SUPABASE_KEEPALIVE_CONNECTIONS', pool_size)),
+                    keepalive_expiry=float(os.getenv('SUPABASE_KEEPALIVE_EXPIRY', 30))
+                )
+            )
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def get_user_companies(self, user_id: str) -> list:
+        response = await self.client.post('/rpc/get_user_companies', json={'user_id': user_id})
+        response.raise_for_status()
+        return response.json() or []
+
+    async def get_company_version(self, company_id: str) -> int:
+        response = await self.client.get('/companies', params={
+            'select': 'data_version',
+            'id': f'eq.{company_id}'
+        })
+        response.raise_for_status()
+        rows = response.json()
+        return rows[0]['data_version'] if rows else None
+
+    async def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        params = {
+            'select': PROJECTS_SELECT,
+            'company_id': f'eq.{company_id}',
+            'order': 'created_at.desc,id.desc',
+            'limit': str(limit)
+        }
+        if after:
+            params['or'] = f'({keyset_filter(*after)})'
+
+        response = await self.client.get('/projects', params=params)
+        response.raise_for_status()
+        return response.json() or []
+
+    async def get_dashboard(self, user_id: str, company_id: str, limit: int) -> dict:
+        response = await self.client.post('/rpc/get_dashboard', json={
+            'dashboard_user_id': user_id,
+            'dashboard_company_id': company_id,
+            'page_size': limit
+        })
+        response.raise_for_status()
+        return response.json()
+
+    async def get_project(self, project_id: str) -> dict:
+        response = await self.client.get('/projects', params={
+            'select': 'id,company_id,name,description',
+            'id': f'eq.{project_id}'
+        })
+        response.raise_for_status()
+        rows = response.json()
+        return rows[0] if rows else None
@@ -0,0 +1,301 @@
+import os
+import threading
+
+from models.repository import Repository
+from utils.metrics import observe_db_call, sql_target
+
+try:
+    from psycopg.types.json import Jsonb
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+# Все запросы собирают результат в JSON на стороне базы, чтобы формат
+# (вложенные users, даты в ISO) совпадал с ответами PostgREST
+
+SELECT_USER_ID_BY_EMAIL = "SELECT id::text FROM users WHERE email = %s"
+
+SELECT_USER_FOR_LOGIN = "SELECT get_user_for_login(%s)"
+
+CALL_CREATE_COMPANY_WITH_OWNER = """
+    SELECT create_company_with_owner(
+        company_name => %s,
+        company_description => %s,
+        owner_email => %s,
+        owner_password_hash => %s,
+        owner_first_name => %s,
+        owner_last_name => %s
+    )
+"""
+
+SELECT_USER_COMPANIES = """
+    SELECT COALESCE(json_agg(t), '[]'::json)
+    FROM get_user_companies(%s::uuid) t
+"""
+
+SELECT_MEMBERS = """
+    SELECT COALESCE(json_agg(json_build_object(
+        'id', m.id,
+        'role', m.role,
+        'joined_at', m.joined_at,
+        'users', json_build_object(
+            'id', u.id,
+            'email', u.email,
+            'first_name', u.first_name,
+            'last_name', u.last_name
+        )
+    )), '[]'::json)
+    FROM {table} m
+    JOIN users u ON u.id = m.user_id
+    WHERE m.{column} = %s::uuid
+"""
+
+SELECT_COMPANY_MEMBERS = SELECT_MEMBERS.format(table='company_members', column='company_id')
+
+SELECT_PROJECT_MEMBERS = SELECT_MEMBERS.format(table='project_members', column='project_id')
+
+CALL_ADD_USER_TO_COMPANY = """
+    SELECT add_user_to_company(
+        company_id => %s::uuid,
+        user_email => %s,
+        user_password_hash => %s,
+        user_first_name => %s,
+        user_last_name => %s,
+        user_role => %s
+    )
+"""
+
+CALL_IMPORT_COMPANY_MEMBERS = "SELECT import_company_members(%s::uuid, %s)"
+
+# Поля снимка совпадают с колонками member_import_jobs
+UPSERT_IMPORT_JOB = """
+    INSERT INTO member_import_jobs
+    SELECT * FROM json_populate_record(NULL::member_import_jobs, %s::json)
+    ON CONFLICT (id) DO UPDATE SET
+        status = EXCLUDED.status,
+        processed = EXCLUDED.processed,
+        imported = EXCLUDED.imported,
+        skipped = EXCLUDED.skipped,
+        failed = EXCLUDED.failed,
+        errors = EXCLUDED.errors,
+        finished_at = EXCLUDED.finished_at
+    RETURNING id
+"""
+
+SELECT_IMPORT_JOB = "SELECT row_to_json(j) FROM member_import_jobs j WHERE id = %s::uuid"
+
+SELECT_PROJECTS = """
+    SELECT COALESCE(json_agg(t ORDER BY t.created_at DESC, t.id DESC), '[]'::json)
+    FROM (
+        SELECT
+            p.id,
+            p.name,
+            p.description,
+            p.created_at,
+            p.created_by,
+            CASE WHEN u.id IS NULL THEN NULL
+                 ELSE json_build_object('first_name', u.first_name, 'last_name', u.last_name)
+            END AS users
+        FROM projects p
+        LEFT JOIN users u ON u.id = p.created_by
+        WHERE p.company_id = %s::uuid {keyset}
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT %s
+    ) t
+"""
+
+SELECT_PROJECTS_FIRST_PAGE = SELECT_PROJECTS.format(keyset='')
+
+SELECT_PROJECTS_AFTER_CURSOR = SELECT_PROJECTS.format(
+    keyset='AND (p.created_at, p.id) < (%s::timestamptz, %s::uuid)'
+)
+
+CALL_CREATE_PROJECT_WITH_OWNER = """
+    SELECT create_project_with_owner(
+        project_name => %s,
+        project_description => %s,
+        project_company_id => %s::uuid,
+        owner_id => %s::uuid
+    )
+"""
+
+CALL_SEARCH_PROJECTS = "SELECT search_projects(%s::uuid, %s, %s, %s)"
+
+SELECT_COMPANY_VERSION = "SELECT data_version FROM companies WHERE id = %s::uuid"
+
+SELECT_PROJECT = """
+    SELECT json_build_object(
+        'id', id,
+        'company_id', company_id,
+        'name', name,
+        'description', description
+    )
+    FROM projects
+    WHERE id = %s::uuid
+"""
+
+SELECT_COMPANY_STATS = """
+    SELECT json_build_object(
+        'project_count', project_count,
+        'member_count', member_count,
+        'last_activity_at', last_activity_at,
+        'reconciled_at', reconciled_at
+    )
+    FROM company_stats
+    WHERE company_id = %s::uuid
+"""
+
+CALL_RECONCILE_COMPANY_STATS = "SELECT reconcile_company_stats(%s::uuid, %s)"
+
+CALL_INSERT_ACTIVITY_LOG = "SELECT insert_activity_log(%s::json)"
+
+SELECT_ACTIVITY = """
+    SELECT COALESCE(json_agg(t ORDER BY t.created_at DESC, t.id DESC), '[]'::json)
+    FROM (
+        SELECT id, actor_id, action, target_type, target_id, details, created_at
+        FROM activity_log
+        WHERE company_id = %s::uuid {keyset}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    ) t
+"""
+
+SELECT_ACTIVITY_FIRST_PAGE = SELECT_ACTIVITY.format(keyset='')
+
+SELECT_ACTIVITY_AFTER_CURSOR = SELECT_ACTIVITY.format(
+    keyset='AND (created_at, id) < (%s::timestamptz, %s::uuid)'
+)
+
+CALL_MAINTAIN_ACTIVITY_LOG = "SELECT maintain_activity_log_partitions(%s, %s)"
+
+CALL_GET_DASHBOARD = "SELECT get_dashboard(%s::uuid, %s::uuid, %s)"
+
+CALL_APPLY_PROJECT_BATCH = "SELECT apply_project_batch(%s::uuid, %s::uuid, %s, %s, %s)"
+
+CALL_GET_PROJECTS_MEMBERS = "SELECT get_projects_members(%s::uuid, %s::uuid[], %s)"
+
+
+class PostgresRepository(Repository):
+    """Репозиторий с прямым подключением к Postgres (пул соединений и prepared statements)"""
+
+    def __init__(self, dsn: str = None):
+        if ConnectionPool is None:
+            raise ValueError("Для DATA_BACKEND=postgres необходимы пакеты psycopg и psycopg_pool")
+
+        dsn = dsn or os.getenv('DATABASE_URL')
+        if not dsn:
+            raise ValueError("Не найдена переменная окружения DATABASE_URL")
+
+        self.pool = ConnectionPool(
+            dsn,
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            kwargs={'autocommit': True},
+            open=False
+        )
+        self._opened = False
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Пул открывается при первом запросе, чтобы соединения не наследовались при fork
+        if not self._opened:
+            with self._lock:
+                if not self._opened:
+                    self.pool.open()
+                    self._opened = True
+        return self.pool.connection()
+
+    def _fetch_value(self, query: str, params: tuple):
+        """Первая колонка первой строки; запрос готовится на соединении один раз"""
+        with observe_db_call('postgres', sql_target(query)), self._connection() as connection:
+            row = connection.execute(query, params, prepare=True).fetchone()
+            return row[0] if row else None
+
+    def get_user_id_by_email(self, email: str) -> str:
+        return self._fetch_value(SELECT_USER_ID_BY_EMAIL, (email,))
+
+    def get_user_for_login(self, email: str) -> dict:
+        return self._fetch_value(SELECT_USER_FOR_LOGIN, (email,))
+
+    def create_company_with_owner(self, company_name: str, company_description: str, owner_email: str,
+                                  owner_password_hash: str, owner_first_name: str,
+                                  owner_last_name: str) -> dict:
+        return self._fetch_value(CALL_CREATE_COMPANY_WITH_OWNER, (
+            company_name, company_description, owner_email,
+            owner_password_hash, owner_first_name, owner_last_name
+        ))
+
+    def get_user_companies(self, user_id: str) -> list:
+        return self._fetch_value(SELECT_USER_COMPANIES, (user_id,))
+
+    def get_company_members(self, company_id: str) -> list:
+        return self._fetch_value(SELECT_COMPANY_MEMBERS, (company_id,))
+
+    def add_user_to_company(self, company_id: str, email: str, password_hash: str,
+                            first_name: str, last_name: str, role: str) -> dict:
+        return self._fetch_value(CALL_ADD_USER_TO_COMPANY, (
+            company_id, email, password_hash, first_name, last_name, role
+        ))
+
+    def import_company_members(self, company_id: str, members: list) -> dict:
+        return self._fetch_value(CALL_IMPORT_COMPANY_MEMBERS, (company_id, Jsonb(members)))
+
+    def save_import_job(self, job: dict):
+        self._fetch_value(UPSERT_IMPORT_JOB, (Jsonb(job),))
+
+    def get_import_job(self, job_id: str) -> dict:
+        return self._fetch_value(SELECT_IMPORT_JOB, (job_id,))
+
+    def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        if after:
+            return self._fetch_value(SELECT_PROJECTS_AFTER_CURSOR, (company_id, *after, limit))
+        return self._fetch_value(SELECT_PROJECTS_FIRST_PAGE, (company_id, limit))
+
+    def create_project_with_owner(self, name: str, description: str, company_id: str,
+                                  owner_id: str) -> dict:
+        return self._fetch_value(CALL_CREATE_PROJECT_WITH_OWNER, (name, description, company_id, owner_id))
+
+    def search_company_projects(self, company_id: str, query: str, limit: int, offset: int) -> list:
+        return self._fetch_value(CALL_SEARCH_PROJECTS, (company_id, query, limit, offset))
+
+    def get_company_version(self, company_id: str) -> int:
+        return self._fetch_value(SELECT_COMPANY_VERSION, (company_id,))
+
+    def get_company_stats(self, company_id: str) -> dict:
+        return self._fetch_value(SELECT_COMPANY_STATS, (company_id,))
+
+    def reconcile_company_stats(self, after_company_id: str = None, batch_size: int = 100) -> dict:
+        return self._fetch_value(CALL_RECONCILE_COMPANY_STATS, (after_company_id, batch_size))
+
+    def apply_project_batch(self, company_id: str, actor_id: str, creates: list,
+                            updates: list, deletes: list) -> dict:
+        return self._fetch_value(CALL_APPLY_PROJECT_BATCH, (
+            company_id, actor_id, Jsonb(creates), Jsonb(updates), Jsonb(deletes)
+        ))
+
+    def get_project_members(self, project_id: str) -> list:
+        return self._fetch_value(SELECT_PROJECT_MEMBERS, (project_id,))
+
+    def get_projects_members(self, company_id: str, project_ids: list, counts_only: bool = False) -> dict:
+        return self._fetch_value(CALL_GET_PROJECTS_MEMBERS, (company_id, project_ids, counts_only))
+
+    def insert_activity_events(self, events: list) -> int:
+        return self._fetch_value(CALL_INSERT_ACTIVITY_LOG, (Jsonb(events),))
+
+    def list_company_activity(self, company_id: str, limit: int, after: tuple = None) -> list:
+        if after:
+            return self._fetch_value(SELECT_ACTIVITY_AFTER_CURSOR, (company_id, *after, limit))
+        return self._fetch_value(SELECT_ACTIVITY_FIRST_PAGE, (company_id, limit))
+
+    def maintain_activity_log(self, months_ahead: int, keep_months: int = None) -> dict:
+        return self._fetch_value(CALL_MAINTAIN_ACTIVITY_LOG, (months_ahead, keep_months))
+
+    def get_dashboard(self, user_id: str, company_id: str, limit: int) -> dict:
+        return self._fetch_value(CALL_GET_DASHBOARD, (user_id, company_id, limit))
+
+    def ping(self):
+        self._fetch_value("SELECT 1", ())
+
+    def pool_stats(self) -> dict:
+        return self.pool.get_stats()
@@ -0,0 +1,153 @@
+import os
+import threading
+
+DATA_BACKENDS = ('supabase', 'postgres')
+
+
+class Repository:
+    """Доступ к данным, общий для всех сервисов.
+
+    Методы возвращают данные в том же виде, в каком их отдает PostgREST:
+    словари и списки словарей с датами в виде ISO-строк.
+    """
+
+    # Пользователи
+
+    def get_user_id_by_email(self, email: str) -> str:
+        """ID пользователя по email или None"""
+        raise NotImplementedError
+
+    def get_user_for_login(self, email: str) -> dict:
+        """Хеш пароля, профиль и компании пользователя или None"""
+        raise NotImplementedError
+
+    # Компании
+
+    def create_company_with_owner(self, company_name: str, company_description: str, owner_email: str,
+                                  owner_password_hash: str, owner_first_name: str,
+                                  owner_last_name: str) -> dict:
+        raise NotImplementedError
+
+    def get_user_companies(self, user_id: str) -> list:
+        raise NotImplementedError
+
+    def get_company_members(self, company_id: str) -> list:
+        raise NotImplementedError
+
+    def add_user_to_company(self, company_id: str, email: str, password_hash: str,
+                            first_name: str, last_name: str, role: str) -> dict:
+        raise NotImplementedError
+
+    def import_company_members(self, company_id: str, members: list) -> dict:
+        raise NotImplementedError
+
+    def save_import_job(self, job: dict):
+        """Вставка или обновление снимка задачи импорта участников"""
+        raise NotImplementedError
+
+    def get_import_job(self, job_id: str) -> dict:
+        """Снимок задачи импорта или None"""
+        raise NotImplementedError
+
+    # Проекты
+
+    def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        """Проекты компании по убыванию (created_at, id), начиная после курсора after"""
+        raise NotImplementedError
+
+    def create_project_with_owner(self, name: str, description: str, company_id: str,
+                                  owner_id: str) -> dict:
+        raise NotImplementedError
+
+    def search_company_projects(self, company_id: str, query: str, limit: int, offset: int) -> list:
+        """Полнотекстовый поиск проектов компании по убыванию релевантности"""
+        raise NotImplementedError
+
+    def get_company_version(self, company_id: str) -> int:
+        """Версия данных компании (companies.data_version) или None"""
+        raise NotImplementedError
+
+    def get_company_stats(self, company_id: str) -> dict:
+        """Строка company_stats компании или None"""
+        raise NotImplementedError
+
+    def reconcile_company_stats(self, after_company_id: str = None, batch_size: int = 100) -> dict:
+        """Сверка company_stats с таблицами для пачки компаний:
+        {'checked': n, 'repaired': n, 'last_company_id': ...}"""
+        raise NotImplementedError
+
+    def apply_project_batch(self, company_id: str, actor_id: str, creates: list,
+                            updates: list, deletes: list) -> dict:
+        raise NotImplementedError
+
+    def get_project_members(self, project_id: str) -> list:
+        raise NotImplementedError
+
+    def get_projects_members(self, company_id: str, project_ids: list, counts_only: bool = False) -> dict:
+        """Участники проектов компании одним запросом:
+        {project_id: {'count': n, 'members': [...]}}, при counts_only - только count"""
+        raise NotImplementedError
+
+    # Журнал действий
+
+    def insert_activity_events(self, events: list) -> int:
+        """Вставка пачки событий одним вызовом; повторно отправленные пропускаются"""
+        raise NotImplementedError
+
+    def list_company_activity(self, company_id: str, limit: int, after: tuple = None) -> list:
+        """События компании по убыванию (created_at, id), после курсора after"""
+        raise NotImplementedError
+
+    def maintain_activity_log(self, months_ahead: int, keep_months: int = None) -> dict:
+        """Создание будущих и удаление старых секций: {'created': [...], 'dropped': [...]}"""
+        raise NotImplementedError
+
+    # Главная страница
+
+    def get_dashboard(self, user_id: str, company_id: str, limit: int) -> dict:
+        """Компании пользователя и первые limit проектов выбранной компании:
+        {'companies': [...], 'company_id': ..., 'projects': [...]}"""
+        raise NotImplementedError
+
+    def ping(self):
+        """Легкий запрос к базе: открывает соединения и проверяет доступность"""
+        raise NotImplementedError
+
+    def pool_stats(self) -> dict:
+        """Метрики пула соединений бэкенда"""
+        return {}
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def create_repository(backend: str = None) -> Repository:
+    """Создание репозитория по имени бэкенда (по умолчанию из DATA_BACKEND)"""
+    backend = backend or os.getenv('DATA_BACKEND', 'supabase')
+
+    if backend == 'supabase':
+        from models.supabase_repository import SupabaseRepository
+        return SupabaseRepository()
+
+    if backend == 'postgres':
+        from models.postgres_repository import PostgresRepository
+        return PostgresRepository()
+
+    raise ValueError(f"Неизвестный DATA_BACKEND: {backend}")
+
+
+def peek_repository() -> Repository:
+    """Уже созданный репозиторий или None; в отличие от get_repository не создает его"""
+    return _repository
+
+
+def get_repository() -> Repository:
+    """Общий для процесса репозиторий"""
+    global _repository
+
+    with _repository_lock:
+        if _repository is None:
+            _repository = create_repository()
+
+    return _repository
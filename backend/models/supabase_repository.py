@@ -0,0 +1,179 @@
+from models.repository import Repository
+from utils.database import get_pool_stats, get_supabase_client
+from utils.pagination import keyset_filter
+
+
+class SupabaseRepository(Repository):
+    """Репозиторий поверх PostgREST (клиент supabase)"""
+
+    def __init__(self):
+        self.supabase = get_supabase_client()
+
+    def get_user_id_by_email(self, email: str) -> str:
+        result = self.supabase.table('users').select('id').eq('email', email).execute()
+        return result.data[0]['id'] if result.data else None
+
+    def get_user_for_login(self, email: str) -> dict:
+        result = self.supabase.rpc('get_user_for_login', {
+            'user_email': email
+        }).execute()
+        return result.data
+
+    def create_company_with_owner(self, company_name: str, company_description: str, owner_email: str,
+                                  owner_password_hash: str, owner_first_name: str,
+                                  owner_last_name: str) -> dict:
+        result = self.supabase.rpc('create_company_with_owner', {
+            'company_name': company_name,
+            'company_description': company_description,
+            'owner_email': owner_email,
+            'owner_password_hash': owner_password_hash,
+            'owner_first_name': owner_first_name,
+            'owner_last_name': owner_last_name
+        }).execute()
+        return result.data
+
+    def get_user_companies(self, user_id: str) -> list:
+        result = self.supabase.rpc('get_user_companies', {
+            'user_id': user_id
+        }).execute()
+        return result.data or []
+
+    def get_company_members(self, company_id: str) -> list:
+        result = self.supabase.table('company_members').select(
+            'id, role, joined_at, users(id, email, first_name, last_name)'
+        ).eq('company_id', company_id).execute()
+        return result.data or []
+
+    def add_user_to_company(self, company_id: str, email: str, password_hash: str,
+                            first_name: str, last_name: str, role: str) -> dict:
+        result = self.supabase.rpc('add_user_to_company', {
+            'company_id': company_id,
+            'user_email': email,
+            'user_password_hash': password_hash,
+            'user_first_name': first_name,
+            'user_last_name': last_name,
+            'user_role': role
+        }).execute()
+        return result.data
+
+    def import_company_members(self, company_id: str, members: list) -> dict:
+        result = self.supabase.rpc('import_company_members', {
+            'target_company_id': company_id,
+            'members': members
+        }).execute()
+        return result.data
+
+    def save_import_job(self, job: dict):
+        self.supabase.table('member_import_jobs').upsert(job).execute()
+
+    def get_import_job(self, job_id: str) -> dict:
+        result = self.supabase.table('member_import_jobs').select('*').eq('id', job_id).execute()
+        return result.data[0] if result.data else None
+
+    def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        query = self.supabase.table('projects').select(
+            'id, name, description, created_at, created_by, users(first_name, last_name)'
+        ).eq('company_id', company_id)
+
+        if after:
+            query = query.or_(keyset_filter(*after))
+
+        result = query.order('created_at', desc=True).order('id', desc=True).limit(limit).execute()
+        return result.data or []
+
+    def create_project_with_owner(self, name: str, description: str, company_id: str,
+                                  owner_id: str) -> dict:
+        result = self.supabase.rpc('create_project_with_owner', {
+            'project_name': name,
+            'project_description': description,
+            'project_company_id': company_id,
+            'owner_id': owner_id
+        }).execute()
+        return result.data
+
+    def search_company_projects(self, company_id: str, query: str, limit: int, offset: int) -> list:
+        result = self.supabase.rpc('search_projects', {
+            'search_company_id': company_id,
+            'search_query': query,
+            'page_size': limit,
+            'page_offset': offset
+        }).execute()
+        return result.data or []
+
+    def get_company_version(self, company_id: str) -> int:
+        result = self.supabase.table('companies').select('data_version').eq('id', company_id).execute()
+        return result.data[0]['data_version'] if result.data else None
+
+    def get_company_stats(self, company_id: str) -> dict:
+        result = self.supabase.table('company_stats').select(
+            'project_count, member_count, last_activity_at, reconciled_at'
+        ).eq('company_id', company_id).execute()
+        return result.data[0] if result.data else None
+
+    def reconcile_company_stats(self, after_company_id: str = None, batch_size: int = 100) -> dict:
+        result = self.supabase.rpc('reconcile_company_stats', {
+            'after_company_id': after_company_id,
+            'batch_size': batch_size
+        }).execute()
+        return result.data
+
+    def apply_project_batch(self, company_id: str, actor_id: str, creates: list,
+                            updates: list, deletes: list) -> dict:
+        result = self.supabase.rpc('apply_project_batch', {
+            'batch_company_id': company_id,
+            'actor_id': actor_id,
+            'creates': creates,
+            'updates': updates,
+            'deletes': deletes
+        }).execute()
+        return result.data
+
+    def get_project_members(self, project_id: str) -> list:
+        result = self.supabase.table('project_members').select(
+            'id, role, joined_at, users(id, email, first_name, last_name)'
+        ).eq('project_id', project_id).execute()
+        return result.data or []
+
+    def get_projects_members(self, company_id: str, project_ids: list, counts_only: bool = False) -> dict:
+        result = self.supabase.rpc('get_projects_members', {
+            'members_company_id': company_id,
+            'member_project_ids': project_ids,
+            'counts_only': counts_only
+        }).execute()
+        return result.data or {}
+
+    def insert_activity_events(self, events: list) -> int:
+        result = self.supabase.rpc('insert_activity_log', {'events': events}).execute()
+        return result.data
+
+    def list_company_activity(self, company_id: str, limit: int, after: tuple = None) -> list:
+        query = self.supabase.table('activity_log').select(
+            'id, actor_id, action, target_type, target_id, details, created_at'
+        ).eq('company_id', company_id)
+
+        if after:
+            query = query.or_(keyset_filter(*after))
+
+        result = query.order('created_at', desc=True).order('id', desc=True).limit(limit).execute()
+        return result.data or []
+
+    def maintain_activity_log(self, months_ahead: int, keep_months: int = None) -> dict:
+        result = self.supabase.rpc('maintain_activity_log_partitions', {
+            'months_ahead': months_ahead,
+            'keep_months': keep_months
+        }).execute()
+        return result.data
+
+    def get_dashboard(self, user_id: str, company_id: str, limit: int) -> dict:
+        result = self.supabase.rpc('get_dashboard', {
+            'dashboard_user_id': user_id,
+            'dashboard_company_id': company_id,
+            'page_size': limit
+        }).execute()
+        return result.data
+
+    def ping(self):
+        self.supabase.table('companies').select('id').limit(1).execute()
+
+    def pool_stats(self) -> dict:
+        return get_pool_stats()
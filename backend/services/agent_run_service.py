@@ -0,0 +1,132 @@
+import os
+
+try:
+    from autogen_agentchat.agents import AssistantAgent
+    from autogen_agentchat.base import TaskResult
+    from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
+    from autogen_agentchat.messages import ModelClientStreamingChunkEvent
+    from autogen_agentchat.teams import RoundRobinGroupChat
+    from autogen_core import CancellationToken
+except ImportError:
+    AssistantAgent = None
+
+from utils.agent_queue import AgentJobQueue
+
+AGENT_MODES = ('assistant', 'group')
+MAX_TASK_LENGTH = 4000
+
+ASSISTANT_SYSTEM_MESSAGE = (
+    "Ты ассистент команды проекта. Помогай с задачами проекта: планированием, "
+    "кодом, анализом и текстами. Отвечай по существу."
+)
+
+# Роли группового чата - как в agents/agentchat_examples/group_chat.py
+GROUP_ROLES = (
+    ('analyst', 'Аналитик: анализ, планирование и стратегия',
+     "Ты аналитик данных. Помогай с анализом, планированием и стратегией."),
+    ('coder', 'Программист: код и технические решения',
+     "Ты опытный программист. Помогай с написанием кода и решением технических проблем."),
+    ('writer', 'Писатель: тексты, документация и презентации',
+     "Ты писатель и редактор. Помогай с созданием текстов, документации и презентаций. "
+     "Когда задача решена, подведи итог и напиши TERMINATE.")
+)
+
+
+def parse_agent_task(data: dict) -> tuple:
+    """Текст задачи и режим из тела запроса; ValueError при ошибке"""
+    task = (data.get('task') or '').strip()
+    mode = data.get('mode') or 'assistant'
+    if not task:
+        raise ValueError('Текст задачи обязателен')
+    if len(task) > MAX_TASK_LENGTH:
+        raise ValueError(f'Текст задачи длиннее {MAX_TASK_LENGTH} символов')
+    if mode not in AGENT_MODES:
+        raise ValueError(f"Неизвестный режим: {mode}, допустимо: {', '.join(AGENT_MODES)}")
+    return task, mode
+
+
+def get_max_turns() -> int:
+    return int(os.getenv('AGENT_MAX_TURNS', 6))
+
+
+def create_model_client():
+    """Клиент модели по AGENT_MODEL: имя модели OpenAI или stub (локальная заглушка)"""
+    model = os.getenv('AGENT_MODEL', 'gpt-4')
+    if model == 'stub':
+        from services.agent_stub_client import StubChatCompletionClient
+        return StubChatCompletionClient(get_max_turns(), float(os.getenv('AGENT_STUB_DELAY', 0)))
+
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+    return OpenAIChatCompletionClient(model=model, api_key=os.getenv('OPENAI_API_KEY'))
+
+
+def build_team(mode: str, model_client):
+    """Один ассистент или групповой чат ролей по очереди (без участия человека)"""
+    if mode == 'assistant':
+        return AssistantAgent(
+            name='assistant',
+            model_client=model_client,
+            system_message=ASSISTANT_SYSTEM_MESSAGE,
+            model_client_stream=True
+        )
+
+    agents = [
+        AssistantAgent(name=name, description=description, system_message=system_message,
+                       model_client=model_client, model_client_stream=True)
+        for name, description, system_message in GROUP_ROLES
+    ]
+    names = [agent.name for agent in agents]
+    return RoundRobinGroupChat(
+        agents,
+        # TERMINATE учитывается только от агентов, а не из текста задачи
+        termination_condition=TextMentionTermination('TERMINATE', sources=names)
+        | MaxMessageTermination(get_max_turns() + 1),
+        max_turns=get_max_turns()
+    )
+
+
+def build_prompt(job) -> str:
+    project = job.project
+    lines = [f"Проект: {project['name']}"]
+    if project.get('description'):
+        lines.append(f"Описание: {project['description']}")
+    lines += ['', f'Задача: {job.task}']
+    return '\n'.join(lines)
+
+
+async def run_agent_job(job):
+    """Выполнение задачи: фрагменты ответов (chunk) и сообщения агентов с расходом токенов"""
+    model_client = create_model_client()
+    cancellation_token = CancellationToken()
+    try:
+        team = build_team(job.mode, model_client)
+        async for message in team.run_stream(task=build_prompt(job), cancellation_token=cancellation_token):
+            if isinstance(message, TaskResult):
+                continue
+            if isinstance(message, ModelClientStreamingChunkEvent):
+                yield {'type': 'chunk', 'source': message.source, 'content': message.content}
+                continue
+            if message.source == 'user':
+                continue
+
+            usage = message.models_usage
+            yield {
+                'type': 'message',
+                'source': message.source,
+                'content': message.content if isinstance(message.content, str) else str(message.content),
+                'tokens': usage.prompt_tokens + usage.completion_tokens if usage else 0
+            }
+    finally:
+        # Остановка по отмене, таймауту или бюджету прерывает и запрос к модели
+        cancellation_token.cancel()
+        await model_client.close()
+
+
+def create_agent_queue() -> AgentJobQueue:
+    """Очередь задач агентов или None, если не установлен autogen-agentchat
+    или для модели OpenAI не задан OPENAI_API_KEY"""
+    if AssistantAgent is None:
+        return None
+    if os.getenv('AGENT_MODEL', 'gpt-4') != 'stub' and not os.getenv('OPENAI_API_KEY'):
+        return None
+    return AgentJobQueue(run_agent_job)
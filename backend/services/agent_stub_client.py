@@ -0,0 +1,32 @@
+import asyncio
+
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+
+class StubChatCompletionClient(ReplayChatCompletionClient):
+    """Локальная заглушка модели (AGENT_MODEL=stub): ответы без сети и ключа API.
+
+    На каждый ход заготовлен ответ, последний содержит TERMINATE, поэтому
+    групповой чат завершается сам. delay - задержка ответа в секундах, чтобы
+    проверять очередь, отмену и поток событий на правдоподобных временах.
+    Токены считаются по словам, как в ReplayChatCompletionClient.
+    """
+
+    def __init__(self, turns: int, delay: float = 0.0):
+        responses = [
+            f'Ответ заглушки {turn}: задача разобрана, предлагаю следующий шаг.'
+            for turn in range(1, turns + 1)
+        ]
+        responses[-1] += ' TERMINATE'
+        super().__init__(responses)
+        self.delay = delay
+        self.set_cached_bool_value(False)
+
+    async def create(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await super().create(messages, **kwargs)
+
+    async def create_stream(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        async for chunk in super().create_stream(messages, **kwargs):
+            yield chunk
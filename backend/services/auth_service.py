@@ -1,23 +1,27 @@
-import bcrypt
 import jwt
 from datetime import datetime, timedelta
-from utils.database import get_supabase_client
+from models.repository import get_repository
+from utils.activity_log import get_activity_log
+from utils.cache import get_user_companies_cache
+from utils.hashing import HashingPoolBusy, get_password_hasher
 import os
+import threading
 
 class AuthService:
     def __init__(self):
-        self.supabase = get_supabase_client()
+        self.repository = get_repository()
+        self.user_companies_cache = get_user_companies_cache()
+        self.password_hasher = get_password_hasher()
+        self.activity_log = get_activity_log()
         self.jwt_secret = os.getenv('SECRET_KEY', 'your-secret-key-here')
     
     def hash_password(self, password: str) -> str:
         """Хеширование пароля"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        return self.password_hasher.hash(password)
     
     def verify_password(self, password: str, hashed: str) -> bool:
         """Проверка пароля"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        return self.password_hasher.verify(password, hashed)
     
     def generate_token(self, user_id: str) -> str:
         """Генерация JWT токена"""
@@ -42,77 +46,101 @@ class AuthService:
         """Регистрация пользователя и создание компании"""
         try:
             # Проверяем, существует ли пользователь
-            existing_user = self.supabase.table('users').select('id').eq('email', email).execute()
-            if existing_user.data:
+            if self.repository.get_user_id_by_email(email):
                 return {'success': False, 'error': 'Пользователь с таким email уже существует'}
             
             # Хешируем пароль
             password_hash = self.hash_password(password)
             
             # Вызываем функцию создания компании с владельцем
-            result = self.supabase.rpc('create_company_with_owner', {
-                'company_name': company_name,
-                'company_description': company_description,
-                'owner_email': email,
-                'owner_password_hash': password_hash,
-                'owner_first_name': first_name,
-                'owner_last_name': last_name
-            }).execute()
+            result = self.repository.create_company_with_owner(
+                company_name=company_name,
+                company_description=company_description,
+                owner_email=email,
+                owner_password_hash=password_hash,
+                owner_first_name=first_name,
+                owner_last_name=last_name
+            )
             
-            if result.data and result.data.get('success'):
+            if result and result.get('success'):
+                # Пользователь стал владельцем новой компании
+                self.user_companies_cache.invalidate(result['user_id'])
+                self.activity_log.record(
+                    result['company_id'], 'company.create', actor_id=result['user_id'],
+                    target_type='company', target_id=result['company_id'], details={'name': company_name}
+                )
+                
                 # Генерируем токен
-                token = self.generate_token(result.data['user_id'])
+                token = self.generate_token(result['user_id'])
                 
                 return {
                     'success': True,
                     'data': {
-                        'user_id': result.data['user_id'],
-                        'company_id': result.data['company_id'],
+                        'user_id': result['user_id'],
+                        'company_id': result['company_id'],
                         'token': token
                     }
                 }
             else:
                 return {'success': False, 'error': 'Ошибка при создании пользователя и компании'}
                 
+        except HashingPoolBusy:
+            raise
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
     def login_user(self, email: str, password: str) -> dict:
         """Вход пользователя"""
         try:
-            # Находим пользователя
-            user_result = self.supabase.table('users').select('*').eq('email', email).execute()
-            
-            if not user_result.data:
+            # Профиль, хеш пароля и компании получаем одним запросом
+            user = self.repository.get_user_for_login(email)
+            if not user:
                 return {'success': False, 'error': 'Пользователь не найден'}
             
-            user = user_result.data[0]
-            
             # Проверяем пароль
             if not self.verify_password(password, user['password_hash']):
                 return {'success': False, 'error': 'Неверный пароль'}
             
-            # Получаем компании пользователя
-            companies_result = self.supabase.rpc('get_user_companies', {
-                'user_id': user['id']
-            }).execute()
+            # Список компаний свежий, заодно обновляем кэш
+            companies = user['companies'] or []
+            self.user_companies_cache.set(user['user_id'], companies)
+            
+            # Вход попадает в журнал каждой компании пользователя
+            for company in companies:
+                self.activity_log.record(company['company_id'], 'user.login', actor_id=user['user_id'],
+                                         target_type='user', target_id=user['user_id'])
             
             # Генерируем токен
-            token = self.generate_token(user['id'])
+            token = self.generate_token(user['user_id'])
             
             return {
                 'success': True,
                 'data': {
-                    'user_id': user['id'],
+                    'user_id': user['user_id'],
                     'email': user['email'],
                     'first_name': user['first_name'],
                     'last_name': user['last_name'],
-                    'companies': companies_result.data or [],
+                    'companies': companies,
                     'token': token
                 }
             }
             
+        except HashingPoolBusy:
+            raise
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
 
+_auth_service = None
+_auth_service_lock = threading.Lock()
+
+
+def get_auth_service() -> AuthService:
+    """Общий для процесса сервис авторизации (создается при первом обращении)"""
+    global _auth_service
+
+    with _auth_service_lock:
+        if _auth_service is None:
+            _auth_service = AuthService()
+
+    return _auth_service
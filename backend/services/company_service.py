@@ -1,30 +1,75 @@
-from utils.database import get_supabase_client
+import threading
+
+from models.repository import get_repository
+from utils.activity_log import get_activity_log
+from utils.cache import get_user_companies_cache
+from utils.hashing import HashingPoolBusy, get_password_hasher
+from utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, paginate
 
 class CompanyService:
     def __init__(self):
-        self.supabase = get_supabase_client()
+        self.repository = get_repository()
+        self.user_companies_cache = get_user_companies_cache()
+        self.password_hasher = get_password_hasher()
+        self.activity_log = get_activity_log()
     
     def get_user_companies(self, user_id: str) -> list:
         """Получение компаний пользователя"""
         try:
-            result = self.supabase.rpc('get_user_companies', {
-                'user_id': user_id
-            }).execute()
-            
-            return result.data or []
+            return self.user_companies_cache.get_or_load(
+                user_id, lambda: self._fetch_user_companies(user_id)
+            )
             
         except Exception as e:
             print(f"Ошибка при получении компаний: {e}")
             return []
     
+    def _fetch_user_companies(self, user_id: str) -> list:
+        """Запрос компаний пользователя из базы в обход кэша"""
+        return self.repository.get_user_companies(user_id)
+    
+    def get_user_role(self, user_id: str, company_id: str) -> str:
+        """Роль пользователя в компании или None, если он не участник"""
+        for company in self.get_user_companies(user_id):
+            if company['company_id'] == company_id:
+                return company['user_role']
+        return None
+    
+    def invalidate_user_companies(self, user_id: str):
+        """Сброс кэша компаний пользователя после изменения членства"""
+        self.user_companies_cache.invalidate(user_id)
+    
+    def get_company_stats(self, company_id: str) -> dict:
+        """Число проектов и участников и время последней активности компании
+        (таблица company_stats, которую ведут триггеры) или None"""
+        try:
+            return self.repository.get_company_stats(company_id)
+            
+        except Exception as e:
+            print(f"Ошибка при получении статистики компании: {e}")
+            return None
+    
+    def get_company_activity(self, company_id: str, limit: int = DEFAULT_PAGE_SIZE,
+                             cursor: str = None) -> dict:
+        """Страница журнала действий компании, новые события первыми.
+        События, еще не записанные из буфера, в ленту пока не попадают."""
+        after = decode_cursor(cursor) if cursor else None
+
+        try:
+            events, next_cursor = paginate(
+                self.repository.list_company_activity(company_id, limit + 1, after), limit
+            )
+
+            return {'data': events, 'next_cursor': next_cursor}
+            
+        except Exception as e:
+            print(f"Ошибка при получении журнала действий: {e}")
+            return {'data': [], 'next_cursor': None}
+    
     def get_company_members(self, company_id: str) -> list:
         """Получение участников компании"""
         try:
-            result = self.supabase.table('company_members').select(
-                'id, role, joined_at, users(id, email, first_name, last_name)'
-            ).eq('company_id', company_id).execute()
-            
-            return result.data or []
+            return self.repository.get_company_members(company_id)
             
         except Exception as e:
             print(f"Ошибка при получении участников компании: {e}")
@@ -34,24 +79,42 @@ class CompanyService:
                              first_name: str, last_name: str, role: str = 'member') -> dict:
         """Добавление участника в компанию"""
         try:
-            result = self.supabase.rpc('add_user_to_company', {
-                'company_id': company_id,
-                'user_email': email,
-                'user_password_hash': password,
-                'user_first_name': first_name,
-                'user_last_name': last_name,
-                'user_role': role
-            }).execute()
+            result = self.repository.add_user_to_company(
+                company_id=company_id,
+                email=email,
+                password_hash=self.password_hasher.hash(password),
+                first_name=first_name,
+                last_name=last_name,
+                role=role
+            )
             
-            if result.data and result.data.get('success'):
+            if result and result.get('success'):
+                self.invalidate_user_companies(result['user_id'])
+                self.activity_log.record(company_id, 'member.add', target_type='user',
+                                         target_id=result['user_id'], details={'role': role})
                 return {
                     'success': True,
-                    'data': result.data
+                    'data': result
                 }
             else:
                 return {'success': False, 'error': 'Ошибка при добавлении участника'}
                 
+        except HashingPoolBusy:
+            raise
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
 
+_company_service = None
+_company_service_lock = threading.Lock()
+
+
+def get_company_service() -> CompanyService:
+    """Общий для процесса сервис компаний (создается при первом обращении)"""
+    global _company_service
+
+    with _company_service_lock:
+        if _company_service is None:
+            _company_service = CompanyService()
+
+    return _company_service
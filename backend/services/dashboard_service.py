@@ -0,0 +1,61 @@
+import threading
+import uuid
+
+from models.repository import get_repository
+from utils.cache import get_user_companies_cache
+from utils.pagination import DEFAULT_PAGE_SIZE, paginate
+
+
+def dashboard_page(result: dict, limit: int) -> dict:
+    """Ответ главной страницы из результата get_dashboard (запрошенного с limit + 1)"""
+    projects, next_cursor = paginate(result.get('projects') or [], limit)
+    return {
+        'companies': result.get('companies') or [],
+        'company_id': result.get('company_id'),
+        'projects': projects,
+        'next_cursor': next_cursor
+    }
+
+
+class DashboardService:
+    def __init__(self):
+        self.repository = get_repository()
+        self.user_companies_cache = get_user_companies_cache()
+
+    def get_dashboard(self, user_id: str, company_id: str = None,
+                      limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        """Компании пользователя и первая страница проектов выбранной компании одним запросом"""
+        # company_id подставляется в вызов функции базы, поэтому проверяем формат
+        if company_id:
+            try:
+                uuid.UUID(company_id)
+            except ValueError:
+                raise ValueError('Некорректный ID компании')
+
+        try:
+            dashboard = dashboard_page(
+                self.repository.get_dashboard(user_id, company_id, limit + 1) or {}, limit
+            )
+
+            # Список компаний уже получен, заодно обновляем кэш для GET /api/companies
+            self.user_companies_cache.set(user_id, dashboard['companies'])
+            return dashboard
+
+        except Exception as e:
+            print(f"Ошибка при получении данных главной страницы: {e}")
+            return {'companies': [], 'company_id': None, 'projects': [], 'next_cursor': None}
+
+
+_dashboard_service = None
+_dashboard_service_lock = threading.Lock()
+
+
+def get_dashboard_service() -> DashboardService:
+    """Общий для процесса сервис главной страницы (создается при первом обращении)"""
+    global _dashboard_service
+
+    with _dashboard_service_lock:
+        if _dashboard_service is None:
+            _dashboard_service = DashboardService()
+
+    return _dashboard_service
@@ -0,0 +1,302 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from models.repository import get_repository
+from utils.activity_log import get_activity_log
+from utils.cache import get_user_companies_cache
+from utils.hashing import get_password_hasher
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+MEMBER_ROLES = ('admin', 'member', 'guest')
+REQUIRED_MEMBER_FIELDS = ('email', 'password', 'first_name', 'last_name')
+MAX_REPORTED_ERRORS = 100
+MAX_TRACKED_JOBS = 1000
+
+
+def get_max_import_bytes() -> int:
+    return int(float(os.getenv('MEMBER_IMPORT_MAX_MB', 20)) * 1024 * 1024)
+
+
+class ImportTooLarge(ValueError):
+    """Загруженный файл больше MEMBER_IMPORT_MAX_MB"""
+
+    def __init__(self):
+        super().__init__(f'Файл импорта больше {get_max_import_bytes() // (1024 * 1024)} МБ')
+
+
+def decode_lines(file, state: dict):
+    """Строки файла в UTF-8. В state['line_num'] - номер последней прочитанной
+    строки; номера строк, которые не удалось декодировать, попадают в
+    state['bad_lines'], а вместо них отдается пустая строка"""
+    for line_num, raw in enumerate(file, start=1):
+        state['line_num'] = line_num
+        try:
+            yield raw.decode('utf-8-sig' if line_num == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            state['bad_lines'].append(line_num)
+            yield '\n'
+
+
+def iter_member_rows(file, file_format: str):
+    """Потоковый разбор загруженного файла, возвращает (номер строки, dict, ошибка).
+
+    Ошибка кодировки или разбора относится к своей строке и не прерывает импорт.
+    """
+    state = {'line_num': 0, 'bad_lines': []}
+    lines = decode_lines(file, state)
+
+    def undecoded():
+        while state['bad_lines']:
+            yield state['bad_lines'].pop(0), None, 'Строка не в кодировке UTF-8'
+
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                yield from undecoded()
+                yield state['line_num'], None, f'Ошибка разбора CSV: {e}'
+                continue
+            yield from undecoded()
+            yield reader.line_num, row, None
+        yield from undecoded()
+    else:
+        for line_num, line in enumerate(lines, start=1):
+            if state['bad_lines']:
+                yield from undecoded()
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_num, None, 'Некорректный JSON'
+                continue
+            yield line_num, row, None
+
+
+def validate_member_row(row) -> str:
+    """Проверка строки импорта, возвращает текст ошибки или None"""
+    if not isinstance(row, dict):
+        return 'Строка не является объектом'
+
+    for field in REQUIRED_MEMBER_FIELDS:
+        if not isinstance(row.get(field), str) or not row[field].strip():
+            return f'Поле {field} обязательно'
+
+    if '@' not in row['email']:
+        return 'Некорректный email'
+
+    role = row.get('role') or 'member'
+    if role not in MEMBER_ROLES:
+        return f'Недопустимая роль: {role}'
+
+    return None
+
+
+class MemberImportService:
+    def __init__(self):
+        self.repository = get_repository()
+        self.user_companies_cache = get_user_companies_cache()
+        self.password_hasher = get_password_hasher()
+        self.batch_size = int(os.getenv('MEMBER_IMPORT_BATCH_SIZE', 500))
+        self.activity_log = get_activity_log()
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('MEMBER_IMPORT_WORKERS', 2)),
+            thread_name_prefix='member-import'
+        )
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def start_import(self, company_id: str, stream, file_format: str, requested_by: str) -> dict:
+        """Сохранение загрузки во временный файл и запуск фонового импорта"""
+        # Тело запроса копируем кусками, не загружая целиком в память
+        max_bytes = get_max_import_bytes()
+        size = 0
+        spool = tempfile.NamedTemporaryFile(prefix='member-import-', delete=False)
+        try:
+            with spool:
+                for chunk in iter(lambda: stream.read(64 * 1024), b''):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ImportTooLarge()
+                    spool.write(chunk)
+        except Exception:
+            os.unlink(spool.name)
+            raise
+
+        job = {
+            'id': str(uuid.uuid4()),
+            'company_id': company_id,
+            'requested_by': requested_by,
+            'format': file_format,
+            'status': 'pending',
+            'processed': 0,
+            'imported': 0,
+            'skipped': 0,
+            'failed': 0,
+            'errors': [],
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'finished_at': None
+        }
+        try:
+            # Задача должна быть видна другим воркерам до ответа клиенту
+            self.repository.save_import_job(job)
+        except Exception:
+            os.unlink(spool.name)
+            raise
+
+        with self._lock:
+            self.jobs[job['id']] = job
+            # Забываем самые старые завершенные задачи
+            finished = [key for key, item in self.jobs.items() if item['finished_at']]
+            for key in finished[:max(0, len(self.jobs) - MAX_TRACKED_JOBS)]:
+                del self.jobs[key]
+
+        self.executor.submit(self._run_import, job, spool.name)
+        return self.get_job(job['id'])
+
+    def get_job(self, job_id: str) -> dict:
+        """Снимок состояния задачи импорта: из памяти, если импорт идет в этом
+        процессе, иначе - последний сохраненный в базе"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job:
+                return dict(job, errors=list(job['errors']))
+
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+
+        try:
+            return self.repository.get_import_job(job_id)
+        except Exception as e:
+            print(f"Ошибка при получении задачи импорта: {e}")
+            return None
+
+    def _update_job(self, job: dict, **changes):
+        with self._lock:
+            job.update(changes)
+
+    def _save_job(self, job: dict):
+        """Сохранение прогресса в базе; ошибка не прерывает импорт"""
+        with self._lock:
+            snapshot = dict(job, errors=list(job['errors']))
+        try:
+            self.repository.save_import_job(snapshot)
+        except Exception as e:
+            print(f"Ошибка при сохранении задачи импорта: {e}")
+
+    def _record_error(self, job: dict, line_num: int, error: str):
+        with self._lock:
+            job['failed'] += 1
+            job['processed'] += 1
+            if len(job['errors']) < MAX_REPORTED_ERRORS:
+                job['errors'].append({'line': line_num, 'error': error})
+
+    def _run_import(self, job: dict, path: str):
+        self._update_job(job, status='running')
+        self._save_job(job)
+        try:
+            with open(path, 'rb') as file:
+                batch = []
+                seen_emails = set()
+
+                for line_num, row, error in iter_member_rows(file, job['format']):
+                    if error is None:
+                        error = validate_member_row(row)
+                    if error is None:
+                        # Email сравнивается как при регистрации и входе - с учетом
+                        # регистра: иначе Alice@x.com из файла не совпал бы с
+                        # Alice@x.com в базе и создал бы вторую учетную запись
+                        email = row['email'].strip()
+                        if email in seen_emails:
+                            error = 'Email повторяется в файле'
+                        seen_emails.add(email)
+
+                    if error:
+                        self._record_error(job, line_num, error)
+                        continue
+
+                    batch.append((line_num, row))
+                    if len(batch) >= self.batch_size:
+                        self._import_batch(job, batch)
+                        self._save_job(job)
+                        batch = []
+
+                if batch:
+                    self._import_batch(job, batch)
+
+            self._update_job(job, status='done')
+
+        except Exception as e:
+            print(f"Ошибка при импорте участников: {e}")
+            self._update_job(job, status='failed')
+            with self._lock:
+                job['errors'].append({'line': None, 'error': str(e)})
+
+        finally:
+            os.unlink(path)
+            self._update_job(job, finished_at=datetime.now(timezone.utc).isoformat())
+            self._save_job(job)
+
+    def _import_batch(self, job: dict, batch: list):
+        """Хеширование паролей пачки на всех ядрах и одна вставка в базу"""
+        hashes = self.password_hasher.hash_many([row['password'] for _, row in batch])
+
+        members = [{
+            'email': row['email'].strip(),
+            'password_hash': password_hash,
+            'first_name': row['first_name'].strip(),
+            'last_name': row['last_name'].strip(),
+            'role': row.get('role') or 'member'
+        } for (_, row), password_hash in zip(batch, hashes)]
+
+        try:
+            result = self.repository.import_company_members(job['company_id'], members)
+
+            if not result or not result.get('success'):
+                raise ValueError('Ошибка при добавлении участников')
+
+        except Exception as e:
+            for line_num, _ in batch:
+                self._record_error(job, line_num, str(e))
+            return
+
+        added = result['added_user_ids'] or []
+        for user_id in added:
+            self.user_companies_cache.invalidate(user_id)
+            self.activity_log.record(job['company_id'], 'member.add', actor_id=job['requested_by'],
+                                     target_type='user', target_id=user_id, details={'import_id': job['id']})
+
+        with self._lock:
+            job['processed'] += len(batch)
+            job['imported'] += len(added)
+            # Пользователь с таким email уже зарегистрирован: импорт его не
+            # добавляет, в компанию он попадает только по приглашению
+            job['skipped'] += len(batch) - len(added)
+
+
+_member_import_service = None
+_member_import_service_lock = threading.Lock()
+
+
+def get_member_import_service() -> MemberImportService:
+    """Общий для процесса сервис импорта участников (создается при первом обращении)"""
+    global _member_import_service
+
+    with _member_import_service_lock:
+        if _member_import_service is None:
+            _member_import_service = MemberImportService()
+
+    return _member_import_service
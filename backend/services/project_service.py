@@ -1,43 +1,107 @@
-from utils.database import get_supabase_client
+import os
+import threading
+import uuid
+
+from models.repository import get_repository
+from utils.activity_log import get_activity_log
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    decode_offset_cursor,
+    paginate,
+    paginate_offset,
+)
+
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+MAX_BATCH_SIZE = 1000
+MAX_SEARCH_QUERY_LENGTH = 200
+# Не больше одной страницы списка проектов за запрос участников
+MAX_MEMBER_LOOKUP_IDS = MAX_PAGE_SIZE
+
 
 class ProjectService:
     def __init__(self):
-        self.supabase = get_supabase_client()
+        self.repository = get_repository()
+        self.batch_chunk_size = int(os.getenv('PROJECT_BATCH_CHUNK_SIZE', 200))
+        self.activity_log = get_activity_log()
     
-    def get_company_projects(self, company_id: str) -> list:
-        """Получение проектов компании"""
+    def get_company_projects(self, company_id: str, limit: int = DEFAULT_PAGE_SIZE,
+                             cursor: str = None) -> dict:
+        """Получение страницы проектов компании (keyset-пагинация по created_at, id)"""
+        # ID компании и курсор проверяем до запроса, чтобы ошибка дошла до вызывающего кода
         try:
-            result = self.supabase.table('projects').select(
-                'id, name, description, created_at, created_by, users(first_name, last_name)'
-            ).eq('company_id', company_id).order('created_at', desc=True).execute()
-            
-            return result.data or []
+            uuid.UUID(company_id)
+        except ValueError:
+            raise ValueError('Некорректный ID компании')
+        after = decode_cursor(cursor) if cursor else None
+
+        try:
+            # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница
+            projects, next_cursor = paginate(
+                self.repository.list_company_projects(company_id, limit + 1, after), limit
+            )
+
+            return {'data': projects, 'next_cursor': next_cursor}
             
         except Exception as e:
             print(f"Ошибка при получении проектов: {e}")
-            return []
+            return {'data': [], 'next_cursor': None}
+    
+    def search_projects(self, company_id: str, query: str, limit: int = DEFAULT_PAGE_SIZE,
+                        cursor: str = None) -> dict:
+        """Полнотекстовый поиск проектов компании с ранжированием по релевантности"""
+        try:
+            uuid.UUID(company_id)
+        except ValueError:
+            raise ValueError('Некорректный ID компании')
+        query = (query or '').strip()
+        if not query:
+            raise ValueError('Поисковый запрос обязателен')
+        if len(query) > MAX_SEARCH_QUERY_LENGTH:
+            raise ValueError(f'Поисковый запрос длиннее {MAX_SEARCH_QUERY_LENGTH} символов')
+        offset = decode_offset_cursor(cursor) if cursor else 0
+
+        try:
+            projects, next_cursor = paginate_offset(
+                self.repository.search_company_projects(company_id, query, limit + 1, offset),
+                limit, offset
+            )
+
+            return {'data': projects, 'next_cursor': next_cursor}
+            
+        except Exception as e:
+            print(f"Ошибка при поиске проектов: {e}")
+            return {'data': [], 'next_cursor': None}
+    
+    def get_company_version(self, company_id: str) -> int:
+        """Версия данных компании для ETag или None"""
+        try:
+            return self.repository.get_company_version(company_id)
+            
+        except Exception as e:
+            print(f"Ошибка при получении версии компании: {e}")
+            return None
     
     def create_project(self, name: str, description: str, company_id: str, created_by: str) -> dict:
         """Создание нового проекта"""
         try:
-            result = self.supabase.table('projects').insert({
-                'name': name,
-                'description': description,
-                'company_id': company_id,
-                'created_by': created_by
-            }).execute()
+            # Проект и владелец создаются одной транзакцией на стороне базы
+            result = self.repository.create_project_with_owner(
+                name=name,
+                description=description,
+                company_id=company_id,
+                owner_id=created_by
+            )
             
-            if result.data:
-                # Добавляем создателя как владельца проекта
-                self.supabase.table('project_members').insert({
-                    'project_id': result.data[0]['id'],
-                    'user_id': created_by,
-                    'role': 'owner'
-                }).execute()
-                
+            if result and result.get('success'):
+                project = result['project']
+                self.activity_log.record(company_id, 'project.create', actor_id=created_by,
+                                         target_type='project', target_id=project['id'],
+                                         details={'name': project.get('name', name)})
                 return {
                     'success': True,
-                    'data': result.data[0]
+                    'data': project
                 }
             else:
                 return {'success': False, 'error': 'Ошибка при создании проекта'}
@@ -45,17 +109,168 @@ class ProjectService:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def validate_batch_operation(self, operation) -> str:
+        """Проверка одной операции пакета, возвращает текст ошибки или None"""
+        if not isinstance(operation, dict):
+            return 'Операция должна быть объектом'
+        
+        op = operation.get('op')
+        if op not in BATCH_OPERATIONS:
+            return f'Неизвестная операция: {op}'
+        
+        for field in ('name', 'description'):
+            value = operation.get(field)
+            if value is not None and not isinstance(value, str):
+                return f'Поле {field} должно быть строкой'
+        
+        if op == 'create' and not operation.get('name'):
+            return 'Поле name обязательно'
+        
+        if op in ('update', 'delete'):
+            try:
+                uuid.UUID(str(operation.get('id')))
+            except ValueError:
+                return 'Поле id должно быть UUID проекта'
+        
+        if op == 'update' and operation.get('name') is None and operation.get('description') is None:
+            return 'Нужно указать name или description'
+        
+        if operation.get('name') and len(operation['name']) > 255:
+            return 'Поле name длиннее 255 символов'
+        
+        return None
+    
+    def apply_batch(self, company_id: str, user_id: str, operations: list) -> list:
+        """Пакетное применение операций над проектами компании.
+        
+        Все операции сначала проверяются, затем отправляются в базу частями:
+        один вызов apply_project_batch на часть. Возвращает результат для
+        каждой операции в исходном порядке.
+        """
+        results = [None] * len(operations)
+        valid = []
+        seen_ids = set()
+        
+        for idx, operation in enumerate(operations):
+            error = self.validate_batch_operation(operation)
+            if error is None and operation['op'] != 'create':
+                # Повторная операция над тем же проектом в одном пакете неоднозначна
+                if operation['id'] in seen_ids:
+                    error = 'Проект уже указан в другой операции пакета'
+                seen_ids.add(operation['id'])
+            
+            if error:
+                results[idx] = {'index': idx, 'success': False, 'error': error}
+            else:
+                valid.append((idx, operation))
+        
+        for start in range(0, len(valid), self.batch_chunk_size):
+            chunk = valid[start:start + self.batch_chunk_size]
+            for idx, result in self._apply_batch_chunk(company_id, user_id, chunk).items():
+                results[idx] = result
+        
+        for idx, operation in enumerate(operations):
+            if isinstance(operation, dict):
+                results[idx]['op'] = operation.get('op')
+        
+        return results
+    
+    def _apply_batch_chunk(self, company_id: str, user_id: str, chunk: list) -> dict:
+        """Один вызов базы для части пакета"""
+        creates, updates, deletes = [], [], []
+        for idx, operation in chunk:
+            if operation['op'] == 'create':
+                creates.append({
+                    'idx': idx,
+                    'name': operation['name'],
+                    'description': operation.get('description', '')
+                })
+            elif operation['op'] == 'update':
+                updates.append({
+                    'idx': idx,
+                    'id': operation['id'],
+                    'name': operation.get('name'),
+                    'description': operation.get('description')
+                })
+            else:
+                deletes.append({'idx': idx, 'id': operation['id']})
+        
+        try:
+            result = self.repository.apply_project_batch(company_id, user_id, creates, updates, deletes)
+            
+            if not result or not result.get('success'):
+                raise ValueError('Ошибка при применении пакета')
+                
+        except Exception as e:
+            # Часть выполняется одной транзакцией, поэтому не применена целиком
+            return {idx: {'index': idx, 'success': False, 'error': str(e)} for idx, _ in chunk}
+        
+        applied = {}
+        for op, items in (('create', result['created']), ('update', result['updated'])):
+            for item in items:
+                applied[item['idx']] = {'index': item['idx'], 'success': True, 'data': item['project']}
+                self.activity_log.record(company_id, f'project.{op}', actor_id=user_id, target_type='project',
+                                         target_id=item['project']['id'], details={'batch': True})
+        for item in result['deleted']:
+            applied[item['idx']] = {'index': item['idx'], 'success': True, 'data': {'id': item['id']}}
+            self.activity_log.record(company_id, 'project.delete', actor_id=user_id, target_type='project',
+                                     target_id=item['id'], details={'batch': True})
+        
+        for idx, _ in chunk:
+            if idx not in applied:
+                applied[idx] = {'index': idx, 'success': False, 'error': 'Проект не найден'}
+        
+        return applied
+    
     def get_project_members(self, project_id: str) -> list:
         """Получение участников проекта"""
         try:
-            result = self.supabase.table('project_members').select(
-                'id, role, joined_at, users(id, email, first_name, last_name)'
-            ).eq('project_id', project_id).execute()
-            
-            return result.data or []
+            return self.repository.get_project_members(project_id)
             
         except Exception as e:
             print(f"Ошибка при получении участников проекта: {e}")
             return []
 
+    def get_projects_members(self, company_id: str, project_ids: list, counts_only: bool = False) -> dict:
+        """Участники нескольких проектов компании одним запросом к базе.
+
+        Возвращает {project_id: {'count': n, 'members': [...]}} (при counts_only -
+        только count). Проекты другой компании в ответ не попадают.
+        """
+        try:
+            uuid.UUID(company_id)
+        except ValueError:
+            raise ValueError('Некорректный ID компании')
+        # Повторы убираем с сохранением порядка
+        project_ids = list(dict.fromkeys(project_ids))
+        if not project_ids:
+            raise ValueError('Список ID проектов пуст')
+        if len(project_ids) > MAX_MEMBER_LOOKUP_IDS:
+            raise ValueError(f'Не больше {MAX_MEMBER_LOOKUP_IDS} проектов за запрос')
+        for project_id in project_ids:
+            try:
+                uuid.UUID(project_id)
+            except ValueError:
+                raise ValueError(f'Некорректный ID проекта: {project_id}')
+
+        try:
+            return self.repository.get_projects_members(company_id, project_ids, counts_only) or {}
+
+        except Exception as e:
+            print(f"Ошибка при получении участников проектов: {e}")
+            return {}
+
+
+_project_service = None
+_project_service_lock = threading.Lock()
+
+
+def get_project_service() -> ProjectService:
+    """Общий для процесса сервис проектов (создается при первом обращении)"""
+    global _project_service
+
+    with _project_service_lock:
+        if _project_service is None:
+            _project_service = ProjectService()
 
+    return _project_service
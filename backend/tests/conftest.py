@@ -0,0 +1,153 @@
+import json
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Модули бэкенда импортируются от каталога backend, как при запуске app.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from models import repository  # noqa: E402
+from models.repository import Repository  # noqa: E402
+
+# Общие для процесса сервисы, которые создаются при первом обращении
+SERVICE_SINGLETONS = (
+    ('services.auth_service', '_auth_service'),
+    ('services.company_service', '_company_service'),
+    ('services.dashboard_service', '_dashboard_service'),
+    ('services.project_service', '_project_service'),
+    ('utils.cache', '_user_companies_cache'),
+    ('utils.rate_limit', '_auth_throttle'),
+    ('utils.activity_log', '_activity_log'),
+)
+
+
+class MemoryRepository(Repository):
+    """Репозиторий в памяти с той же сортировкой и курсором, что и в базе"""
+
+    def __init__(self):
+        self.projects = []
+        self.versions = {}
+        self.companies = {}
+        self.import_jobs = {}
+        self.activity = []
+        self.batch_calls = []
+        self.user_emails = set()
+
+    def add_project(self, company_id: str, project_id: str, created_at: str, name: str = None,
+                    description: str = None):
+        self.projects.append({
+            'id': project_id,
+            'company_id': company_id,
+            'name': name or f'Проект {len(self.projects) + 1}',
+            'description': description,
+            'created_at': created_at
+        })
+
+    def get_user_companies(self, user_id: str) -> list:
+        return self.companies.get(user_id, [])
+
+    def get_projects_members(self, company_id: str, project_ids: list, counts_only: bool = False) -> dict:
+        return {
+            project['id']: {'count': 0} if counts_only else {'count': 0, 'members': []}
+            for project in self.projects
+            if project['company_id'] == company_id and project['id'] in project_ids
+        }
+
+    def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        rows = sorted(
+            (project for project in self.projects if project['company_id'] == company_id),
+            key=lambda project: (project['created_at'], project['id']),
+            reverse=True
+        )
+        if after:
+            rows = [project for project in rows if (project['created_at'], project['id']) < after]
+        return rows[:limit]
+
+    def search_company_projects(self, company_id: str, query: str, limit: int, offset: int) -> list:
+        # Упрощенная релевантность: слово в названии весит больше, чем в описании
+        words = query.lower().split()
+        ranked = []
+        for project in self.projects:
+            if project['company_id'] != company_id:
+                continue
+            name = project['name'].lower()
+            description = (project['description'] or '').lower()
+            rank = sum(2 * (word in name) + (word in description) for word in words)
+            if rank:
+                ranked.append(dict(project, rank=rank))
+        ranked.sort(key=lambda project: (project['rank'], project['created_at'], project['id']), reverse=True)
+        return ranked[offset:offset + limit]
+
+    def apply_project_batch(self, company_id: str, actor_id: str, creates: list,
+                            updates: list, deletes: list) -> dict:
+        self.batch_calls.append((creates, updates, deletes))
+        if not any(company['company_id'] == company_id for company in self.companies.get(actor_id, [])):
+            raise ValueError('Пользователь не является участником компании')
+
+        company_projects = {project['id']: project for project in self.projects if project['company_id'] == company_id}
+        created = []
+        for item in creates:
+            self.add_project(company_id, str(uuid.uuid4()), '2024-06-01T00:00:00+00:00', name=item['name'],
+                             description=item['description'])
+            created.append({'idx': item['idx'], 'project': self.projects[-1]})
+        updated = []
+        for item in updates:
+            project = company_projects.get(item['id'])
+            if project:
+                project['name'] = item['name'] or project['name']
+                project['description'] = item['description'] or project['description']
+                updated.append({'idx': item['idx'], 'project': project})
+        deleted = []
+        for item in deletes:
+            if company_projects.pop(item['id'], None):
+                self.projects = [project for project in self.projects if project['id'] != item['id']]
+                deleted.append({'idx': item['idx'], 'id': item['id']})
+        return {'created': created, 'updated': updated, 'deleted': deleted, 'success': True}
+
+    def get_company_version(self, company_id: str) -> int:
+        return self.versions.get(company_id)
+
+    def import_company_members(self, company_id: str, members: list) -> dict:
+        # Как ON CONFLICT (email) DO NOTHING: существующие email пропускаются
+        added = []
+        for member in members:
+            if member['email'] not in self.user_emails:
+                self.user_emails.add(member['email'])
+                added.append(str(uuid.uuid4()))
+        return {'success': True, 'created_users': len(added), 'added_user_ids': added,
+                'skipped_count': len(members) - len(added)}
+
+    def save_import_job(self, job: dict):
+        self.import_jobs[job['id']] = json.loads(json.dumps(job))
+
+    def get_import_job(self, job_id: str) -> dict:
+        return self.import_jobs.get(job_id)
+
+    def insert_activity_events(self, events: list) -> int:
+        self.activity.extend(events)
+        return len(events)
+
+
+@pytest.fixture
+def memory_repository(monkeypatch):
+    import importlib
+
+    repo = MemoryRepository()
+    monkeypatch.setattr(repository, '_repository', repo)
+    for module_name, attribute in SERVICE_SINGLETONS:
+        monkeypatch.setattr(importlib.import_module(module_name), attribute, None)
+    yield repo
+
+    # Остаток журнала действий дописывается в этот же репозиторий
+    activity_log = importlib.import_module('utils.activity_log')._activity_log
+    if activity_log is not None:
+        activity_log.close()
+
+
+@pytest.fixture
+def client(memory_repository):
+    from app import create_app
+
+    return create_app().test_client()
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from utils.activity_log import ActivityLog
+
+COMPANY_ID = '00000000-0000-0000-0000-000000000001'
+
+
+class Writer:
+    """Приемник пачек; падает, пока failures > 0"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.batches = []
+        self.called = threading.Event()
+        self.on_call = None
+
+    def __call__(self, batch: list):
+        self.called.set()
+        if self.on_call:
+            self.on_call()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('база недоступна')
+        self.batches.append([event['action'] for event in batch])
+
+    @property
+    def written(self) -> list:
+        return [action for batch in self.batches for action in batch]
+
+
+@pytest.fixture
+def make_log():
+    logs = []
+
+    def make(writer, **options):
+        # Интервал больше длительности теста: фоновый поток пишет только по размеру пачки
+        options = dict({'max_buffer': 100, 'batch_size': 100, 'flush_interval': 60}, **options)
+        log = ActivityLog(writer, **options)
+        logs.append(log)
+        return log
+
+    yield make
+    for log in logs:
+        log.close()
+
+
+def record(log, *actions) -> list:
+    return [log.record(COMPANY_ID, action) for action in actions]
+
+
+def test_full_buffer_drops_new_events(make_log):
+    writer = Writer()
+    log = make_log(writer, max_buffer=3)
+
+    assert record(log, 'a', 'b', 'c', 'd', 'e') == [True, True, True, False, False]
+    assert log.stats()['buffered'] == 3
+    assert (log.recorded, log.dropped) == (3, 2)
+
+    log.flush()
+    assert writer.written == ['a', 'b', 'c']
+
+
+def test_flush_sends_batches_in_order(make_log):
+    writer = Writer()
+    log = make_log(writer)
+    record(log, 'a', 'b', 'c', 'd', 'e')
+    log.batch_size = 2
+
+    assert log.flush() == 5
+    assert writer.batches == [['a', 'b'], ['c', 'd'], ['e']]
+    assert log.stats()['buffered'] == 0
+    assert log.written == 5
+
+
+def test_full_batch_wakes_writer_thread(make_log):
+    writer = Writer()
+    log = make_log(writer, batch_size=2)
+
+    record(log, 'a', 'b')
+
+    assert writer.called.wait(2)
+    deadline = time.monotonic() + 2
+    while log.written < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.written == ['a', 'b']
+
+
+def test_failed_flush_requeues_batch_and_backs_off(make_log):
+    writer = Writer(failures=3)
+    log = make_log(writer, flush_interval=10, max_retry_delay=50)
+    record(log, 'a', 'b')
+
+    assert log.flush() == 0
+    assert log.stats()['buffered'] == 2
+    assert log.stats()['retrying'] is True
+    assert log._retry_delay == 20
+
+    log.flush()
+    assert log._retry_delay == 40
+    log.flush()
+    # Пауза растет вдвое, но не больше max_retry_delay
+    assert log._retry_delay == 50
+    assert log.failed_flushes == 3
+
+    record(log, 'c')
+    assert log.flush() == 3
+    # Повтор сохраняет порядок: возвращенная пачка идет раньше новых событий
+    assert writer.written == ['a', 'b', 'c']
+    assert log.stats()['retrying'] is False
+    assert log.dropped == 0
+
+
+def test_requeue_keeps_oldest_events_that_fit(make_log):
+    writer = Writer(failures=1)
+    log = make_log(writer, max_buffer=3)
+    record(log, 'a', 'b', 'c')
+    # Пока пачка пишется, буфер пуст и принимает новые события
+    writer.on_call = lambda: record(log, 'd', 'e')
+
+    log.flush()
+    writer.on_call = None
+
+    assert log.dropped == 2
+    log.flush()
+    assert writer.written == ['a', 'd', 'e']
+
+
+def test_close_flushes_buffer_and_rejects_new_events(make_log):
+    writer = Writer()
+    log = make_log(writer)
+    record(log, 'a', 'b')
+
+    log.close()
+
+    assert writer.written == ['a', 'b']
+    assert not log._thread.is_alive()
+    assert record(log, 'c') == [False]
+    assert log.dropped == 1
+    # Повторный вызов (atexit после остановки воркера) ничего не делает
+    log.close()
+    assert writer.written == ['a', 'b']
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+
+from utils.agent_queue import AgentJobQueue, AgentQueueFull, TokenBudget
+
+COMPANY_ID = 'company-1'
+PROJECT = {'id': 'project-1', 'name': 'Проект', 'description': 'Описание'}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def make_runner(messages: int = 2, tokens: int = 10, delay: float = 0):
+    async def runner(job):
+        for index in range(messages):
+            await asyncio.sleep(delay)
+            yield {'type': 'chunk', 'source': 'assistant', 'content': 'фрагмент'}
+            yield {'type': 'message', 'source': 'assistant', 'content': f'Ответ {index}', 'tokens': tokens}
+    return runner
+
+
+async def started_queue(runner, **options) -> AgentJobQueue:
+    options.setdefault('budget', TokenBudget(0, 60))
+    queue = AgentJobQueue(runner, **options)
+    await queue.start()
+    return queue
+
+
+async def finished(job, timeout: float = 5):
+    seq = 0
+    while not job.done:
+        events = await asyncio.wait_for(job.wait(seq, timeout), timeout)
+        if events:
+            seq = events[-1]['seq']
+    return job
+
+
+def test_job_runs_and_chunks_are_replaced_by_messages():
+    async def scenario():
+        queue = await started_queue(make_runner(), workers=1)
+        job = await finished(queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant'))
+        await queue.stop()
+        return job
+
+    job = run(scenario())
+
+    assert job.status == 'succeeded'
+    assert job.tokens == 20
+    assert [event['type'] for event in job.events] == ['status', 'message', 'message', 'status']
+    assert [event['seq'] for event in job.events] == sorted(event['seq'] for event in job.events)
+
+
+def test_cancel_before_first_step_finishes_job_and_keeps_worker():
+    async def scenario():
+        queue = await started_queue(make_runner(delay=0.01), workers=1)
+        job = queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant')
+        # Воркер создал задачу asyncio, но она еще не начала выполняться
+        while job._task is None:
+            await asyncio.sleep(0)
+        assert job.started_at is None
+        assert queue.cancel(job)
+
+        await finished(job)
+        # Единственный воркер жив и берет следующую задачу
+        next_job = await finished(queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant'))
+        await queue.stop()
+        return job, next_job, queue
+
+    job, next_job, queue = run(scenario())
+
+    assert job.status == 'cancelled'
+    assert job.events[-1] == {'type': 'status', 'status': 'cancelled', 'error': None, 'tokens': 0,
+                              'seq': job.events[-1]['seq']}
+    assert next_job.status == 'succeeded'
+    assert queue._active == {}
+
+
+def test_cancel_running_and_queued_jobs():
+    async def scenario():
+        queue = await started_queue(make_runner(messages=100, delay=0.01), workers=1)
+        running = queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant')
+        queued = queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant')
+        while running.status != 'running':
+            await asyncio.sleep(0.001)
+
+        assert queue.cancel(queued)
+        assert queue.cancel(running)
+        await finished(running)
+        assert not queue.cancel(running)
+        await queue.stop()
+        return running, queued
+
+    running, queued = run(scenario())
+
+    assert running.status == queued.status == 'cancelled'
+    assert queued.started_at is None
+
+
+def test_company_limit_and_queue_size():
+    async def scenario():
+        queue = await started_queue(make_runner(delay=1), workers=1, queue_size=2, company_max_active=2)
+        queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant')
+        queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant')
+        with pytest.raises(AgentQueueFull) as company_limit:
+            queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant')
+
+        # Первую задачу уже взял воркер, в очереди остается одно место
+        await asyncio.sleep(0.01)
+        queue.submit('company-2', PROJECT, 'user-2', 'Задача', 'assistant')
+        with pytest.raises(AgentQueueFull) as queue_full:
+            queue.submit('company-3', PROJECT, 'user-3', 'Задача', 'assistant')
+        await queue.stop()
+        return company_limit.value, queue_full.value
+
+    company_limit, queue_full = run(scenario())
+
+    assert company_limit.status == 429
+    assert queue_full.status == 503
+
+
+def test_budget_stops_job_and_rejects_new_ones():
+    async def scenario():
+        queue = await started_queue(make_runner(messages=10, tokens=40), workers=1, budget=TokenBudget(100, 60))
+        job = await finished(queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant'))
+        with pytest.raises(AgentQueueFull) as rejected:
+            queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant')
+        other = await finished(queue.submit('company-2', PROJECT, 'user-2', 'Задача', 'assistant'))
+        await queue.stop()
+        return job, rejected.value, other
+
+    job, rejected, other = run(scenario())
+
+    assert job.status == 'budget_exceeded'
+    assert job.tokens == 120
+    assert rejected.status == 429
+    assert other.status == 'budget_exceeded'
+
+
+def test_run_timeout():
+    async def scenario():
+        queue = await started_queue(make_runner(messages=100, delay=0.05), workers=1, run_timeout=0.1)
+        job = await finished(queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Задача', 'assistant'))
+        await queue.stop()
+        return job
+
+    assert run(scenario()).status == 'timed_out'
+
+
+class TestStubModelClient:
+    """Полный путь run_agent_job на локальной заглушке модели (AGENT_MODEL=stub)"""
+
+    @pytest.fixture(autouse=True)
+    def stub_model(self, monkeypatch):
+        pytest.importorskip('autogen_agentchat')
+        monkeypatch.setenv('AGENT_MODEL', 'stub')
+        monkeypatch.setenv('AGENT_MAX_TURNS', '3')
+        monkeypatch.setenv('AGENT_STUB_DELAY', '0')
+        monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+
+    def run_job(self, mode: str, **options):
+        from services.agent_run_service import run_agent_job
+
+        async def scenario():
+            queue = await started_queue(run_agent_job, workers=1, **options)
+            job = await finished(queue.submit(COMPANY_ID, PROJECT, 'user-1', 'Составь план', mode))
+            await queue.stop()
+            return job
+
+        return run(scenario())
+
+    def test_queue_is_created_without_api_key(self):
+        from services.agent_run_service import create_agent_queue
+
+        assert create_agent_queue() is not None
+
+    def test_assistant_mode(self):
+        job = self.run_job('assistant')
+
+        messages = [event for event in job.events if event['type'] == 'message']
+        assert job.status == 'succeeded'
+        assert [message['source'] for message in messages] == ['assistant']
+        assert messages[0]['content'].startswith('Ответ заглушки 1')
+        assert job.tokens == messages[0]['tokens'] > 0
+
+    def test_group_mode_takes_turns_until_terminate(self):
+        job = self.run_job('group')
+
+        messages = [event for event in job.events if event['type'] == 'message']
+        assert job.status == 'succeeded'
+        assert [message['source'] for message in messages] == ['analyst', 'coder', 'writer']
+        assert 'TERMINATE' in messages[-1]['content']
+        assert job.tokens == sum(message['tokens'] for message in messages)
+
+    def test_group_mode_stops_on_budget(self):
+        job = self.run_job('group', budget=TokenBudget(1, 60))
+
+        assert job.status == 'budget_exceeded'
+        assert len([event for event in job.events if event['type'] == 'message']) == 1
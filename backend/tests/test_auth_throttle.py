@@ -0,0 +1,34 @@
+import pytest
+
+from utils.rate_limit import AuthThrottle, RateLimited
+
+
+@pytest.mark.parametrize('route', ['/api/auth/login', '/api/auth/register'])
+@pytest.mark.parametrize('body', ['[1, 2]', '"user@example.com"', '42', 'null', '{broken'])
+def test_non_object_body_returns_json_400(client, route, body):
+    response = client.post(route, data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.is_json
+    assert response.get_json()['error']
+
+
+@pytest.mark.parametrize('email', [123, ['user@example.com'], {'a': 1}, True])
+def test_non_string_email_returns_json_400(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': 'secret'})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Email и пароль обязательны'
+
+
+def test_non_string_email_falls_back_to_ip_limit():
+    throttle = AuthThrottle(ip_rate=1, ip_burst=1, email_rate=1, email_burst=1, max_concurrency=1)
+
+    with throttle.admit('login', '10.0.0.1', 123):
+        pass
+    assert throttle.email_limiter.stats()['keys'] == 0
+
+    with pytest.raises(RateLimited) as error:
+        with throttle.admit('login', '10.0.0.1', 123):
+            pass
+    assert error.value.status == 429
@@ -0,0 +1,193 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import cache
+from utils.cache import LocalCacheBackend, RedisCacheBackend, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """Клиент Redis в памяти: get/set/delete/scan_iter, время жизни не отслеживается"""
+
+    def __init__(self):
+        self.items = {}
+        self.expiry = {}
+
+    @classmethod
+    def from_url(cls, url: str):
+        client = cls()
+        client.url = url
+        return client
+
+    def get(self, key: str):
+        return self.items.get(key)
+
+    def set(self, key: str, value: str, ex: int = None):
+        self.items[key] = value.encode('utf-8')
+        self.expiry[key] = ex
+
+    def delete(self, key: str):
+        self.items.pop(key, None)
+
+    def scan_iter(self, match: str):
+        prefix = match.rstrip('*')
+        return [key for key in list(self.items) if key.startswith(prefix)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Подменяем только часы модуля cache, а не time.monotonic всего процесса
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def ttl_cache(clock):
+    return TTLCache(LocalCacheBackend(maxsize=3), ttl=60)
+
+
+def test_value_expires_after_ttl(ttl_cache, clock):
+    ttl_cache.set('user', ['company'])
+
+    clock.now += 59.9
+    assert ttl_cache.get('user') == ['company']
+
+    clock.now += 0.1
+    assert ttl_cache.get('user') is None
+    assert ttl_cache.stats()['size'] == 0
+    assert (ttl_cache.hits, ttl_cache.misses) == (1, 1)
+
+
+def test_least_recently_used_key_is_evicted(ttl_cache):
+    for key in ('a', 'b', 'c'):
+        ttl_cache.set(key, key)
+    # Чтение делает 'a' самым свежим, поэтому вытесняется 'b'
+    ttl_cache.get('a')
+    ttl_cache.set('d', 'd')
+
+    assert ttl_cache.get('b') is None
+    assert [ttl_cache.get(key) for key in ('a', 'c', 'd')] == ['a', 'c', 'd']
+    assert ttl_cache.stats()['evictions'] == 1
+    assert ttl_cache.stats()['size'] == 3
+
+
+def test_overwrite_does_not_evict(ttl_cache):
+    for key in ('a', 'b', 'c', 'a'):
+        ttl_cache.set(key, key)
+
+    assert ttl_cache.stats()['evictions'] == 0
+    assert ttl_cache.stats()['size'] == 3
+
+
+def test_invalidate_removes_only_its_key(ttl_cache):
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+
+    ttl_cache.invalidate('a')
+    ttl_cache.invalidate('missing')
+
+    assert ttl_cache.get('a') is None
+    assert ttl_cache.get('b') == 2
+
+
+def test_get_or_load_calls_loader_once_until_expiry(ttl_cache, clock):
+    calls = []
+
+    def loader():
+        calls.append(clock.now)
+        return {'call': len(calls)}
+
+    assert ttl_cache.get_or_load('user', loader) == {'call': 1}
+    assert ttl_cache.get_or_load('user', loader) == {'call': 1}
+
+    clock.now += 60
+    assert ttl_cache.get_or_load('user', loader) == {'call': 2}
+    assert len(calls) == 2
+
+
+def test_get_or_load_caches_empty_results(ttl_cache):
+    # Пользователь без компаний - тоже ответ, повторный запрос в базу не нужен
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return []
+
+    ttl_cache.get_or_load('user', loader)
+    ttl_cache.get_or_load('user', loader)
+
+    assert len(calls) == 1
+
+
+def test_get_or_load_does_not_cache_errors(ttl_cache):
+    def failing_loader():
+        raise ConnectionError('база недоступна')
+
+    with pytest.raises(ConnectionError):
+        ttl_cache.get_or_load('user', failing_loader)
+
+    assert ttl_cache.get_or_load('user', lambda: ['company']) == ['company']
+
+
+def test_redis_backend_stores_json_under_prefix(monkeypatch):
+    monkeypatch.setattr(cache, 'redis', SimpleNamespace(Redis=FakeRedis))
+    backend = RedisCacheBackend('redis://cache:6379/0', prefix='user_companies:')
+    ttl_cache = TTLCache(backend, ttl=0.5)
+
+    ttl_cache.set('user', [{'company_id': 'c1'}])
+    backend.client.set('other:key', 'x')
+
+    assert backend.client.items['user_companies:user'] == b'[{"company_id": "c1"}]'
+    # Redis принимает целые секунды, срок жизни меньше секунды округляется вверх
+    assert backend.client.expiry['user_companies:user'] == 1
+    assert ttl_cache.get('user') == [{'company_id': 'c1'}]
+
+    ttl_cache.clear()
+    assert ttl_cache.get('user') is None
+    assert 'other:key' in backend.client.items
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(cache, '_user_companies_cache', None)
+    monkeypatch.delenv('CACHE_REDIS_URL', raising=False)
+
+
+def test_local_backend_without_redis_url(fresh_cache, monkeypatch):
+    monkeypatch.setenv('USER_COMPANIES_CACHE_SIZE', '5')
+    monkeypatch.setenv('USER_COMPANIES_CACHE_TTL', '30')
+
+    user_companies_cache = cache.get_user_companies_cache()
+
+    assert isinstance(user_companies_cache.backend, LocalCacheBackend)
+    assert user_companies_cache.backend.maxsize == 5
+    assert user_companies_cache.ttl == 30
+    assert cache.get_user_companies_cache() is user_companies_cache
+
+
+def test_redis_backend_with_redis_url(fresh_cache, monkeypatch):
+    monkeypatch.setattr(cache, 'redis', SimpleNamespace(Redis=FakeRedis))
+    monkeypatch.setenv('CACHE_REDIS_URL', 'redis://cache:6379/0')
+
+    backend = cache.get_user_companies_cache().backend
+
+    assert isinstance(backend, RedisCacheBackend)
+    assert backend.client.url == 'redis://cache:6379/0'
+    assert backend.prefix == 'user_companies:'
+
+
+def test_redis_url_without_redis_package_fails(fresh_cache, monkeypatch):
+    monkeypatch.setattr(cache, 'redis', None)
+    monkeypatch.setenv('CACHE_REDIS_URL', 'redis://cache:6379/0')
+
+    with pytest.raises(ValueError, match='redis'):
+        cache.get_user_companies_cache()
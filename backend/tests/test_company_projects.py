@@ -0,0 +1,208 @@
+import asyncio
+import importlib
+import json
+import uuid
+
+import pytest
+
+COMPANY_ID = str(uuid.uuid4())
+MEMBER_ID = str(uuid.uuid4())
+
+
+class AsyncMemoryRepository:
+    """Асинхронная обертка над MemoryRepository для маршрутов asgi.py"""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    async def get_company_version(self, company_id: str) -> int:
+        return self.repo.get_company_version(company_id)
+
+    async def list_company_projects(self, company_id: str, limit: int, after: tuple = None) -> list:
+        return self.repo.list_company_projects(company_id, limit, after)
+
+
+@pytest.fixture
+def asgi_app(monkeypatch, memory_repository):
+    # Модуль создает асинхронный репозиторий при импорте, ему нужны переменные Supabase
+    monkeypatch.setenv('SUPABASE_URL', 'http://localhost:54321')
+    monkeypatch.setenv('SUPABASE_SERVICE_ROLE_SECRET', 'test.service.key')
+    asgi = importlib.import_module('asgi')
+    monkeypatch.setattr(asgi, 'repository', AsyncMemoryRepository(memory_repository))
+    return asgi.application
+
+
+def asgi_get(application, path: str, query: str) -> tuple:
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode('ascii'),
+        'headers': [], 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1),
+        'root_path': '', 'http_version': '1.1'
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    status = next(message['status'] for message in messages if message['type'] == 'http.response.start')
+    body = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+    return status, json.loads(body) if body else None
+
+
+@pytest.mark.parametrize('company_id', ['not-a-uuid', "1' OR '1'='1", '123'])
+def test_malformed_company_id_is_rejected_by_both_apps(client, asgi_app, company_id):
+    response = client.get('/api/projects', query_string={'company_id': company_id})
+    status, body = asgi_get(asgi_app, '/api/projects', f'company_id={company_id}')
+
+    assert response.status_code == status == 400
+    assert response.get_json()['error'] == body['error'] == 'Некорректный ID компании'
+
+
+def test_both_apps_return_the_same_page(client, asgi_app, memory_repository):
+    for day in range(1, 4):
+        memory_repository.add_project(COMPANY_ID, str(uuid.uuid4()), f'2024-05-0{day}T00:00:00+00:00')
+
+    response = client.get('/api/projects', query_string={'company_id': COMPANY_ID, 'limit': 2})
+    status, body = asgi_get(asgi_app, '/api/projects', f'company_id={COMPANY_ID}&limit=2')
+
+    assert response.status_code == status == 200
+    assert response.get_json()['data'] == body['data']
+    assert response.get_json()['next_cursor'] == body['next_cursor']
+
+
+@pytest.fixture
+def batch_company(memory_repository):
+    memory_repository.companies[MEMBER_ID] = [{'company_id': COMPANY_ID, 'company_name': 'Компания', 'user_role': 'member'}]
+    return memory_repository
+
+
+def post_batch(client, operations, user_id: str = MEMBER_ID, company_id: str = COMPANY_ID):
+    return client.post('/api/projects/batch', json={'company_id': company_id, 'operations': operations},
+                       headers={'X-User-ID': user_id})
+
+
+def test_batch_reports_validation_errors_per_operation(client, batch_company):
+    existing = str(uuid.uuid4())
+    batch_company.add_project(COMPANY_ID, existing, '2024-05-01T00:00:00+00:00')
+
+    response = post_batch(client, [
+        {'op': 'create', 'name': 'Новый'},
+        {'op': 'rename', 'id': existing},
+        {'op': 'create'},
+        {'op': 'update', 'id': 'not-a-uuid', 'name': 'X'},
+        {'op': 'update', 'id': existing},
+        {'op': 'create', 'name': 'x' * 256},
+        {'op': 'create', 'name': 42},
+        'delete',
+        {'op': 'update', 'id': existing, 'name': 'Переименован'},
+        {'op': 'delete', 'id': existing},
+    ])
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert [(item['index'], item['success'], item.get('error')) for item in data['results']] == [
+        (0, True, None),
+        (1, False, 'Неизвестная операция: rename'),
+        (2, False, 'Поле name обязательно'),
+        (3, False, 'Поле id должно быть UUID проекта'),
+        (4, False, 'Нужно указать name или description'),
+        (5, False, 'Поле name длиннее 255 символов'),
+        (6, False, 'Поле name должно быть строкой'),
+        (7, False, 'Операция должна быть объектом'),
+        (8, True, None),
+        (9, False, 'Проект уже указан в другой операции пакета'),
+    ]
+    assert [item.get('op') for item in data['results']] == [
+        'create', 'rename', 'create', 'update', 'update', 'create', 'create', None, 'update', 'delete'
+    ]
+    assert (data['succeeded'], data['failed']) == (2, 8)
+    # Неверные операции в базу не отправляются
+    assert len(batch_company.batch_calls) == 1
+    creates, updates, deletes = batch_company.batch_calls[0]
+    assert ([item['idx'] for item in creates], [item['idx'] for item in updates], deletes) == ([0], [8], [])
+
+
+def test_batch_maps_results_back_to_operations(client, batch_company):
+    to_update, to_delete, foreign = (str(uuid.uuid4()) for _ in range(3))
+    batch_company.add_project(COMPANY_ID, to_update, '2024-05-01T00:00:00+00:00', name='Старое')
+    batch_company.add_project(COMPANY_ID, to_delete, '2024-05-02T00:00:00+00:00')
+    batch_company.add_project(str(uuid.uuid4()), foreign, '2024-05-03T00:00:00+00:00')
+
+    results = post_batch(client, [
+        {'op': 'delete', 'id': to_delete},
+        {'op': 'update', 'id': to_update, 'name': 'Новое'},
+        {'op': 'create', 'name': 'Создан', 'description': 'Описание'},
+        {'op': 'delete', 'id': foreign},
+    ]).get_json()['data']['results']
+
+    assert results[0] == {'index': 0, 'op': 'delete', 'success': True, 'data': {'id': to_delete}}
+    assert (results[1]['success'], results[1]['data']['id'], results[1]['data']['name']) == (True, to_update, 'Новое')
+    assert (results[2]['success'], results[2]['data']['name'], results[2]['data']['description']) == \
+        (True, 'Создан', 'Описание')
+    # Проект другой компании база не трогает
+    assert results[3] == {'index': 3, 'op': 'delete', 'success': False, 'error': 'Проект не найден'}
+
+
+def test_batch_is_sent_in_chunks(client, batch_company, monkeypatch):
+    monkeypatch.setenv('PROJECT_BATCH_CHUNK_SIZE', '2')
+
+    data = post_batch(client, [{'op': 'create', 'name': f'Проект {n}'} for n in range(5)]).get_json()['data']
+
+    assert [len(creates) for creates, _, _ in batch_company.batch_calls] == [2, 2, 1]
+    assert [item['index'] for item in data['results']] == [0, 1, 2, 3, 4]
+    assert [item['data']['name'] for item in data['results']] == [f'Проект {n}' for n in range(5)]
+
+
+def test_failed_chunk_fails_only_its_operations(client, batch_company, monkeypatch):
+    monkeypatch.setenv('PROJECT_BATCH_CHUNK_SIZE', '2')
+    apply_project_batch = batch_company.apply_project_batch
+
+    def fail_second_chunk(*args):
+        if len(batch_company.batch_calls) == 1:
+            batch_company.batch_calls.append(args[2:])
+            raise ConnectionError('соединение разорвано')
+        return apply_project_batch(*args)
+
+    monkeypatch.setattr(batch_company, 'apply_project_batch', fail_second_chunk)
+
+    data = post_batch(client, [{'op': 'create', 'name': f'Проект {n}'} for n in range(5)]).get_json()['data']
+
+    assert [item['success'] for item in data['results']] == [True, True, False, False, True]
+    assert data['results'][2]['error'] == 'соединение разорвано'
+    assert (data['succeeded'], data['failed']) == (3, 2)
+
+
+def test_batch_of_non_member_fails_every_operation(client, batch_company):
+    data = post_batch(client, [{'op': 'create', 'name': 'Проект'}], user_id=str(uuid.uuid4())).get_json()['data']
+
+    assert data['results'] == [{'index': 0, 'op': 'create', 'success': False,
+                                'error': 'Пользователь не является участником компании'}]
+
+
+@pytest.mark.parametrize('operations, error', [
+    ([], 'Поле operations должно быть непустым массивом'),
+    ({'op': 'create', 'name': 'Проект'}, 'Поле operations должно быть непустым массивом'),
+    ([{'op': 'create', 'name': 'Проект'}] * 1001, 'Не более 1000 операций за запрос'),
+])
+def test_batch_shape_and_size_are_checked(client, batch_company, operations, error):
+    response = post_batch(client, operations)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+    assert batch_company.batch_calls == []
+
+
+def test_batch_of_max_size_is_accepted(client, batch_company):
+    response = post_batch(client, [{'op': 'create', 'name': f'Проект {n}'} for n in range(1000)])
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['succeeded'] == 1000
+
+
+def test_batch_requires_user(client, batch_company):
+    response = client.post('/api/projects/batch', json={'company_id': COMPANY_ID, 'operations': [{'op': 'create'}]})
+
+    assert response.status_code == 401
@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+
+from utils.http_cache import encoded_etag, etag_matches, make_etag
+
+COMPANY_ID = str(uuid.uuid4())
+USER_ID = str(uuid.uuid4())
+
+
+@pytest.fixture
+def projects(memory_repository):
+    for day in range(1, 8):
+        memory_repository.add_project(COMPANY_ID, str(uuid.uuid4()), f'2024-05-0{day}T00:00:00+00:00',
+                                      name='Проект с длинным названием для сжатия ответа ' * 5)
+    memory_repository.versions[COMPANY_ID] = 1
+    return memory_repository
+
+
+def test_etag_matches_header_forms():
+    etag = make_etag('projects', COMPANY_ID, 1, 50, None)
+
+    assert etag == make_etag('projects', COMPANY_ID, 1, 50, None)
+    assert etag != make_etag('projects', COMPANY_ID, 2, 50, None)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches(encoded_etag(etag, 'gzip'), etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_projects_304_on_matching_if_none_match(client, projects):
+    query = {'company_id': COMPANY_ID, 'limit': 5}
+    first = client.get('/api/projects', query_string=query)
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    response = client.get('/api/projects', query_string=query, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_projects_304_for_compressed_representation(client, projects):
+    query = {'company_id': COMPANY_ID}
+    first = client.get('/api/projects', query_string=query, headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].endswith('-gzip"')
+
+    response = client.get('/api/projects', query_string=query,
+                          headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+
+    assert response.status_code == 304
+
+
+def test_projects_etag_changes_with_version_and_page(client, projects):
+    query = {'company_id': COMPANY_ID, 'limit': 5}
+    first = client.get('/api/projects', query_string=query)
+    etag = first.headers['ETag']
+
+    second_page = client.get('/api/projects', query_string=dict(query, cursor=first.get_json()['next_cursor']),
+                             headers={'If-None-Match': etag})
+    assert second_page.status_code == 200
+    assert second_page.headers['ETag'] != etag
+
+    projects.versions[COMPANY_ID] += 1
+    response = client.get('/api/projects', query_string=query, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_projects_without_version_have_no_etag(client, memory_repository):
+    response = client.get('/api/projects', query_string={'company_id': COMPANY_ID},
+                          headers={'If-None-Match': '*'})
+
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+def test_companies_304_per_user(client, memory_repository):
+    memory_repository.companies[USER_ID] = [{'company_id': COMPANY_ID, 'name': 'Компания', 'role': 'owner'}]
+    first = client.get('/api/companies', headers={'X-User-ID': USER_ID})
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert 'X-User-ID' in first.headers['Vary']
+
+    response = client.get('/api/companies', headers={'X-User-ID': USER_ID, 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    other_user = client.get('/api/companies', headers={'X-User-ID': str(uuid.uuid4()), 'If-None-Match': etag})
+    assert other_user.status_code == 200
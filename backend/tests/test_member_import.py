@@ -0,0 +1,100 @@
+import io
+import time
+import uuid
+
+import pytest
+
+from services.member_import_service import MemberImportService
+
+COMPANY_ID = str(uuid.uuid4())
+USER_ID = str(uuid.uuid4())
+
+HEADER = b'email,password,first_name,last_name,role\n'
+
+
+class PlainHasher:
+    """Хеширование без пула процессов: тестам важен путь импорта, а не bcrypt"""
+
+    def hash_many(self, passwords: list) -> list:
+        return [f'hash:{password}' for password in passwords]
+
+
+@pytest.fixture
+def make_service(memory_repository):
+    services = []
+
+    def make():
+        service = MemberImportService()
+        service.password_hasher = PlainHasher()
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.executor.shutdown(wait=True)
+
+
+def wait_finished(service, job_id: str) -> dict:
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = service.get_job(job_id)
+        if job['finished_at']:
+            return job
+        time.sleep(0.01)
+    raise AssertionError('Импорт не завершился')
+
+
+def test_progress_is_visible_from_another_worker(make_service, memory_repository):
+    # Два экземпляра сервиса - два воркера gunicorn с общей базой
+    upload_worker, poll_worker = make_service(), make_service()
+    data = HEADER + b''.join(f'user{n}@example.com,secret,Имя,Фамилия,member\n'.encode() for n in range(5))
+
+    job = upload_worker.start_import(COMPANY_ID, io.BytesIO(data), 'csv', USER_ID)
+    assert poll_worker.get_job(job['id'])['status'] in ('pending', 'running', 'done')
+
+    wait_finished(upload_worker, job['id'])
+    polled = poll_worker.get_job(job['id'])
+
+    assert polled['status'] == 'done'
+    assert polled['imported'] == 5
+    assert polled['requested_by'] == USER_ID
+    assert poll_worker.get_job('not-a-uuid') is None
+    assert poll_worker.get_job(str(uuid.uuid4())) is None
+
+
+def test_bad_rows_are_reported_without_aborting(make_service):
+    service = make_service()
+    data = (HEADER
+            + b'a@example.com,secret,A,B,member\n'
+            + b'\xff\xfe@example.com,secret,C,D,member\n'
+            + b'x' * 200000 + b',secret,E,F,member\n'
+            + b'b@example.com,secret,G,H,owner\n'
+            + b'c@example.com,secret,I,J,\n')
+
+    job = service.start_import(COMPANY_ID, io.BytesIO(data), 'csv', USER_ID)
+    job = wait_finished(service, job['id'])
+
+    assert job['status'] == 'done'
+    assert job['imported'] == 2
+    assert [error['line'] for error in job['errors']] == [3, 4, 5]
+    assert 'UTF-8' in job['errors'][0]['error']
+    assert 'CSV' in job['errors'][1]['error']
+
+
+def test_emails_are_matched_as_registration_matches_them(make_service, memory_repository):
+    memory_repository.user_emails.add('Alice@example.com')
+    service = make_service()
+    data = HEADER + (
+        'Alice@example.com,secret,Алиса,Иванова,member\n'
+        ' bob@example.com ,secret,Боб,Петров,member\n'
+        'Bob@example.com,secret,Боб,Петров,member\n'
+        'bob@example.com,secret,Боб,Петров,member\n'
+    ).encode()
+
+    job = wait_finished(service, service.start_import(COMPANY_ID, io.BytesIO(data), 'csv', USER_ID)['id'])
+
+    # Email хранится без изменения регистра: существующая запись Alice@example.com
+    # пропускается, а не дублируется под alice@example.com
+    assert (job['imported'], job['skipped'], job['failed']) == (2, 1, 1)
+    assert job['errors'] == [{'line': 5, 'error': 'Email повторяется в файле'}]
+    assert memory_repository.user_emails == {'Alice@example.com', 'bob@example.com', 'Bob@example.com'}
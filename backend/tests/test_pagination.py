@@ -0,0 +1,106 @@
+import base64
+import json
+import uuid
+
+import pytest
+
+from utils.pagination import (
+    decode_cursor,
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+    paginate,
+)
+
+COMPANY_ID = str(uuid.uuid4())
+
+
+def raw_cursor(value) -> str:
+    raw = json.dumps(value).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def test_cursor_round_trip():
+    created_at = '2024-05-01T10:00:00.123456+00:00'
+    project_id = str(uuid.uuid4())
+
+    cursor = encode_cursor(created_at, project_id)
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (created_at, project_id)
+
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    'not-base64!',
+    raw_cursor(['2024-05-01T10:00:00+00:00']),
+    raw_cursor({'created_at': '2024-05-01T10:00:00+00:00', 'id': str(uuid.uuid4())}),
+    raw_cursor(['2024-05-01T10:00:00+00:00', 42]),
+    raw_cursor(['вчера', str(uuid.uuid4())]),
+    raw_cursor(['2024-05-01T10:00:00+00:00', 'not-a-uuid']),
+    # Попытка дописать условие в фильтр PostgREST
+    raw_cursor(['2024-05-01T10:00:00+00:00",id.gt.0', str(uuid.uuid4())]),
+    raw_cursor(['2024-05-01T10:00:00+00:00', str(uuid.uuid4()) + ')']),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_truncated_cursor_is_rejected():
+    cursor = encode_cursor('2024-05-01T10:00:00+00:00', str(uuid.uuid4()))
+
+    with pytest.raises(ValueError):
+        decode_cursor(cursor[:-5])
+
+
+def test_paginate_returns_cursor_of_last_row_only_when_more_rows_exist():
+    rows = [{'id': str(uuid.uuid4()), 'created_at': f'2024-05-0{day}T00:00:00+00:00'} for day in (3, 2, 1)]
+
+    page, cursor = paginate(rows, 2)
+    assert page == rows[:2]
+    assert decode_cursor(cursor) == (rows[1]['created_at'], rows[1]['id'])
+
+    assert paginate(rows, 3) == (rows, None)
+
+
+@pytest.mark.parametrize('cursor', [raw_cursor({'offset': -1}), raw_cursor({'offset': '10'}), raw_cursor([10])])
+def test_offset_cursor(cursor):
+    assert decode_offset_cursor(encode_offset_cursor(150)) == 150
+    with pytest.raises(ValueError):
+        decode_offset_cursor(cursor)
+
+
+def test_projects_pages_cover_every_project_once(client, memory_repository):
+    # Одинаковое время создания у соседних проектов: порядок решает id
+    for index in range(7):
+        memory_repository.add_project(COMPANY_ID, str(uuid.uuid4()), f'2024-05-0{1 + index // 2}T00:00:00+00:00')
+
+    seen = []
+    cursor = None
+    while True:
+        query = {'company_id': COMPANY_ID, 'limit': 3}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/api/projects', query_string=query)
+        assert response.status_code == 200
+
+        body = response.get_json()
+        assert len(body['data']) <= 3
+        seen += [project['id'] for project in body['data']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    expected = memory_repository.list_company_projects(COMPANY_ID, 100)
+    assert seen == [project['id'] for project in expected]
+
+
+def test_projects_tampered_cursor_returns_400(client, memory_repository):
+    memory_repository.add_project(COMPANY_ID, str(uuid.uuid4()), '2024-05-01T00:00:00+00:00')
+
+    cursor = raw_cursor(['2024-05-01T00:00:00+00:00",id.gt.0', str(uuid.uuid4())])
+    response = client.get('/api/projects', query_string={'company_id': COMPANY_ID, 'cursor': cursor})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Некорректный курсор'
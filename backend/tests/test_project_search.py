@@ -0,0 +1,92 @@
+import uuid
+
+import pytest
+
+COMPANY_ID = str(uuid.uuid4())
+OTHER_COMPANY_ID = str(uuid.uuid4())
+MEMBER_ID = str(uuid.uuid4())
+
+
+@pytest.fixture
+def company(memory_repository):
+    memory_repository.companies[MEMBER_ID] = [{'company_id': COMPANY_ID, 'company_name': 'Компания', 'user_role': 'member'}]
+    return memory_repository
+
+
+def search(client, query: str, company_id: str = COMPANY_ID, user_id: str = MEMBER_ID, **params):
+    headers = {'X-User-ID': user_id} if user_id else {}
+    return client.get('/api/projects/search', query_string=dict(company_id=company_id, q=query, **params),
+                      headers=headers)
+
+
+def test_anonymous_request_is_rejected(client, company):
+    assert search(client, 'проект', user_id=None).status_code == 401
+
+
+def test_malformed_company_id_is_rejected(client, company):
+    response = search(client, 'проект', company_id='not-a-uuid')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Некорректный ID компании'}
+
+
+def test_outsider_is_forbidden(client, company):
+    company.add_project(COMPANY_ID, str(uuid.uuid4()), '2024-05-01T00:00:00+00:00', name='Отчет')
+
+    response = search(client, 'отчет', user_id=str(uuid.uuid4()))
+
+    assert response.status_code == 403
+    assert 'data' not in response.get_json()
+
+
+def test_member_cannot_search_another_company(client, company):
+    assert search(client, 'отчет', company_id=OTHER_COMPANY_ID).status_code == 403
+
+
+def test_empty_query_is_rejected(client, company):
+    assert search(client, '   ').status_code == 400
+
+
+def test_results_are_ranked_by_relevance(client, company):
+    in_description = str(uuid.uuid4())
+    in_name = str(uuid.uuid4())
+    in_name_newer = str(uuid.uuid4())
+    company.add_project(COMPANY_ID, in_description, '2024-05-03T00:00:00+00:00', name='Склад',
+                        description='Годовой отчет')
+    company.add_project(COMPANY_ID, in_name, '2024-05-01T00:00:00+00:00', name='Отчет')
+    company.add_project(COMPANY_ID, in_name_newer, '2024-05-02T00:00:00+00:00', name='Отчет за май')
+    company.add_project(COMPANY_ID, str(uuid.uuid4()), '2024-05-04T00:00:00+00:00', name='Склад')
+    company.add_project(OTHER_COMPANY_ID, str(uuid.uuid4()), '2024-05-05T00:00:00+00:00', name='Отчет')
+
+    response = search(client, 'отчет')
+
+    assert response.status_code == 200
+    # Совпадение в названии выше совпадения в описании, при равной релевантности - новые раньше
+    assert [project['id'] for project in response.get_json()['data']] == [in_name_newer, in_name, in_description]
+    assert response.get_json()['next_cursor'] is None
+
+
+def test_offset_cursor_pages_through_all_results(client, company):
+    expected = [str(uuid.UUID(int=n)) for n in range(7, 0, -1)]
+    for n in range(1, 8):
+        company.add_project(COMPANY_ID, str(uuid.UUID(int=n)), f'2024-05-0{n}T00:00:00+00:00', name=f'Отчет {n}')
+
+    seen = []
+    cursor = None
+    while True:
+        params = {'limit': 3, 'cursor': cursor} if cursor else {'limit': 3}
+        page = search(client, 'отчет', **params).get_json()
+        assert len(page['data']) <= 3
+        seen += [project['id'] for project in page['data']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_tampered_cursor_is_rejected(client, company):
+    response = search(client, 'отчет', cursor='eyJvZmZzZXQiOi0xfQ')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Некорректный курсор'}
@@ -0,0 +1,40 @@
+import uuid
+
+import pytest
+
+COMPANY_ID = str(uuid.uuid4())
+MEMBER_ID = str(uuid.uuid4())
+PROJECT_ID = str(uuid.uuid4())
+
+
+@pytest.fixture
+def company(memory_repository):
+    memory_repository.companies[MEMBER_ID] = [{'company_id': COMPANY_ID, 'company_name': 'Компания', 'user_role': 'member'}]
+    memory_repository.add_project(COMPANY_ID, PROJECT_ID, '2024-05-01T00:00:00+00:00')
+    return memory_repository
+
+
+def get_members(client, headers: dict = None):
+    return client.get('/api/projects/members', query_string={'company_id': COMPANY_ID, 'ids': PROJECT_ID},
+                      headers=headers or {})
+
+
+def test_anonymous_request_is_rejected(client, company):
+    response = get_members(client)
+
+    assert response.status_code == 401
+    assert 'data' not in response.get_json()
+
+
+def test_outsider_is_forbidden(client, company):
+    response = get_members(client, {'X-User-ID': str(uuid.uuid4())})
+
+    assert response.status_code == 403
+    assert 'data' not in response.get_json()
+
+
+def test_company_member_gets_members(client, company):
+    response = get_members(client, {'X-User-ID': MEMBER_ID})
+
+    assert response.status_code == 200
+    assert response.get_json()['data'] == {PROJECT_ID: {'count': 0, 'members': []}}
@@ -0,0 +1,37 @@
+import os
+import uuid
+
+import pytest
+
+psycopg = pytest.importorskip('psycopg')
+pytest.importorskip('psycopg_pool')
+
+from benchmarks.query_plan_benchmark import CASES, apply_migrations, check_plan, make_params, seed  # noqa: E402
+
+# Планы проверяются на данных бенчмарка во временной схеме локального Postgres
+# (заполнение занимает десятки секунд); задержки здесь не сравниваются -
+# их бюджеты зависят от машины и проверяются самим бенчмарком
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason='TEST_DATABASE_URL не задан')
+
+
+@pytest.fixture(scope='module')
+def seeded_database():
+    schema = f'query_plan_test_{uuid.uuid4().hex[:12]}'
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as connection:
+        connection.execute(f'CREATE SCHEMA {schema}')
+        connection.execute(f'SET search_path TO {schema}, public')
+        try:
+            apply_migrations(connection)
+            yield connection, seed(connection, 1)
+        finally:
+            connection.execute(f'DROP SCHEMA {schema} CASCADE')
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_service_query_uses_its_index(seeded_database, name):
+    connection, data = seeded_database
+    _, explain_query, kind, index, table, _ = CASES[name]
+
+    assert check_plan(connection, explain_query, make_params(kind, data, 'medium'), index, table) == []
@@ -0,0 +1,169 @@
+import atexit
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from models.repository import get_repository
+from utils.metrics import activity_buffer_size, activity_events
+
+
+class ActivityLog:
+    """Журнал действий с отложенной записью (write-behind).
+
+    record() только кладет событие в буфер и не обращается к базе. Фоновый
+    поток отправляет события пачками по batch_size: когда их накопилось
+    столько или прошло flush_interval секунд с прошлой записи. Буфер ограничен
+    max_buffer событиями: при переполнении новое событие отбрасывается и
+    учитывается в dropped, запрос при этом не ждет. Пачка, которую не удалось
+    записать, возвращается в начало буфера (сколько поместится), следующая
+    попытка - с удвоенной паузой до max_retry_delay. Журнал в пределах
+    процесса; при остановке процесса буфер дописывается.
+    """
+
+    def __init__(self, writer, max_buffer: int = None, batch_size: int = None,
+                 flush_interval: float = None, max_retry_delay: float = 60.0):
+        self.writer = writer
+        self.max_buffer = max_buffer or int(os.getenv('ACTIVITY_LOG_BUFFER', 10000))
+        self.batch_size = batch_size or int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 500))
+        self.flush_interval = flush_interval or float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', 1.0))
+        self.max_retry_delay = max_retry_delay
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed_flushes = 0
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._retry_delay = None
+        self._thread = None
+        self._closed = False
+
+    def record(self, company_id: str, action: str, actor_id: str = None, target_type: str = None,
+               target_id: str = None, details: dict = None) -> bool:
+        """Событие в буфер; False, если буфер переполнен и событие отброшено"""
+        event = {
+            'id': str(uuid.uuid4()),
+            'company_id': company_id,
+            'actor_id': actor_id,
+            'action': action,
+            'target_type': target_type,
+            'target_id': target_id,
+            'details': details or {},
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }
+
+        with self._lock:
+            if self._closed or len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                activity_events.labels('dropped').inc()
+                return False
+
+            self._buffer.append(event)
+            self.recorded += 1
+            # Пока запись повторяется после ошибки, поток ждет свою паузу
+            wake = len(self._buffer) >= self.batch_size and self._retry_delay is None
+            if self._thread is None:
+                # Поток создается при первом событии - уже в процессе воркера, после fork
+                self._thread = threading.Thread(target=self._run, name='activity-log', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+        activity_events.labels('recorded').inc()
+        activity_buffer_size.inc()
+        if wake:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """Запись накопленных событий пачками; возвращает число отправленных"""
+        total = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    count = min(self.batch_size, len(self._buffer))
+                    batch = [self._buffer.popleft() for _ in range(count)]
+                    if not batch:
+                        self._retry_delay = None
+                        return total
+
+                try:
+                    self.writer(batch)
+                except Exception as e:
+                    print(f"Ошибка записи журнала действий: {e}")
+                    self._requeue(batch)
+                    return total
+
+                total += len(batch)
+                with self._lock:
+                    self.written += len(batch)
+                activity_events.labels('written').inc(len(batch))
+                activity_buffer_size.dec(len(batch))
+
+    def _requeue(self, batch: list):
+        """Возврат пачки в начало буфера; не поместившиеся события теряются"""
+        with self._lock:
+            self.failed_flushes += 1
+            keep = batch[:max(0, self.max_buffer - len(self._buffer))]
+            self._buffer.extendleft(reversed(keep))
+            lost = len(batch) - len(keep)
+            self.dropped += lost
+            self._retry_delay = min(self.max_retry_delay, (self._retry_delay or self.flush_interval) * 2)
+
+        if lost:
+            activity_events.labels('dropped').inc(lost)
+            activity_buffer_size.dec(lost)
+
+    def _run(self):
+        while not self._closed:
+            with self._lock:
+                timeout = self._retry_delay or self.flush_interval
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if not self._closed:
+                self.flush()
+
+    def close(self):
+        """Остановка фонового потока и запись остатка буфера"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'buffered': len(self._buffer),
+                'max_buffer': self.max_buffer,
+                'recorded': self.recorded,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed_flushes': self.failed_flushes,
+                'retrying': self._retry_delay is not None
+            }
+
+
+def write_activity_events(events: list):
+    get_repository().insert_activity_events(events)
+
+
+_activity_log = None
+_activity_log_lock = threading.Lock()
+
+
+def get_activity_log() -> ActivityLog:
+    """Общий для процесса журнал действий (поток записи стартует с первым событием)"""
+    global _activity_log
+
+    with _activity_log_lock:
+        if _activity_log is None:
+            _activity_log = ActivityLog(write_activity_events)
+
+    return _activity_log
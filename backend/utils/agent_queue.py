@@ -0,0 +1,327 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import aclosing
+
+from utils.metrics import agent_jobs, agent_runs, agent_tokens
+
+# Итоговые статусы задачи; queued и running - промежуточные
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled', 'budget_exceeded', 'timed_out')
+
+
+class AgentQueueFull(Exception):
+    """Задача не принята: очередь процесса или лимит компании заполнены"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class BudgetExceeded(Exception):
+    """Компания израсходовала бюджет токенов текущего окна"""
+
+
+class TokenBudget:
+    """Бюджет токенов по компании на окно фиксированной длины.
+
+    Списание идет по факту (usage ответа модели), поэтому параллельные задачи
+    одной компании могут превысить бюджет не больше чем на один ответ каждая.
+    Нулевой бюджет отключает ограничение. Счетчики живут в пределах процесса.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._usage = {}
+
+    def _current(self, company_id: str) -> list:
+        now = time.monotonic()
+        usage = self._usage.get(company_id)
+        if usage is None or now - usage[0] >= self.window:
+            usage = self._usage[company_id] = [now, 0]
+        return usage
+
+    def charge(self, company_id: str, tokens: int):
+        self._current(company_id)[1] += tokens
+
+    def remaining(self, company_id: str) -> int:
+        """Остаток токенов; None, если бюджет не ограничен"""
+        if not self.limit:
+            return None
+        return max(0, self.limit - self._current(company_id)[1])
+
+    def exhausted(self, company_id: str) -> bool:
+        return self.limit > 0 and self.remaining(company_id) == 0
+
+    def stats(self, company_id: str) -> dict:
+        started, used = self._current(company_id)
+        return {
+            'limit': self.limit or None,
+            'used': used,
+            'remaining': self.remaining(company_id),
+            'resets_in': round(max(0.0, self.window - (time.monotonic() - started)))
+        }
+
+
+class AgentJob:
+    """Задача агентов по проекту и журнал ее событий.
+
+    События нумеруются (seq), поэтому клиент потока может продолжить с места
+    обрыва. Фрагменты ответа (chunk) заменяются итоговым сообщением, а сверх
+    max_events не сохраняются: журнал ограничен числом сообщений, а не
+    длиной ответов.
+    """
+
+    def __init__(self, company_id: str, project: dict, user_id: str, task: str, mode: str,
+                 max_events: int):
+        self.id = str(uuid.uuid4())
+        self.company_id = company_id
+        self.project = project
+        self.user_id = user_id
+        self.task = task
+        self.mode = mode
+        self.status = 'queued'
+        self.error = None
+        self.tokens = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.max_events = max_events
+        self._seq = 0
+        self._task = None
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def emit(self, event: dict):
+        if event['type'] == 'chunk':
+            if len(self.events) >= self.max_events:
+                return
+        else:
+            while self.events and self.events[-1]['type'] == 'chunk':
+                self.events.pop()
+
+        self._seq += 1
+        self.events.append(dict(event, seq=self._seq))
+        # Каждому изменению - новое событие: ожидающий, который взял прежнее,
+        # но еще не начал ждать (wait_for запускает ожидание отдельной задачей),
+        # все равно увидит его установленным
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def events_after(self, seq: int) -> list:
+        index = len(self.events)
+        while index > 0 and self.events[index - 1]['seq'] > seq:
+            index -= 1
+        return self.events[index:]
+
+    async def wait(self, seq: int, timeout: float) -> list:
+        """События после seq; пустой список по таймауту или после завершения"""
+        events = self.events_after(seq)
+        if not events and not self.done:
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            events = self.events_after(seq)
+        return events
+
+    def finish(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        agent_runs.labels(status).inc()
+        self.emit({'type': 'status', 'status': status, 'error': error, 'tokens': self.tokens})
+
+    def to_dict(self, with_events: bool = False) -> dict:
+        result = {
+            'id': self.id,
+            'project_id': self.project['id'],
+            'company_id': self.company_id,
+            'created_by': self.user_id,
+            'task': self.task,
+            'mode': self.mode,
+            'status': self.status,
+            'error': self.error,
+            'tokens': self.tokens,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if with_events:
+            result['events'] = [event for event in self.events if event['type'] != 'chunk']
+        return result
+
+
+class AgentJobQueue:
+    """Очередь задач агентов и пул воркеров asyncio в процессе ASGI-сервера.
+
+    runner(job) - асинхронный генератор событий задачи: {'type': 'message',
+    'source', 'content', 'tokens'} или {'type': 'chunk', 'source', 'content'}.
+    Одновременно выполняется не больше workers задач, в очереди ждет не
+    больше queue_size, у компании не больше company_max_active незавершенных.
+    Токены сообщений списываются с бюджета компании; когда он исчерпан,
+    задача останавливается со статусом budget_exceeded.
+
+    Задачи хранятся в памяти процесса: после перезапуска они теряются, а
+    завершенные вытесняются, когда их больше max_finished.
+    """
+
+    def __init__(self, runner, workers: int = None, queue_size: int = None,
+                 company_max_active: int = None, budget: TokenBudget = None,
+                 run_timeout: float = None, max_events: int = None, max_finished: int = None):
+        self.runner = runner
+        self.workers = workers or int(os.getenv('AGENT_WORKERS', 2))
+        self.queue_size = queue_size or int(os.getenv('AGENT_QUEUE_SIZE', 100))
+        self.company_max_active = company_max_active or int(os.getenv('AGENT_COMPANY_MAX_ACTIVE', 5))
+        self.budget = budget or TokenBudget(
+            int(os.getenv('AGENT_COMPANY_TOKEN_BUDGET', 200000)),
+            float(os.getenv('AGENT_BUDGET_WINDOW', 86400))
+        )
+        self.run_timeout = run_timeout or float(os.getenv('AGENT_RUN_TIMEOUT', 300))
+        self.max_events = max_events or int(os.getenv('AGENT_MAX_EVENTS', 500))
+        self.max_finished = max_finished or int(os.getenv('AGENT_MAX_FINISHED', 1000))
+        self.jobs = OrderedDict()
+        self._active = {}
+        self._queue = None
+        self._workers = []
+        self._stopping = False
+
+    def submit(self, company_id: str, project: dict, user_id: str, task: str, mode: str) -> AgentJob:
+        if self._queue is None:
+            raise AgentQueueFull('Очередь задач агентов не запущена', 503)
+        if self.budget.exhausted(company_id):
+            raise AgentQueueFull('Бюджет токенов компании исчерпан', 429)
+        if self._active.get(company_id, 0) >= self.company_max_active:
+            raise AgentQueueFull('Слишком много незавершенных задач компании', 429)
+
+        job = AgentJob(company_id, project, user_id, task, mode, self.max_events)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise AgentQueueFull('Очередь задач агентов переполнена, повторите позже', 503)
+
+        self.jobs[job.id] = job
+        self._active[company_id] = self._active.get(company_id, 0) + 1
+        agent_jobs.labels('queued').inc()
+        self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> AgentJob:
+        return self.jobs.get(job_id)
+
+    def list_project_jobs(self, project_id: str) -> list:
+        return [job for job in reversed(self.jobs.values()) if job.project['id'] == project_id]
+
+    def cancel(self, job: AgentJob) -> bool:
+        """Отмена задачи; False, если она уже завершена"""
+        if job.done:
+            return False
+        if job._task is not None:
+            job._task.cancel()
+        else:
+            # Еще в очереди: воркер пропустит завершенную задачу
+            agent_jobs.labels('queued').dec()
+            self._release(job)
+            job.finish('cancelled')
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'running': sum(job.status == 'running' for job in self.jobs.values()),
+            'jobs': len(self.jobs)
+        }
+
+    async def start(self):
+        if self._queue is None:
+            self._stopping = False
+            self._queue = asyncio.Queue(self.queue_size)
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        self._stopping = True
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def _release(self, job: AgentJob):
+        active = self._active.get(job.company_id, 0) - 1
+        if active > 0:
+            self._active[job.company_id] = active
+        else:
+            self._active.pop(job.company_id, None)
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.done:
+                continue
+
+            agent_jobs.labels('queued').dec()
+            agent_jobs.labels('running').inc()
+            job._task = asyncio.create_task(self._execute(job))
+            try:
+                await job._task
+            except asyncio.CancelledError:
+                # Отмена до первого шага задачи: _execute не запускался и
+                # итоговый статус не выставлен. Воркер продолжает работу,
+                # если только не остановлена сама очередь
+                if not job.done:
+                    job.finish('cancelled')
+                if self._stopping:
+                    raise
+            finally:
+                agent_jobs.labels('running').dec()
+                self._release(job)
+
+            # Задача перехватывает отмену, поэтому отмена воркера, ждущего ее,
+            # может не дойти до него самого
+            if self._stopping:
+                return
+
+    async def _execute(self, job: AgentJob):
+        job.status = 'running'
+        job.started_at = time.time()
+        job.emit({'type': 'status', 'status': 'running'})
+        try:
+            await asyncio.wait_for(self._consume(job), self.run_timeout)
+            job.finish('succeeded')
+        except BudgetExceeded as e:
+            job.finish('budget_exceeded', str(e))
+        except asyncio.TimeoutError:
+            job.finish('timed_out', f'Задача не завершилась за {self.run_timeout:g} с')
+        except asyncio.CancelledError:
+            job.finish('cancelled')
+        except Exception as e:
+            print(f"Ошибка задачи агентов {job.id}: {e}")
+            job.finish('failed', str(e))
+
+    async def _consume(self, job: AgentJob):
+        async with aclosing(self.runner(job)) as events:
+            async for event in events:
+                tokens = event.get('tokens') or 0
+                if tokens:
+                    job.tokens += tokens
+                    self.budget.charge(job.company_id, tokens)
+                    agent_tokens.inc(tokens)
+                job.emit(event)
+
+                if tokens and self.budget.exhausted(job.company_id):
+                    raise BudgetExceeded('Бюджет токенов компании исчерпан')
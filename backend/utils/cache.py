@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+_MISSING = object()
+
+
+class LocalCacheBackend:
+    """Ограниченный по размеру LRU-кэш в памяти процесса"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return _MISSING
+
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return _MISSING
+
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def size(self) -> int:
+        return len(self._items)
+
+
+class RedisCacheBackend:
+    """Общий для всех воркеров кэш в Redis (значения хранятся в JSON)"""
+
+    def __init__(self, url: str, prefix: str):
+        if redis is None:
+            raise ValueError("Для CACHE_REDIS_URL необходим пакет redis")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        return json.loads(raw)
+
+    def set(self, key: str, value, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(int(ttl), 1))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def size(self) -> int:
+        return None
+
+
+class TTLCache:
+    """Кэш с временем жизни записей и счетчиками попаданий/промахов"""
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        """Значение из кэша или default; учитывается в счетчиках"""
+        value = self.backend.get(key)
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def get_or_load(self, key: str, loader):
+        """Возвращает значение из кэша или загружает его через loader()"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        # Ошибки loader() не кэшируются и передаются вызывающему коду
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def set(self, key: str, value):
+        self.backend.set(key, value, self.ttl)
+
+    def invalidate(self, key: str):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'size': self.backend.size(),
+            'ttl': self.ttl
+        }
+
+
+_user_companies_cache = None
+_user_companies_cache_lock = threading.Lock()
+
+
+def get_user_companies_cache() -> TTLCache:
+    """Общий для процесса кэш компаний пользователя"""
+    global _user_companies_cache
+
+    with _user_companies_cache_lock:
+        if _user_companies_cache is None:
+            ttl = float(os.getenv('USER_COMPANIES_CACHE_TTL', 60))
+            redis_url = os.getenv('CACHE_REDIS_URL')
+
+            if redis_url:
+                backend = RedisCacheBackend(redis_url, prefix='user_companies:')
+            else:
+                backend = LocalCacheBackend(int(os.getenv('USER_COMPANIES_CACHE_SIZE', 10000)))
+
+            _user_companies_cache = TTLCache(backend, ttl)
+
+    return _user_companies_cache
@@ -1,5 +1,33 @@
 from supabase import create_client, Client
 import os
+import threading
+
+from utils.http_pool import get_shared_transport, get_timeout
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _attach_shared_pool(client: Client):
+    """Перевод клиента PostgREST на общий пул соединений процесса"""
+    session = client.postgrest.session
+    client.postgrest.session = type(session)(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=get_timeout(),
+        follow_redirects=True,
+        transport=get_shared_transport()
+    )
+    session.close()
+
+def _get_client(url: str, key: str) -> Client:
+    """Один клиент на пару (url, key) на весь процесс"""
+    with _clients_lock:
+        client = _clients.get((url, key))
+        if client is None:
+            client = create_client(url, key)
+            _attach_shared_pool(client)
+            _clients[(url, key)] = client
+        return client
 
 def get_supabase_client() -> Client:
     """Создание клиента Supabase"""
@@ -9,7 +37,7 @@ def get_supabase_client() -> Client:
     if not url or not key:
         raise ValueError("Не найдены переменные окружения SUPABASE_URL или SUPABASE_SERVICE_ROLE_SECRET")
     
-    return create_client(url, key)
+    return _get_client(url, key)
 
 def get_supabase_anon_client() -> Client:
     """Создание анонимного клиента Supabase"""
@@ -19,6 +47,8 @@ def get_supabase_anon_client() -> Client:
     if not url or not key:
         raise ValueError("Не найдены переменные окружения SUPABASE_URL или SUPABASE_ANON_KEY")
     
-    return create_client(url, key)
-
+    return _get_client(url, key)
 
+def get_pool_stats() -> dict:
+    """Метрики общего пула соединений"""
+    return get_shared_transport().stats()
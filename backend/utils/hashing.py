@@ -0,0 +1,121 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+
+class HashingPoolBusy(Exception):
+    """Очередь хеширования заполнена, запрос нужно отклонить"""
+
+
+class HashingTimeout(HashingPoolBusy):
+    """Пул не успел выполнить хеширование за HASHING_TIMEOUT секунд"""
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class PasswordHasher:
+    """Пул процессов для bcrypt с ограниченной очередью"""
+
+    def __init__(self, workers: int = None, queue_size: int = None, rounds: int = None,
+                 timeout: float = None):
+        self.workers = workers or int(os.getenv('HASHING_WORKERS', os.cpu_count() or 1))
+        self.queue_size = queue_size or int(os.getenv('HASHING_QUEUE_SIZE', self.workers * 4))
+        self.rounds = rounds or int(os.getenv('BCRYPT_ROUNDS', 12))
+        self.timeout = timeout or float(os.getenv('HASHING_TIMEOUT', 10))
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        # Фоновые задачи занимают не больше половины очереди, остальное - для входа
+        self._background_slots = threading.BoundedSemaphore(max(1, self.queue_size // 2))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Пул создаем при первом использовании, а не при импорте
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingPoolBusy('Сервер перегружен, повторите попытку позже')
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return self._result(future)
+
+    def _result(self, future):
+        # Таймаут ответа - та же перегрузка пула, что и заполненная очередь (503)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self.rejected += 1
+            raise HashingTimeout('Сервер перегружен, повторите попытку позже')
+
+    def hash(self, password: str) -> str:
+        """Хеширование пароля в пуле"""
+        return self._run(_hash_password, password, self.rounds)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Проверка пароля в пуле"""
+        return self._run(_verify_password, password, hashed)
+
+    def hash_many(self, passwords: list) -> list:
+        """Параллельное хеширование пачки паролей для фоновых задач.
+
+        В отличие от hash() не отклоняет работу при заполненной очереди,
+        а ждет свободных мест, поэтому подходит только для фоновых потоков.
+        """
+        def release(_):
+            self._slots.release()
+            self._background_slots.release()
+
+        futures = []
+        for password in passwords:
+            if not self._background_slots.acquire(timeout=self.timeout):
+                raise HashingPoolBusy('Не дождались свободного места в пуле хеширования')
+            if not self._slots.acquire(timeout=self.timeout):
+                self._background_slots.release()
+                raise HashingPoolBusy('Не дождались свободного места в пуле хеширования')
+
+            future = self._get_executor().submit(_hash_password, password, self.rounds)
+            future.add_done_callback(release)
+            futures.append(future)
+
+        return [self._result(future) for future in futures]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+_password_hasher = None
+_password_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Общий для процесса пул хеширования"""
+    global _password_hasher
+
+    with _password_hasher_lock:
+        if _password_hasher is None:
+            _password_hasher = PasswordHasher()
+
+    return _password_hasher
@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESSIBLE_TYPES = ('application/json',)
+
+# Суффиксы, которые добавляются к ETag сжатого представления
+ENCODING_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+
+def make_etag(*parts) -> str:
+    """Сильный ETag из частей ключа (версия данных, параметры запроса)"""
+    key = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Проверка заголовка If-None-Match, включая ETag сжатых представлений"""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        for suffix in ENCODING_SUFFIXES.values():
+            if candidate.endswith(suffix + '"'):
+                candidate = candidate[:-len(suffix) - 1] + '"'
+        if candidate == etag:
+            return True
+
+    return False
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """Лучшее поддерживаемое клиентом сжатие или None"""
+    accepted = {item.split(';')[0].strip().lower() for item in (accept_encoding or '').split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=6)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag сжатого представления: сильный ETag должен отличаться для разных кодировок"""
+    if not etag or not encoding:
+        return etag
+    weak = etag.startswith('W/')
+    value = etag[2:] if weak else etag
+    return ('W/' if weak else '') + value[:-1] + ENCODING_SUFFIXES[encoding] + '"'
+
+
+def compress_response(response, accept_encoding: str):
+    """Сжатие крупных JSON-ответов Flask (используется в after_request)"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    body = response.get_data()
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None or len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if 'ETag' in response.headers:
+        response.headers['ETag'] = encoded_etag(response.headers['ETag'], encoding)
+
+    return response
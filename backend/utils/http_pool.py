@@ -0,0 +1,140 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+
+from utils.metrics import db_call_errors, observe_db_call, postgrest_target
+
+# Повторять можно только запросы без побочных эффектов
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+class PooledTransport(httpx.BaseTransport):
+    """Общий пул HTTP-соединений с повторами и счетчиками использования"""
+
+    def __init__(self, max_connections: int = None, max_keepalive: int = None,
+                 keepalive_expiry: float = None, retries: int = None,
+                 backoff: float = None, http2: bool = None):
+        self.max_connections = max_connections or int(os.getenv('SUPABASE_POOL_SIZE', 20))
+        self.max_keepalive = max_keepalive or int(os.getenv('SUPABASE_KEEPALIVE_CONNECTIONS', self.max_connections))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv('SUPABASE_KEEPALIVE_EXPIRY', 30))
+        self.retries = retries if retries is not None else int(os.getenv('SUPABASE_RETRIES', 2))
+        self.backoff = backoff or float(os.getenv('SUPABASE_RETRY_BACKOFF', 0.1))
+        self.http2 = http2 if http2 is not None else _env_flag('SUPABASE_HTTP2', 'true')
+
+        self._transport = httpx.HTTPTransport(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retried = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _sleep_before_retry(self, attempt: int):
+        # Экспоненциальная задержка с полным джиттером
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        # Путь PostgREST определяет таблицу или функцию: так замеряется каждый execute() и rpc()
+        target = postgrest_target(request.url.path)
+        with observe_db_call('supabase', target):
+            response = self._send(request)
+
+        if response.status_code >= 400:
+            db_call_errors.labels('supabase', target).inc()
+        return response
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = self._transport.handle_request(request)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                    # Запрос не ушел на сервер, повтор безопасен для любого метода
+                    if attempt >= self.retries:
+                        raise
+                else:
+                    if (response.status_code not in RETRY_STATUS_CODES
+                            or request.method not in IDEMPOTENT_METHODS
+                            or attempt >= self.retries):
+                        return response
+                    response.close()
+
+                with self._lock:
+                    self.retried += 1
+                self._sleep_before_retry(attempt)
+                attempt += 1
+
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def close(self):
+        self._transport.close()
+
+    def stats(self) -> dict:
+        """Загрузка пула для подбора его размера"""
+        connections = list(getattr(self._transport._pool, 'connections', []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+
+        return {
+            'max_connections': self.max_connections,
+            'max_keepalive': self.max_keepalive,
+            'open_connections': len(connections),
+            'idle_connections': idle,
+            'active_connections': len(connections) - idle,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'utilisation': round(self.in_flight / self.max_connections, 3),
+            'requests': self.requests,
+            'retried': self.retried,
+            'errors': self.errors,
+            'http2': self.http2
+        }
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_shared_transport() -> PooledTransport:
+    """Общий для процесса пул соединений"""
+    global _transport
+
+    with _transport_lock:
+        if _transport is None:
+            _transport = PooledTransport()
+
+    return _transport
+
+
+def get_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        float(os.getenv('SUPABASE_TIMEOUT', 10)),
+        connect=float(os.getenv('SUPABASE_CONNECT_TIMEOUT', 5))
+    )
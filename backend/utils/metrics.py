@@ -0,0 +1,152 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# Границы корзин в секундах: от быстрых ответов из кэша до таймаута запроса
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Маршрут без совпадения (404) пишется одной меткой, чтобы не плодить ряды
+UNMATCHED_ROUTE = 'unmatched'
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса',
+    ['method', 'route'], buckets=LATENCY_BUCKETS
+)
+http_requests = Counter(
+    'http_requests_total', 'Число HTTP-запросов по статусу ответа',
+    ['method', 'route', 'status']
+)
+http_requests_in_flight = Gauge(
+    'http_requests_in_flight', 'HTTP-запросы в обработке',
+    ['method', 'route'], multiprocess_mode='livesum'
+)
+db_call_duration = Histogram(
+    'db_call_duration_seconds', 'Время вызова базы по таблице или функции',
+    ['backend', 'target'], buckets=LATENCY_BUCKETS
+)
+db_call_errors = Counter(
+    'db_call_errors_total', 'Вызовы базы, завершившиеся ошибкой',
+    ['backend', 'target']
+)
+auth_rejections = Counter(
+    'auth_rejections_total', 'Отклоненные запросы входа и регистрации по причине',
+    ['route', 'reason']
+)
+sse_subscribers = Gauge(
+    'sse_subscribers', 'Открытые потоки Server-Sent Events',
+    multiprocess_mode='livesum'
+)
+activity_events = Counter(
+    'activity_events_total', 'События журнала действий: recorded, written, dropped',
+    ['result']
+)
+activity_buffer_size = Gauge(
+    'activity_buffer_size', 'События журнала действий, ожидающие записи',
+    multiprocess_mode='livesum'
+)
+agent_jobs = Gauge(
+    'agent_jobs', 'Задачи агентов в очереди и в работе',
+    ['state'], multiprocess_mode='livesum'
+)
+agent_runs = Counter(
+    'agent_runs_total', 'Завершенные задачи агентов по итоговому статусу',
+    ['status']
+)
+agent_tokens = Counter(
+    'agent_tokens_total', 'Токены модели, израсходованные задачами агентов'
+)
+
+_FUNCTION_CALL = re.compile(r'^\s*SELECT\s+(\w+)\s*\(', re.IGNORECASE)
+_FROM_TABLE = re.compile(r'\bFROM\s+(\w+)', re.IGNORECASE)
+_sql_targets = {}
+
+
+def postgrest_target(path: str) -> str:
+    """Таблица или функция из пути PostgREST: /rest/v1/projects -> projects,
+    /rest/v1/rpc/get_dashboard -> rpc/get_dashboard"""
+    path = path.split('/rest/v1/', 1)[-1].strip('/')
+    parts = path.split('/')
+    return '/'.join(parts[:2]) if parts[0] == 'rpc' else parts[0]
+
+
+def sql_target(query: str) -> str:
+    """Функция (SELECT fn(...)) или первая таблица FROM в тексте SQL-запроса"""
+    target = _sql_targets.get(query)
+    if target is None:
+        match = _FUNCTION_CALL.match(query) or _FROM_TABLE.search(query)
+        target = match.group(1) if match else 'sql'
+        _sql_targets[query] = target
+    return target
+
+
+@contextmanager
+def observe_db_call(backend: str, target: str):
+    """Замер вызова базы; исключение учитывается как ошибка и пробрасывается дальше"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        db_call_errors.labels(backend, target).inc()
+        raise
+    finally:
+        db_call_duration.labels(backend, target).observe(time.perf_counter() - started)
+
+
+def start_request(method: str, route: str) -> float:
+    http_requests_in_flight.labels(method, route).inc()
+    return time.perf_counter()
+
+
+def finish_request(method: str, route: str, status: int, started: float):
+    http_requests_in_flight.labels(method, route).dec()
+    http_request_duration.labels(method, route).observe(time.perf_counter() - started)
+    http_requests.labels(method, route, str(status)).inc()
+
+
+def init_app(app):
+    """Метрики запросов Flask-приложения по шаблону маршрута"""
+    from flask import g, request
+
+    @app.before_request
+    def start_metrics():
+        g.metrics_route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        g.metrics_started = start_request(request.method, g.metrics_route)
+        g.metrics_status = 500
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    # teardown вызывается и при необработанном исключении, поэтому счетчик
+    # запросов в обработке всегда уменьшается
+    @app.teardown_request
+    def finish_metrics(error=None):
+        if 'metrics_started' in g:
+            finish_request(request.method, g.metrics_route, g.metrics_status, g.metrics_started)
+
+
+def render_metrics() -> tuple:
+    """Текст метрик в формате Prometheus и его Content-Type.
+
+    Под gunicorn (PROMETHEUS_MULTIPROC_DIR) метрики собираются со всех воркеров.
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
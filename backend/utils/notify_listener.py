@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+# Событие, после которого клиент должен перечитать данные целиком
+# (пропущены уведомления или несколько событий слились в одно)
+RESYNC = {'op': 'RESYNC'}
+
+
+class Subscription:
+    """Подписка одного клиента на события компании.
+
+    Очереди нет: хранится только последнее недоставленное событие, а если
+    их накопилось несколько, они сливаются в RESYNC. Память на подписчика
+    постоянна, медленный клиент не задерживает рассылку остальным.
+    """
+
+    __slots__ = ('company_id', 'pending', 'closed', '_wakeup')
+
+    def __init__(self, company_id: str):
+        self.company_id = company_id
+        self.pending = None
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def push(self, event: dict):
+        self.pending = event if self.pending is None else RESYNC
+        self._wakeup.set()
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    async def next_event(self, timeout: float) -> dict:
+        """Следующее событие или None по таймауту либо после закрытия"""
+        if self.pending is None and not self.closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        self._wakeup.clear()
+        event, self.pending = self.pending, None
+        return event
+
+
+class NotifyListener:
+    """Одно соединение с LISTEN на процесс и рассылка уведомлений подписчикам.
+
+    Полезная нагрузка уведомления - JSON с полем company_id (см. миграцию 013).
+    При обрыве соединение восстанавливается с растущей паузой, а подписчики
+    получают RESYNC: уведомления, отправленные без слушателя, потеряны.
+    """
+
+    def __init__(self, dsn: str, channel: str, reconnect_delay: float = 1.0,
+                 max_reconnect_delay: float = 30.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.subscribers = {}
+        self.connected = False
+        self.notifications = 0
+        self.reconnects = 0
+        self._task = None
+
+    def subscribe(self, company_id: str) -> Subscription:
+        subscription = Subscription(company_id)
+        self.subscribers.setdefault(company_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscribers.get(subscription.company_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscribers[subscription.company_id]
+        subscription.close()
+
+    def publish(self, company_id: str, event: dict):
+        for subscription in self.subscribers.get(company_id, ()):
+            subscription.push(event)
+
+    def publish_all(self, event: dict):
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                subscription.push(event)
+
+    def stats(self) -> dict:
+        return {
+            'connected': self.connected,
+            'companies': len(self.subscribers),
+            'subscribers': sum(len(subscriptions) for subscriptions in self.subscribers.values()),
+            'notifications': self.notifications,
+            'reconnects': self.reconnects
+        }
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for subscriptions in list(self.subscribers.values()):
+            for subscription in list(subscriptions):
+                self.unsubscribe(subscription)
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as connection:
+                    await connection.execute(f'LISTEN {self.channel}')
+                    if self.reconnects:
+                        self.publish_all(RESYNC)
+                    self.connected = True
+                    delay = self.reconnect_delay
+
+                    async for notify in connection.notifies():
+                        self._dispatch(notify.payload)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ошибка подписки на {self.channel}: {e}")
+            finally:
+                self.connected = False
+
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _dispatch(self, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            print(f"Ошибка разбора уведомления {self.channel}: {payload[:200]}")
+            return
+
+        self.notifications += 1
+        if event.get('company_id'):
+            self.publish(event['company_id'], event)
+
+
+def create_notify_listener(channel: str) -> NotifyListener:
+    """Слушатель канала или None, если нет DATABASE_URL или пакета psycopg"""
+    dsn = os.getenv('DATABASE_URL')
+    if not dsn or psycopg is None:
+        return None
+    return NotifyListener(dsn, channel)
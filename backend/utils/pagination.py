@@ -0,0 +1,94 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at: str, item_id: str) -> str:
+    """Кодирование курсора (created_at, id) в непрозрачную строку"""
+    raw = json.dumps([created_at, item_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Декодирование курсора, возвращает (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError('Некорректный курсор')
+
+    if not isinstance(created_at, str) or not isinstance(item_id, str):
+        raise ValueError('Некорректный курсор')
+
+    # Значения подставляются в фильтр PostgREST, поэтому проверяем формат
+    try:
+        datetime.fromisoformat(created_at)
+        uuid.UUID(item_id)
+    except ValueError:
+        raise ValueError('Некорректный курсор')
+
+    return created_at, item_id
+
+
+def parse_limit(value, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Разбор параметра limit с ограничением сверху"""
+    if value in (None, ''):
+        return default
+
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Параметр limit должен быть целым числом')
+
+    if limit < 1:
+        raise ValueError('Параметр limit должен быть положительным')
+
+    return min(limit, maximum)
+
+
+def keyset_filter(created_at: str, item_id: str) -> str:
+    """Условие PostgREST для строк, идущих после курсора при сортировке по убыванию"""
+    return (
+        f'created_at.lt."{created_at}",'
+        f'and(created_at.eq."{created_at}",id.lt.{item_id})'
+    )
+
+
+def paginate(rows: list, limit: int) -> tuple:
+    """Обрезка выборки из limit + 1 строк до страницы и курсор следующей страницы"""
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Курсор для выборок, упорядоченных по вычисляемому полю (релевантность поиска)"""
+    raw = json.dumps({'offset': offset}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['offset']
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise ValueError('Некорректный курсор')
+
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError('Некорректный курсор')
+
+    return offset
+
+
+def paginate_offset(rows: list, limit: int, offset: int) -> tuple:
+    """То же, что paginate, для выборки со смещением offset"""
+    if len(rows) <= limit:
+        return rows, None
+
+    return rows[:limit], encode_offset_cursor(offset + limit)
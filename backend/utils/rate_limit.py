@@ -0,0 +1,157 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from utils.metrics import auth_rejections
+
+
+class RateLimited(Exception):
+    """Запрос отклонен ограничителем; retry_after - через сколько секунд повторить"""
+
+    def __init__(self, message: str, status: int, retry_after: float):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucketLimiter:
+    """Token bucket по ключу (IP, email): burst запросов сразу, дальше rate в секунду.
+
+    Хранится не больше maxsize ключей, давно не использованные вытесняются.
+    Вытесненный ключ за это время все равно восстановил бы полный запас.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.rejected = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Списание токена: 0, если запрос разрешен, иначе секунды до следующего токена"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                self.rejected += 1
+                wait = (1 - tokens) / self.rate
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+
+            return wait
+
+    def stats(self) -> dict:
+        return {'rate': self.rate, 'burst': self.burst, 'keys': len(self._buckets), 'rejected': self.rejected}
+
+
+class ConcurrencyLimiter:
+    """Не больше limit одновременных операций; лишние отклоняются сразу, без ожидания"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+    def stats(self) -> dict:
+        return {'limit': self.limit, 'active': self.active, 'rejected': self.rejected}
+
+
+class AuthThrottle:
+    """Защита входа и регистрации: лимиты по IP и email и общий предел
+    одновременных запросов, упирающихся в bcrypt.
+
+    Проверки идут от дешевых к дорогим и выполняются до хеширования и запросов
+    к базе, поэтому перебор паролей не занимает ядра и потоки воркера, нужные
+    остальным маршрутам. Лимиты действуют в пределах процесса. Нулевой rate
+    отключает лимит.
+    """
+
+    def __init__(self, ip_rate: float = None, ip_burst: int = None, email_rate: float = None,
+                 email_burst: int = None, max_concurrency: int = None):
+        ip_rate = float(os.getenv('AUTH_IP_RATE', 1)) if ip_rate is None else ip_rate
+        ip_burst = int(os.getenv('AUTH_IP_BURST', 20)) if ip_burst is None else ip_burst
+        email_rate = float(os.getenv('AUTH_EMAIL_RATE', 0.1)) if email_rate is None else email_rate
+        email_burst = int(os.getenv('AUTH_EMAIL_BURST', 5)) if email_burst is None else email_burst
+        if max_concurrency is None:
+            # По умолчанию - длина очереди bcrypt: сверх нее запрос все равно
+            # получил бы 503, но уже после обращений к базе
+            from utils.hashing import get_password_hasher
+            max_concurrency = int(os.getenv('AUTH_MAX_CONCURRENCY', 0)) or get_password_hasher().queue_size
+
+        self.ip_limiter = TokenBucketLimiter(ip_rate, ip_burst) if ip_rate > 0 else None
+        self.email_limiter = TokenBucketLimiter(email_rate, email_burst) if email_rate > 0 else None
+        self.concurrency = ConcurrencyLimiter(max_concurrency)
+
+    def _check(self, limiter: TokenBucketLimiter, key: str, route: str, reason: str):
+        if limiter is None or not key:
+            return
+        wait = limiter.acquire(key)
+        if wait:
+            auth_rejections.labels(route, reason).inc()
+            raise RateLimited('Слишком много попыток, повторите позже', 429, wait)
+
+    @contextmanager
+    def admit(self, route: str, ip: str, email: str = None):
+        """Пропуск запроса или RateLimited (429 - лимит ключа, 503 - перегрузка)"""
+        self._check(self.ip_limiter, ip, route, 'ip')
+        # email приходит из тела запроса как есть: не строка - лимит только по IP
+        email = email.strip().lower() if isinstance(email, str) else None
+        self._check(self.email_limiter, email, route, 'email')
+
+        if not self.concurrency.try_acquire():
+            auth_rejections.labels(route, 'concurrency').inc()
+            raise RateLimited('Сервер перегружен, повторите попытку позже', 503, 1)
+        try:
+            yield
+        finally:
+            self.concurrency.release()
+
+    def stats(self) -> dict:
+        return {
+            'ip': self.ip_limiter.stats() if self.ip_limiter else None,
+            'email': self.email_limiter.stats() if self.email_limiter else None,
+            'concurrency': self.concurrency.stats()
+        }
+
+
+_auth_throttle = None
+_auth_throttle_lock = threading.Lock()
+
+
+def get_auth_throttle() -> AuthThrottle:
+    """Общие для процесса лимиты входа и регистрации"""
+    global _auth_throttle
+
+    with _auth_throttle_lock:
+        if _auth_throttle is None:
+            _auth_throttle = AuthThrottle()
+
+    return _auth_throttle
@@ -0,0 +1,8 @@
+-- Миграция 004: Индекс для keyset-пагинации проектов
+-- Применить в Supabase SQL Editor
+
+-- Составной индекс под запрос GET /api/projects:
+-- WHERE company_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?
+-- Любая страница читается диапазонным сканированием индекса без OFFSET
+CREATE INDEX IF NOT EXISTS idx_projects_company_created_id
+    ON projects (company_id, created_at DESC, id DESC);
@@ -0,0 +1,34 @@
+-- Миграция 005: Функция входа за один запрос
+-- Применить в Supabase SQL Editor
+
+-- Возвращает хеш пароля, профиль и список компаний пользователя одним вызовом.
+-- Формат элементов companies совпадает с результатом get_user_companies.
+-- Если пользователь не найден, возвращается NULL.
+CREATE OR REPLACE FUNCTION get_user_for_login(user_email VARCHAR(255))
+RETURNS JSON AS $$
+BEGIN
+    RETURN (
+        SELECT json_build_object(
+            'user_id', u.id,
+            'email', u.email,
+            'password_hash', u.password_hash,
+            'first_name', u.first_name,
+            'last_name', u.last_name,
+            'companies', COALESCE((
+                SELECT json_agg(json_build_object(
+                    'company_id', c.id,
+                    'company_name', c.name,
+                    'company_description', c.description,
+                    'user_role', cm.role,
+                    'joined_at', cm.joined_at
+                ))
+                FROM company_members cm
+                JOIN companies c ON c.id = cm.company_id
+                WHERE cm.user_id = u.id
+            ), '[]'::json)
+        )
+        FROM users u
+        WHERE u.email = get_user_for_login.user_email
+    );
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
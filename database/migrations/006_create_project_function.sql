@@ -0,0 +1,34 @@
+-- Миграция 006: Атомарное создание проекта с владельцем
+-- Применить в Supabase SQL Editor
+
+-- Функция для создания проекта и назначения создателя владельцем
+-- Обе вставки выполняются в одной транзакции
+CREATE OR REPLACE FUNCTION create_project_with_owner(
+    project_name VARCHAR(255),
+    project_description TEXT,
+    project_company_id UUID,
+    owner_id UUID
+)
+RETURNS JSON AS $$
+DECLARE
+    new_project projects%ROWTYPE;
+    result JSON;
+BEGIN
+    -- Создаем проект
+    INSERT INTO projects (company_id, name, description, created_by)
+    VALUES (project_company_id, project_name, project_description, owner_id)
+    RETURNING * INTO new_project;
+    
+    -- Назначаем создателя владельцем проекта
+    INSERT INTO project_members (project_id, user_id, role)
+    VALUES (new_project.id, owner_id, 'owner');
+    
+    -- Возвращаем результат
+    result := json_build_object(
+        'project', row_to_json(new_project),
+        'success', true
+    );
+    
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
@@ -0,0 +1,85 @@
+-- Миграция 007: Пакетное создание, изменение и удаление проектов
+-- Применить в Supabase SQL Editor
+
+-- Применяет пакет операций над проектами одной компании за один вызов.
+-- Каждый вид операций выполняется одним set-based запросом, весь пакет - одна транзакция.
+-- Элементы входных массивов содержат поле idx - позицию операции в исходном запросе.
+--   creates: [{"idx": 0, "name": "...", "description": "..."}]
+--   updates: [{"idx": 1, "id": "...", "name": "...", "description": "..."}]
+--   deletes: [{"idx": 2, "id": "..."}]
+CREATE OR REPLACE FUNCTION apply_project_batch(
+    batch_company_id UUID,
+    actor_id UUID,
+    creates JSONB,
+    updates JSONB,
+    deletes JSONB
+)
+RETURNS JSON AS $$
+DECLARE
+    created JSON;
+    updated JSON;
+    deleted JSON;
+BEGIN
+    -- Пакет может применять только участник компании
+    IF NOT EXISTS (
+        SELECT 1 FROM company_members
+        WHERE company_id = batch_company_id AND user_id = actor_id
+    ) THEN
+        RAISE EXCEPTION 'Пользователь не является участником компании';
+    END IF;
+    
+    -- Создаем проекты и назначаем создателя владельцем
+    WITH src AS (
+        SELECT gen_random_uuid() AS id, x.idx, x.name, x.description
+        FROM jsonb_to_recordset(creates) AS x(idx INT, name VARCHAR(255), description TEXT)
+    ), ins AS (
+        INSERT INTO projects (id, company_id, name, description, created_by)
+        SELECT id, batch_company_id, name, description, actor_id FROM src
+        RETURNING *
+    ), owners AS (
+        INSERT INTO project_members (project_id, user_id, role)
+        SELECT id, actor_id, 'owner' FROM ins
+    )
+    SELECT COALESCE(json_agg(json_build_object('idx', src.idx, 'project', row_to_json(ins))), '[]'::json)
+    INTO created
+    FROM ins JOIN src ON src.id = ins.id;
+    
+    -- Изменяем проекты (незаданные поля остаются прежними)
+    WITH src AS (
+        SELECT x.idx, x.id, x.name, x.description
+        FROM jsonb_to_recordset(updates) AS x(idx INT, id UUID, name VARCHAR(255), description TEXT)
+    ), upd AS (
+        UPDATE projects p
+        SET name = COALESCE(src.name, p.name),
+            description = COALESCE(src.description, p.description),
+            updated_at = NOW()
+        FROM src
+        WHERE p.id = src.id AND p.company_id = batch_company_id
+        RETURNING src.idx, row_to_json(p) AS project
+    )
+    SELECT COALESCE(json_agg(json_build_object('idx', upd.idx, 'project', upd.project)), '[]'::json)
+    INTO updated
+    FROM upd;
+    
+    -- Удаляем проекты
+    WITH src AS (
+        SELECT x.idx, x.id
+        FROM jsonb_to_recordset(deletes) AS x(idx INT, id UUID)
+    ), del AS (
+        DELETE FROM projects p
+        USING src
+        WHERE p.id = src.id AND p.company_id = batch_company_id
+        RETURNING src.idx, p.id
+    )
+    SELECT COALESCE(json_agg(json_build_object('idx', del.idx, 'id', del.id)), '[]'::json)
+    INTO deleted
+    FROM del;
+    
+    RETURN json_build_object(
+        'created', created,
+        'updated', updated,
+        'deleted', deleted,
+        'success', true
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
@@ -0,0 +1,51 @@
+-- Миграция 008: Пакетный импорт участников компании
+-- Применить в Supabase SQL Editor
+
+-- Добавляет пачку пользователей в компанию за один вызов.
+-- members: [{"email": "...", "password_hash": "...", "first_name": "...", "last_name": "...", "role": "member"}]
+-- Новые пользователи создаются, существующие (по email) просто добавляются в компанию.
+CREATE OR REPLACE FUNCTION import_company_members(
+    target_company_id UUID,
+    members JSONB
+)
+RETURNS JSON AS $$
+DECLARE
+    created_count INT;
+    added_ids JSON;
+BEGIN
+    -- Создаем отсутствующих пользователей
+    WITH ins AS (
+        INSERT INTO users (email, password_hash, first_name, last_name)
+        SELECT x.email, x.password_hash, x.first_name, x.last_name
+        FROM jsonb_to_recordset(members) AS x(
+            email VARCHAR(255),
+            password_hash VARCHAR(255),
+            first_name VARCHAR(100),
+            last_name VARCHAR(100)
+        )
+        ON CONFLICT (email) DO NOTHING
+        RETURNING id
+    )
+    SELECT COUNT(*) INTO created_count FROM ins;
+    
+    -- Добавляем всех пользователей пачки в компанию
+    WITH src AS (
+        SELECT x.email, COALESCE(x.role, 'member') AS role
+        FROM jsonb_to_recordset(members) AS x(email VARCHAR(255), role VARCHAR(50))
+    ), added AS (
+        INSERT INTO company_members (company_id, user_id, role)
+        SELECT target_company_id, u.id, src.role
+        FROM src
+        JOIN users u ON u.email = src.email
+        ON CONFLICT (company_id, user_id) DO NOTHING
+        RETURNING user_id
+    )
+    SELECT COALESCE(json_agg(user_id), '[]'::json) INTO added_ids FROM added;
+    
+    RETURN json_build_object(
+        'created_users', created_count,
+        'added_user_ids', added_ids,
+        'success', true
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
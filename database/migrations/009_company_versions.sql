@@ -0,0 +1,73 @@
+-- Миграция 009: Версия данных компании для условных GET-запросов
+-- Применить в Supabase SQL Editor
+
+-- Счетчик увеличивается при любом изменении проектов или состава компании.
+-- Бэкенд строит из него ETag для GET /api/projects и отвечает 304 без выборки проектов.
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS data_version BIGINT NOT NULL DEFAULT 0;
+
+-- Поддержка projects.updated_at при любом изменении проекта
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS projects_set_updated_at ON projects;
+CREATE TRIGGER projects_set_updated_at
+    BEFORE UPDATE ON projects
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Увеличение версии один раз на компанию за оператор (пакетные изменения не
+-- обновляют строку компании для каждой затронутой записи)
+CREATE OR REPLACE FUNCTION bump_company_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE companies SET data_version = data_version + 1
+        WHERE id IN (SELECT DISTINCT company_id FROM old_rows);
+    ELSE
+        UPDATE companies SET data_version = data_version + 1
+        WHERE id IN (SELECT DISTINCT company_id FROM new_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Триггеры с таблицами переходов допускают только одно событие, поэтому по триггеру на событие
+DROP TRIGGER IF EXISTS projects_bump_version_insert ON projects;
+CREATE TRIGGER projects_bump_version_insert
+    AFTER INSERT ON projects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_company_version();
+
+DROP TRIGGER IF EXISTS projects_bump_version_update ON projects;
+CREATE TRIGGER projects_bump_version_update
+    AFTER UPDATE ON projects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_company_version();
+
+DROP TRIGGER IF EXISTS projects_bump_version_delete ON projects;
+CREATE TRIGGER projects_bump_version_delete
+    AFTER DELETE ON projects
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_company_version();
+
+DROP TRIGGER IF EXISTS company_members_bump_version_insert ON company_members;
+CREATE TRIGGER company_members_bump_version_insert
+    AFTER INSERT ON company_members
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_company_version();
+
+DROP TRIGGER IF EXISTS company_members_bump_version_update ON company_members;
+CREATE TRIGGER company_members_bump_version_update
+    AFTER UPDATE ON company_members
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_company_version();
+
+DROP TRIGGER IF EXISTS company_members_bump_version_delete ON company_members;
+CREATE TRIGGER company_members_bump_version_delete
+    AFTER DELETE ON company_members
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_company_version();
@@ -0,0 +1,27 @@
+-- Миграция 010: Вторичные индексы под запросы сервисов
+-- Применить в Supabase SQL Editor
+
+-- UNIQUE(company_id, user_id) обслуживает только поиск по company_id.
+-- get_user_companies ищет членства по user_id: без индекса это полное
+-- сканирование company_members на каждый вход и каждый GET /api/companies.
+-- company_id в ключе позволяет соединению с companies не читать таблицу членств.
+CREATE INDEX IF NOT EXISTS idx_company_members_user_company
+    ON company_members (user_id, company_id);
+
+-- Список проектов компании (WHERE company_id = ? ORDER BY created_at DESC, id DESC)
+-- уже покрывает idx_projects_company_created_id из миграции 004
+
+-- То же для участников проектов: уникальный ключ начинается с project_id,
+-- а выборки проектов пользователя и каскадное удаление пользователя идут по user_id
+CREATE INDEX IF NOT EXISTS idx_project_members_user_project
+    ON project_members (user_id, project_id);
+
+-- Внешний ключ projects.created_by -> users(id): без индекса удаление
+-- пользователя проверяет все проекты последовательным сканированием
+CREATE INDEX IF NOT EXISTS idx_projects_created_by
+    ON projects (created_by);
+
+-- Обновить статистику, чтобы планировщик сразу начал использовать новые индексы
+ANALYZE company_members;
+ANALYZE project_members;
+ANALYZE projects;
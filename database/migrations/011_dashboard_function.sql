@@ -0,0 +1,58 @@
+-- Миграция 011: Данные главной страницы за один запрос
+-- Применить в Supabase SQL Editor
+
+-- Возвращает компании пользователя и первую страницу проектов выбранной компании.
+-- Если dashboard_company_id не задан или пользователь в ней не состоит,
+-- выбирается компания, в которую пользователь вступил первой.
+-- Формат companies совпадает с get_user_companies, projects - с GET /api/projects.
+CREATE OR REPLACE FUNCTION get_dashboard(
+    dashboard_user_id UUID,
+    dashboard_company_id UUID DEFAULT NULL,
+    page_size INTEGER DEFAULT 51
+)
+RETURNS JSON AS $$
+DECLARE
+    selected_company_id UUID;
+BEGIN
+    SELECT cm.company_id INTO selected_company_id
+    FROM company_members cm
+    WHERE cm.user_id = dashboard_user_id
+    ORDER BY cm.company_id = dashboard_company_id DESC NULLS LAST, cm.joined_at, cm.company_id
+    LIMIT 1;
+
+    RETURN json_build_object(
+        'companies', COALESCE((
+            SELECT json_agg(json_build_object(
+                'company_id', c.id,
+                'company_name', c.name,
+                'company_description', c.description,
+                'user_role', cm.role,
+                'joined_at', cm.joined_at
+            ) ORDER BY cm.joined_at, c.id)
+            FROM company_members cm
+            JOIN companies c ON c.id = cm.company_id
+            WHERE cm.user_id = dashboard_user_id
+        ), '[]'::json),
+        'company_id', selected_company_id,
+        'projects', COALESCE((
+            SELECT json_agg(t ORDER BY t.created_at DESC, t.id DESC)
+            FROM (
+                SELECT
+                    p.id,
+                    p.name,
+                    p.description,
+                    p.created_at,
+                    p.created_by,
+                    CASE WHEN u.id IS NULL THEN NULL
+                         ELSE json_build_object('first_name', u.first_name, 'last_name', u.last_name)
+                    END AS users
+                FROM projects p
+                LEFT JOIN users u ON u.id = p.created_by
+                WHERE p.company_id = selected_company_id
+                ORDER BY p.created_at DESC, p.id DESC
+                LIMIT page_size
+            ) t
+        ), '[]'::json)
+    );
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
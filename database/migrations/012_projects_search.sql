@@ -0,0 +1,61 @@
+-- Миграция 012: Полнотекстовый поиск по проектам
+-- Применить в Supabase SQL Editor
+
+-- btree_gin позволяет положить company_id и tsvector в один GIN-индекс:
+-- поиск внутри компании не перебирает совпадения других компаний
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- Вектор строится в двух конфигурациях: russian дает стемминг (русские слова,
+-- а английские через english_stem), simple - точные совпадения имен, кодов
+-- и слов, которых нет в словаре. Название весит больше описания.
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_projects_company_search
+    ON projects USING GIN (company_id, search_vector);
+
+-- Поиск проектов компании. Запрос разбирается как в поисковиках
+-- (websearch_to_tsquery: слова, "фразы", OR, -исключение) в обеих конфигурациях.
+-- Результаты упорядочены по релевантности, затем от новых к старым.
+-- Формат элементов совпадает с GET /api/projects, плюс поле rank.
+CREATE OR REPLACE FUNCTION search_projects(
+    search_company_id UUID,
+    search_query TEXT,
+    page_size INTEGER DEFAULT 21,
+    page_offset INTEGER DEFAULT 0
+)
+RETURNS JSON AS $$
+BEGIN
+    RETURN COALESCE((
+        SELECT json_agg(t ORDER BY t.rank DESC, t.created_at DESC, t.id DESC)
+        FROM (
+            SELECT
+                p.id,
+                p.name,
+                p.description,
+                p.created_at,
+                p.created_by,
+                CASE WHEN u.id IS NULL THEN NULL
+                     ELSE json_build_object('first_name', u.first_name, 'last_name', u.last_name)
+                END AS users,
+                ts_rank_cd(p.search_vector, q.query) AS rank
+            FROM projects p
+            CROSS JOIN (
+                SELECT websearch_to_tsquery('russian', search_query) ||
+                       websearch_to_tsquery('simple', search_query) AS query
+            ) q
+            LEFT JOIN users u ON u.id = p.created_by
+            WHERE p.company_id = search_company_id
+              AND p.search_vector @@ q.query
+            ORDER BY rank DESC, p.created_at DESC, p.id DESC
+            LIMIT page_size
+            OFFSET page_offset
+        ) t
+    ), '[]'::json);
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
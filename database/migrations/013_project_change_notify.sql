@@ -0,0 +1,97 @@
+-- Миграция 013: Уведомления об изменениях проектов (LISTEN/NOTIFY)
+-- Применить в Supabase SQL Editor
+
+-- Бэкенд держит одно соединение с LISTEN project_changes на процесс и рассылает
+-- события подписчикам GET /api/projects/stream. Уведомление отправляется один раз
+-- на компанию за оператор и доставляется только после фиксации транзакции.
+-- Полезная нагрузка NOTIFY ограничена 8000 байтами, поэтому передаются только
+-- идентификаторы (не больше 50), а данные клиент запрашивает сам.
+CREATE OR REPLACE FUNCTION notify_project_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    affected JSON;
+    change RECORD;
+BEGIN
+    -- Пары (company_id, id проекта), затронутые оператором
+    IF TG_TABLE_NAME = 'projects' THEN
+        IF TG_OP = 'DELETE' THEN
+            SELECT json_agg(json_build_object('company_id', company_id, 'id', id))
+            INTO affected FROM old_rows;
+        ELSE
+            SELECT json_agg(json_build_object('company_id', company_id, 'id', id))
+            INTO affected FROM new_rows;
+        END IF;
+    ELSE
+        -- Для участников компания берется из проекта. При каскадном удалении
+        -- проекта его строки уже нет: событие отправит триггер на projects.
+        IF TG_OP = 'DELETE' THEN
+            SELECT json_agg(json_build_object('company_id', p.company_id, 'id', p.id))
+            INTO affected
+            FROM (SELECT DISTINCT project_id FROM old_rows) pm
+            JOIN projects p ON p.id = pm.project_id;
+        ELSE
+            SELECT json_agg(json_build_object('company_id', p.company_id, 'id', p.id))
+            INTO affected
+            FROM (SELECT DISTINCT project_id FROM new_rows) pm
+            JOIN projects p ON p.id = pm.project_id;
+        END IF;
+    END IF;
+
+    FOR change IN
+        SELECT
+            item->>'company_id' AS company_id,
+            count(*) AS total,
+            (array_agg(item->>'id'))[1:50] AS ids
+        FROM json_array_elements(affected) item
+        WHERE item->>'company_id' IS NOT NULL
+        GROUP BY item->>'company_id'
+    LOOP
+        PERFORM pg_notify('project_changes', json_build_object(
+            'table', TG_TABLE_NAME,
+            'op', TG_OP,
+            'company_id', change.company_id,
+            'project_ids', change.ids,
+            'count', change.total
+        )::text);
+    END LOOP;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Как и в миграции 009: по триггеру на событие из-за таблиц переходов
+DROP TRIGGER IF EXISTS projects_notify_insert ON projects;
+CREATE TRIGGER projects_notify_insert
+    AFTER INSERT ON projects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_project_change();
+
+DROP TRIGGER IF EXISTS projects_notify_update ON projects;
+CREATE TRIGGER projects_notify_update
+    AFTER UPDATE ON projects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_project_change();
+
+DROP TRIGGER IF EXISTS projects_notify_delete ON projects;
+CREATE TRIGGER projects_notify_delete
+    AFTER DELETE ON projects
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_project_change();
+
+DROP TRIGGER IF EXISTS project_members_notify_insert ON project_members;
+CREATE TRIGGER project_members_notify_insert
+    AFTER INSERT ON project_members
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_project_change();
+
+DROP TRIGGER IF EXISTS project_members_notify_update ON project_members;
+CREATE TRIGGER project_members_notify_update
+    AFTER UPDATE ON project_members
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_project_change();
+
+DROP TRIGGER IF EXISTS project_members_notify_delete ON project_members;
+CREATE TRIGGER project_members_notify_delete
+    AFTER DELETE ON project_members
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_project_change();
@@ -0,0 +1,55 @@
+-- Миграция 014: Участники нескольких проектов одним запросом
+-- Применить в Supabase SQL Editor
+
+-- Участники и их число для списка проектов компании. Проекты других компаний
+-- и несуществующие ID пропускаются. Результат - объект по ID проекта:
+-- {"<project_id>": {"count": 2, "members": [...]}}, формат members совпадает
+-- с участниками одного проекта. С counts_only считается только число участников
+-- (index-only scan по UNIQUE(project_id, user_id), без соединения с users).
+CREATE OR REPLACE FUNCTION get_projects_members(
+    members_company_id UUID,
+    member_project_ids UUID[],
+    counts_only BOOLEAN DEFAULT FALSE
+)
+RETURNS JSON AS $$
+BEGIN
+    IF counts_only THEN
+        RETURN COALESCE((
+            SELECT json_object_agg(p.id, json_build_object('count', (
+                SELECT count(*) FROM project_members pm WHERE pm.project_id = p.id
+            )))
+            FROM projects p
+            WHERE p.id = ANY(member_project_ids)
+              AND p.company_id = members_company_id
+        ), '{}'::json);
+    END IF;
+
+    RETURN COALESCE((
+        SELECT json_object_agg(p.id, json_build_object(
+            'count', COALESCE(m.total, 0),
+            'members', COALESCE(m.members, '[]'::json)
+        ))
+        FROM projects p
+        LEFT JOIN LATERAL (
+            SELECT
+                count(*) AS total,
+                json_agg(json_build_object(
+                    'id', pm.id,
+                    'role', pm.role,
+                    'joined_at', pm.joined_at,
+                    'users', json_build_object(
+                        'id', u.id,
+                        'email', u.email,
+                        'first_name', u.first_name,
+                        'last_name', u.last_name
+                    )
+                ) ORDER BY pm.joined_at, pm.id) AS members
+            FROM project_members pm
+            JOIN users u ON u.id = pm.user_id
+            WHERE pm.project_id = p.id
+        ) m ON TRUE
+        WHERE p.id = ANY(member_project_ids)
+          AND p.company_id = members_company_id
+    ), '{}'::json);
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER;
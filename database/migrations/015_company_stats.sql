@@ -0,0 +1,221 @@
+-- Миграция 015: Сводная статистика компаний
+-- Применить в Supabase SQL Editor
+
+-- Число проектов, участников и время последней активности по компании.
+-- Триггеры прибавляют к счетчикам изменения каждого оператора, поэтому чтение
+-- статистики - одна строка по первичному ключу вместо COUNT(*) по таблицам.
+CREATE TABLE IF NOT EXISTS company_stats (
+    company_id UUID PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+    project_count BIGINT NOT NULL DEFAULT 0,
+    member_count BIGINT NOT NULL DEFAULT 0,
+    last_activity_at TIMESTAMP WITH TIME ZONE,
+    reconciled_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Таблицу читает только бэкенд с ключом service role, клиентский доступ закрыт
+ALTER TABLE company_stats ENABLE ROW LEVEL SECURITY;
+
+-- Строка появляется вместе с компанией
+CREATE OR REPLACE FUNCTION create_company_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO company_stats (company_id, last_activity_at)
+    SELECT id, NOW() FROM new_rows
+    ON CONFLICT (company_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS companies_create_stats ON companies;
+CREATE TRIGGER companies_create_stats
+    AFTER INSERT ON companies
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION create_company_stats();
+
+-- Изменения счетчиков за оператор: +1 за новую строку, -1 за удаленную
+-- (перенос проекта в другую компанию - обе записи). Изменения участников
+-- проектов не меняют счетчики, а только обновляют время активности.
+CREATE OR REPLACE FUNCTION track_company_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    changes JSON;
+BEGIN
+    IF TG_TABLE_NAME = 'project_members' THEN
+        IF TG_OP = 'DELETE' THEN
+            SELECT json_agg(json_build_object('company_id', p.company_id, 'delta', 0))
+            INTO changes
+            FROM (SELECT DISTINCT project_id FROM old_rows) pm
+            JOIN projects p ON p.id = pm.project_id;
+        ELSE
+            SELECT json_agg(json_build_object('company_id', p.company_id, 'delta', 0))
+            INTO changes
+            FROM (SELECT DISTINCT project_id FROM new_rows) pm
+            JOIN projects p ON p.id = pm.project_id;
+        END IF;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT json_agg(json_build_object('company_id', company_id, 'delta', 1))
+        INTO changes FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT json_agg(json_build_object('company_id', company_id, 'delta', -1))
+        INTO changes FROM old_rows;
+    ELSE
+        SELECT json_agg(change) INTO changes
+        FROM (
+            SELECT json_build_object('company_id', company_id, 'delta', 1) AS change FROM new_rows
+            UNION ALL
+            SELECT json_build_object('company_id', company_id, 'delta', -1) FROM old_rows
+        ) t;
+    END IF;
+
+    -- Соединение с companies пропускает компанию, которая удаляется в этой же
+    -- транзакции (каскадное удаление ее проектов и участников). Строки
+    -- обновляются в порядке company_id, чтобы параллельные операторы не
+    -- взаимоблокировались.
+    INSERT INTO company_stats AS s (company_id, project_count, member_count, last_activity_at)
+    SELECT
+        co.id,
+        CASE WHEN TG_TABLE_NAME = 'projects' THEN sum((c->>'delta')::INTEGER) ELSE 0 END,
+        CASE WHEN TG_TABLE_NAME = 'company_members' THEN sum((c->>'delta')::INTEGER) ELSE 0 END,
+        NOW()
+    FROM json_array_elements(changes) c
+    JOIN companies co ON co.id = (c->>'company_id')::UUID
+    GROUP BY co.id
+    ORDER BY co.id
+    ON CONFLICT (company_id) DO UPDATE SET
+        project_count = s.project_count + EXCLUDED.project_count,
+        member_count = s.member_count + EXCLUDED.member_count,
+        last_activity_at = GREATEST(s.last_activity_at, EXCLUDED.last_activity_at);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Как и в миграции 009: по триггеру на событие из-за таблиц переходов
+DROP TRIGGER IF EXISTS projects_track_stats_insert ON projects;
+CREATE TRIGGER projects_track_stats_insert
+    AFTER INSERT ON projects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS projects_track_stats_update ON projects;
+CREATE TRIGGER projects_track_stats_update
+    AFTER UPDATE ON projects
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS projects_track_stats_delete ON projects;
+CREATE TRIGGER projects_track_stats_delete
+    AFTER DELETE ON projects
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS company_members_track_stats_insert ON company_members;
+CREATE TRIGGER company_members_track_stats_insert
+    AFTER INSERT ON company_members
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS company_members_track_stats_update ON company_members;
+CREATE TRIGGER company_members_track_stats_update
+    AFTER UPDATE ON company_members
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS company_members_track_stats_delete ON company_members;
+CREATE TRIGGER company_members_track_stats_delete
+    AFTER DELETE ON company_members
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS project_members_track_stats_insert ON project_members;
+CREATE TRIGGER project_members_track_stats_insert
+    AFTER INSERT ON project_members
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS project_members_track_stats_update ON project_members;
+CREATE TRIGGER project_members_track_stats_update
+    AFTER UPDATE ON project_members
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+DROP TRIGGER IF EXISTS project_members_track_stats_delete ON project_members;
+CREATE TRIGGER project_members_track_stats_delete
+    AFTER DELETE ON project_members
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_company_stats();
+
+-- Сверка счетчиков с таблицами для пачки компаний (по возрастанию id после
+-- after_company_id). Строка статистики блокируется до подсчета: триггеры
+-- параллельных транзакций ждут окончания сверки и прибавят свои изменения
+-- уже к исправленным значениям, а зафиксированные изменения подсчет видит.
+-- last_company_id в ответе - продолжение обхода, NULL после последней пачки.
+CREATE OR REPLACE FUNCTION reconcile_company_stats(
+    after_company_id UUID DEFAULT NULL,
+    batch_size INTEGER DEFAULT 100
+)
+RETURNS JSON AS $$
+DECLARE
+    company RECORD;
+    stats company_stats%ROWTYPE;
+    actual_projects BIGINT;
+    actual_members BIGINT;
+    actual_activity TIMESTAMP WITH TIME ZONE;
+    checked INTEGER := 0;
+    repaired INTEGER := 0;
+    last_id UUID;
+BEGIN
+    FOR company IN
+        SELECT id FROM companies
+        WHERE after_company_id IS NULL OR id > after_company_id
+        ORDER BY id
+        LIMIT batch_size
+    LOOP
+        INSERT INTO company_stats (company_id) VALUES (company.id)
+        ON CONFLICT (company_id) DO NOTHING;
+
+        SELECT * INTO stats FROM company_stats WHERE company_id = company.id FOR UPDATE;
+
+        SELECT count(*), max(updated_at) INTO actual_projects, actual_activity
+        FROM projects WHERE company_id = company.id;
+        SELECT count(*), GREATEST(actual_activity, max(joined_at)) INTO actual_members, actual_activity
+        FROM company_members WHERE company_id = company.id;
+
+        IF stats.project_count <> actual_projects OR stats.member_count <> actual_members
+           OR (stats.last_activity_at IS NULL AND actual_activity IS NOT NULL) THEN
+            repaired := repaired + 1;
+        END IF;
+
+        UPDATE company_stats SET
+            project_count = actual_projects,
+            member_count = actual_members,
+            last_activity_at = GREATEST(last_activity_at, actual_activity),
+            reconciled_at = NOW()
+        WHERE company_id = company.id;
+
+        checked := checked + 1;
+        last_id := company.id;
+    END LOOP;
+
+    RETURN json_build_object(
+        'checked', checked,
+        'repaired', repaired,
+        'last_company_id', CASE WHEN checked = batch_size THEN last_id END
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Начальное заполнение для существующих компаний
+INSERT INTO company_stats (company_id, project_count, member_count, last_activity_at, reconciled_at)
+SELECT
+    c.id,
+    (SELECT count(*) FROM projects p WHERE p.company_id = c.id),
+    (SELECT count(*) FROM company_members cm WHERE cm.company_id = c.id),
+    GREATEST(
+        (SELECT max(p.updated_at) FROM projects p WHERE p.company_id = c.id),
+        (SELECT max(cm.joined_at) FROM company_members cm WHERE cm.company_id = c.id),
+        c.created_at
+    ),
+    NOW()
+FROM companies c
+ON CONFLICT (company_id) DO NOTHING;
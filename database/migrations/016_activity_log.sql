@@ -0,0 +1,110 @@
+-- Миграция 016: Журнал действий компаний
+-- Применить в Supabase SQL Editor
+
+-- Входы, создание проектов и изменения участников. Бэкенд копит события в
+-- памяти и вставляет их пачками (insert_activity_log), поэтому запись журнала
+-- не добавляет обращения к базе в обработку запроса. id и created_at
+-- назначает бэкенд в момент события: повторная отправка пачки после ошибки
+-- не создает дублей. Таблица разбита на секции по месяцам - старые секции
+-- удаляются целиком, без DELETE по большой таблице.
+-- Внешних ключей нет: запись журнала переживает удаление пользователя или проекта.
+CREATE TABLE IF NOT EXISTS activity_log (
+    id UUID NOT NULL,
+    company_id UUID NOT NULL,
+    actor_id UUID,
+    action TEXT NOT NULL,
+    target_type TEXT,
+    target_id UUID,
+    details JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    -- Ключ секционирования входит в первичный ключ; он же обслуживает ленту
+    -- компании (company_id, created_at DESC, id DESC)
+    PRIMARY KEY (company_id, created_at, id)
+) PARTITION BY RANGE (created_at);
+
+-- События вне созданных секций (часы сервера ушли вперед, секции не созданы
+-- заранее) не теряются
+CREATE TABLE IF NOT EXISTS activity_log_default PARTITION OF activity_log DEFAULT;
+
+-- Таблицу читает только бэкенд с ключом service role, клиентский доступ закрыт
+ALTER TABLE activity_log ENABLE ROW LEVEL SECURITY;
+
+-- Создание месячных секций на months_ahead месяцев вперед и удаление секций
+-- старше keep_months месяцев (NULL - хранить все). Запускается по расписанию
+-- (backend/jobs/maintain_activity_log.py или pg_cron), а не при вставке:
+-- DDL берет блокировку таблицы. Возвращает имена созданных и удаленных секций.
+CREATE OR REPLACE FUNCTION maintain_activity_log_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    keep_months INTEGER DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    month_start DATE := date_trunc('month', NOW())::DATE;
+    partition_start DATE;
+    partition_name TEXT;
+    created TEXT[] := '{}';
+    dropped TEXT[] := '{}';
+    old_partition RECORD;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        partition_start := (month_start + make_interval(months => i))::DATE;
+        partition_name := 'activity_log_' || to_char(partition_start, 'YYYY_MM');
+
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF activity_log FOR VALUES FROM (%L) TO (%L)',
+                partition_name, partition_start, (partition_start + INTERVAL '1 month')::DATE
+            );
+            created := created || partition_name;
+        END IF;
+    END LOOP;
+
+    IF keep_months IS NOT NULL THEN
+        FOR old_partition IN
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'activity_log'::regclass
+              AND c.relname ~ '^activity_log_\d{4}_\d{2}$'
+              AND to_date(substr(c.relname, 14), 'YYYY_MM')
+                  < month_start - make_interval(months => keep_months)
+            ORDER BY c.relname
+        LOOP
+            EXECUTE format('DROP TABLE %I', old_partition.relname);
+            dropped := dropped || old_partition.relname::TEXT;
+        END LOOP;
+    END IF;
+
+    RETURN json_build_object('created', created, 'dropped', dropped);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Секции текущего месяца и трех следующих
+SELECT maintain_activity_log_partitions(3);
+
+-- Вставка пачки событий одним оператором. Возвращает число новых строк:
+-- уже записанные события (повтор после ошибки) пропускаются.
+CREATE OR REPLACE FUNCTION insert_activity_log(events JSON)
+RETURNS INTEGER AS $$
+DECLARE
+    inserted INTEGER;
+BEGIN
+    INSERT INTO activity_log (id, company_id, actor_id, action, target_type, target_id, details, created_at)
+    SELECT e.id, e.company_id, e.actor_id, e.action, e.target_type, e.target_id,
+           COALESCE(e.details, '{}'::jsonb), e.created_at
+    FROM json_to_recordset(events) AS e(
+        id UUID,
+        company_id UUID,
+        actor_id UUID,
+        action TEXT,
+        target_type TEXT,
+        target_id UUID,
+        details JSONB,
+        created_at TIMESTAMP WITH TIME ZONE
+    )
+    ON CONFLICT DO NOTHING;
+
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
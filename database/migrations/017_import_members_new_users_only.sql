@@ -0,0 +1,51 @@
+-- Миграция 017: Импорт участников создает только новых пользователей
+-- Применить в Supabase SQL Editor после 008
+
+-- Прежняя версия добавляла в компанию и уже зарегистрированных пользователей,
+-- найденных по email, без их согласия. Теперь в компанию попадают только
+-- пользователи, созданные этим вызовом; существующие email пропускаются
+-- (их число - в skipped_count) и добавляются обычным приглашением.
+-- members: [{"email": "...", "password_hash": "...", "first_name": "...", "last_name": "...", "role": "member"}]
+CREATE OR REPLACE FUNCTION import_company_members(
+    target_company_id UUID,
+    members JSONB
+)
+RETURNS JSON AS $$
+DECLARE
+    created_count INT;
+    added_ids JSON;
+BEGIN
+    WITH src AS (
+        SELECT x.email, x.password_hash, x.first_name, x.last_name, COALESCE(x.role, 'member') AS role
+        FROM jsonb_to_recordset(members) AS x(
+            email VARCHAR(255),
+            password_hash VARCHAR(255),
+            first_name VARCHAR(100),
+            last_name VARCHAR(100),
+            role VARCHAR(50)
+        )
+    ), created AS (
+        INSERT INTO users (email, password_hash, first_name, last_name)
+        SELECT src.email, src.password_hash, src.first_name, src.last_name
+        FROM src
+        ON CONFLICT (email) DO NOTHING
+        RETURNING id, email
+    ), added AS (
+        INSERT INTO company_members (company_id, user_id, role)
+        SELECT target_company_id, created.id, src.role
+        FROM created
+        JOIN src ON src.email = created.email
+        RETURNING user_id
+    )
+    SELECT COUNT(*), COALESCE(json_agg(user_id), '[]'::json)
+    INTO created_count, added_ids
+    FROM added;
+
+    RETURN json_build_object(
+        'created_users', created_count,
+        'added_user_ids', added_ids,
+        'skipped_count', jsonb_array_length(members) - created_count,
+        'success', true
+    );
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
@@ -0,0 +1,24 @@
+-- Миграция 018: Состояние задач импорта участников
+-- Применить в Supabase SQL Editor
+
+-- Импорт выполняется в воркере, который принял файл, а опрос прогресса
+-- (GET /api/imports/{id}) может попасть в любой воркер gunicorn. Воркер
+-- импорта сохраняет сюда снимок задачи при запуске, после каждой пачки и по
+-- завершении; остальные воркеры читают его отсюда.
+CREATE TABLE IF NOT EXISTS member_import_jobs (
+    id UUID PRIMARY KEY,
+    company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+    requested_by UUID NOT NULL,
+    format VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    imported INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    errors JSONB NOT NULL DEFAULT '[]'::jsonb,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Таблицу читает только бэкенд с ключом service role, клиентский доступ закрыт
+ALTER TABLE member_import_jobs ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,117 @@
+-- Миграция 019: Создание секций activity_log при событиях в секции по умолчанию
+-- Применить в Supabase SQL Editor после 016
+
+-- CREATE TABLE ... PARTITION OF проверяет секцию по умолчанию и падает, если
+-- в ней уже есть строки из диапазона новой секции (события с часами,
+-- ушедшими вперед, или задача обслуживания долго не запускалась). Тогда
+-- обслуживание ломалось навсегда, а все новые события копились в
+-- activity_log_default. Теперь такие строки переносятся: секция создается
+-- отдельной таблицей, строки из секции по умолчанию перемещаются в нее, и
+-- только после этого она присоединяется к activity_log. Секции создаются и
+-- для месяцев, события которых уже лежат в секции по умолчанию.
+-- Секции не наследуют RLS от activity_log, поэтому включается на каждой:
+-- иначе секцию можно прочитать напрямую через API Supabase.
+--
+-- Обслуживание блокирует журнал до конца своей транзакции: CREATE TABLE ...
+-- PARTITION OF и DROP TABLE секции берут ACCESS EXCLUSIVE на activity_log,
+-- ATTACH PARTITION - на activity_log_default, которую просматривает любое
+-- чтение через activity_log. На это время ждут и вставки, и лента
+-- (GET /api/companies/{id}/activity), а перенос большого числа строк из
+-- секции по умолчанию удлиняет блокировку. Поэтому задачу запускают в часы
+-- наименьшей нагрузки и заранее создают секции на несколько месяцев вперед,
+-- чтобы переносить было нечего.
+CREATE OR REPLACE FUNCTION maintain_activity_log_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    keep_months INTEGER DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    month_start DATE := date_trunc('month', NOW())::DATE;
+    partition_start DATE;
+    partition_end DATE;
+    partition_name TEXT;
+    created TEXT[] := '{}';
+    dropped TEXT[] := '{}';
+    old_partition RECORD;
+BEGIN
+    -- Вставки ждут конца транзакции: иначе событие из диапазона новой секции
+    -- может попасть в секцию по умолчанию между переносом и присоединением.
+    -- Чтение ждет только создания и удаления секций (см. выше).
+    LOCK TABLE activity_log IN SHARE ROW EXCLUSIVE MODE;
+
+    FOR partition_start IN
+        SELECT (month_start + make_interval(months => i))::DATE
+        FROM generate_series(0, months_ahead) AS i
+        UNION
+        SELECT DISTINCT date_trunc('month', created_at)::DATE
+        FROM activity_log_default
+        ORDER BY 1
+    LOOP
+        partition_end := (partition_start + INTERVAL '1 month')::DATE;
+        partition_name := 'activity_log_' || to_char(partition_start, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        IF EXISTS (
+            SELECT 1 FROM activity_log_default
+            WHERE created_at >= partition_start AND created_at < partition_end
+        ) THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE activity_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name
+            );
+            EXECUTE format(
+                'WITH moved AS ('
+                '    DELETE FROM activity_log_default WHERE created_at >= $1 AND created_at < $2 RETURNING *'
+                ') INSERT INTO %I SELECT * FROM moved',
+                partition_name
+            ) USING partition_start, partition_end;
+            EXECUTE format(
+                'ALTER TABLE activity_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, partition_start, partition_end
+            );
+        ELSE
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF activity_log FOR VALUES FROM (%L) TO (%L)',
+                partition_name, partition_start, partition_end
+            );
+        END IF;
+
+        EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', partition_name);
+        created := created || partition_name;
+    END LOOP;
+
+    IF keep_months IS NOT NULL THEN
+        FOR old_partition IN
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'activity_log'::regclass
+              AND c.relname ~ '^activity_log_\d{4}_\d{2}$'
+              AND to_date(substr(c.relname, 14), 'YYYY_MM')
+                  < month_start - make_interval(months => keep_months)
+            ORDER BY c.relname
+        LOOP
+            EXECUTE format('DROP TABLE %I', old_partition.relname);
+            dropped := dropped || old_partition.relname::TEXT;
+        END LOOP;
+    END IF;
+
+    RETURN json_build_object('created', created, 'dropped', dropped);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- RLS на секциях, созданных миграцией 016 и прежней версией функции
+DO $$
+DECLARE
+    existing_partition RECORD;
+BEGIN
+    FOR existing_partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'activity_log'::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', existing_partition.relname);
+    END LOOP;
+END;
+$$;
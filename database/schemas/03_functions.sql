@@ -1,7 +1,7 @@
 -- Функция для создания компании и назначения пользователя владельцем
 CREATE OR REPLACE FUNCTION create_company_with_owner(
     company_name VARCHAR(255),
-    company_description TEXT DEFAULT NULL,
+    company_description TEXT,
     owner_email VARCHAR(255),
     owner_password_hash VARCHAR(255),
     owner_first_name VARCHAR(100),
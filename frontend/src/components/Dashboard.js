@@ -204,6 +204,37 @@ const CreateProjectButton = styled.button`
   }
 `;
 
+const LoadMoreButton = styled.button`
+  background: white;
+  color: #28a745;
+  border: 2px solid #28a745;
+  padding: 10px 24px;
+  border-radius: 8px;
+  cursor: pointer;
+  font-weight: 500;
+  
+  &:hover {
+    background: #e9f7ec;
+  }
+`;
+
+const SearchForm = styled.form`
+  margin-bottom: 20px;
+`;
+
+const SearchInput = styled.input`
+  width: 100%;
+  padding: 10px 14px;
+  border: 2px solid #e9ecef;
+  border-radius: 8px;
+  font-size: 14px;
+  
+  &:focus {
+    outline: none;
+    border-color: #007bff;
+  }
+`;
+
 const EmptyState = styled.div`
   text-align: center;
   padding: 40px;
@@ -223,24 +254,29 @@ const Dashboard = () => {
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedCompany, setSelectedCompany] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [searchInput, setSearchInput] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
 
   const loadUserData = useCallback(async () => {
     try {
       setLoading(true);
       
-      // Загружаем компании пользователя
-      const companiesResponse = await axios.get('/api/companies', {
+      // Компании и первая страница проектов приходят одним запросом
+      const dashboardResponse = await axios.get('/api/dashboard', {
         headers: {
           'X-User-ID': user.user_id
         }
       });
       
-      if (companiesResponse.data.success) {
-        setCompanies(companiesResponse.data.data);
-        if (companiesResponse.data.data.length > 0) {
-          setSelectedCompany(companiesResponse.data.data[0]);
-          loadProjects(companiesResponse.data.data[0].company_id);
-        }
+      if (dashboardResponse.data.success) {
+        const dashboard = dashboardResponse.data.data;
+        setCompanies(dashboard.companies);
+        setSelectedCompany(
+          dashboard.companies.find((company) => company.company_id === dashboard.company_id) || null
+        );
+        setProjects(dashboard.projects);
+        setNextCursor(dashboard.next_cursor);
       }
     } catch (error) {
       console.error('Ошибка при загрузке данных:', error);
@@ -253,22 +289,102 @@ const Dashboard = () => {
     loadUserData();
   }, [loadUserData]);
 
-  const loadProjects = async (companyId) => {
+  const fetchProjects = async (companyId, cursor, query) => {
+    const params = { company_id: companyId };
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    if (query) {
+      params.q = query;
+    }
+    // С поисковым запросом список строится по релевантности на сервере
+    const url = query ? '/api/projects/search' : '/api/projects';
+    const projectsResponse = await axios.get(url, {
+      params,
+      headers: {
+        'X-User-ID': user.user_id
+      }
+    });
+    return projectsResponse.data.success ? projectsResponse.data : null;
+  };
+
+  const loadProjects = async (companyId, cursor = null, query = searchQuery) => {
     try {
-      const projectsResponse = await axios.get(`/api/projects?company_id=${companyId}`);
-      if (projectsResponse.data.success) {
-        setProjects(projectsResponse.data.data);
+      const page = await fetchProjects(companyId, cursor, query);
+      if (page) {
+        // Следующие страницы дописываем к уже загруженным; проект, который
+        // уже показан (список сдвинулся после обновления), не повторяем
+        setProjects((prev) => {
+          if (!cursor) return page.data;
+          const shown = new Set(prev.map((project) => project.id));
+          return [...prev, ...page.data.filter((project) => !shown.has(project.id))];
+        });
+        setNextCursor(page.next_cursor);
       }
     } catch (error) {
       console.error('Ошибка при загрузке проектов:', error);
     }
   };
 
+  // Обновление по событию потока: первая страница перечитывается и ставится
+  // в начало списка, а страницы, загруженные кнопкой "Загрузить еще", и их
+  // курсор остаются. Удаленные проекты убираются по ID из события. Если
+  // события могли потеряться (RESYNC) или список ID урезан, список
+  // загружается заново.
+  const refreshProjects = async (companyId, change, query) => {
+    const ids = change.project_ids || [];
+    const deleted = change.table === 'projects' && change.op === 'DELETE';
+    if (change.op === 'RESYNC' || (deleted && change.count > ids.length)) {
+      loadProjects(companyId, null, query);
+      return;
+    }
+
+    try {
+      const page = await fetchProjects(companyId, null, query);
+      if (page) {
+        const removed = new Set(deleted ? ids : []);
+        const fresh = new Set(page.data.map((project) => project.id));
+        setProjects((prev) => [
+          ...page.data,
+          ...prev.filter((project) => !fresh.has(project.id) && !removed.has(project.id))
+        ]);
+      }
+    } catch (error) {
+      console.error('Ошибка при обновлении проектов:', error);
+    }
+  };
+
   const handleCompanySelect = (company) => {
     setSelectedCompany(company);
-    loadProjects(company.company_id);
+    setSearchInput('');
+    setSearchQuery('');
+    loadProjects(company.company_id, null, '');
+  };
+
+  const handleSearch = (event) => {
+    event.preventDefault();
+    const query = searchInput.trim();
+    setSearchQuery(query);
+    loadProjects(selectedCompany.company_id, null, query);
   };
 
+  // Изменения проектов компании приходят с сервера (SSE) вместо опроса.
+  // EventSource не передает заголовки, поэтому пользователь указан в параметре.
+  // Без потока (сервер без ASGI или DATABASE_URL) список обновляется как раньше.
+  const selectedCompanyId = selectedCompany ? selectedCompany.company_id : null;
+  useEffect(() => {
+    if (!selectedCompanyId || !window.EventSource) return undefined;
+
+    const params = new URLSearchParams({ company_id: selectedCompanyId, user_id: user.user_id });
+    const source = new EventSource(`/api/projects/stream?${params}`);
+    source.addEventListener('project_change', (event) => {
+      refreshProjects(selectedCompanyId, JSON.parse(event.data), searchQuery);
+    });
+    return () => source.close();
+    // refreshProjects пересоздается на каждом рендере, подписка зависит только от компании и запроса
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selectedCompanyId, searchQuery, user]);
+
   const handleCreateProject = async () => {
     const projectName = prompt('Введите название проекта:');
     if (!projectName || !selectedCompany) return;
@@ -379,6 +495,15 @@ const Dashboard = () => {
             
             {selectedCompany ? (
               <>
+                <SearchForm onSubmit={handleSearch}>
+                  <SearchInput
+                    type="search"
+                    value={searchInput}
+                    onChange={(event) => setSearchInput(event.target.value)}
+                    placeholder="Поиск по названию и описанию"
+                  />
+                </SearchForm>
+                
                 {projects.length > 0 ? (
                   <ProjectList>
                     {projects.map((project) => (
@@ -393,10 +518,15 @@ const Dashboard = () => {
                         </ProjectMeta>
                       </ProjectItem>
                     ))}
+                    {nextCursor && (
+                      <LoadMoreButton onClick={() => loadProjects(selectedCompany.company_id, nextCursor)}>
+                        Показать ещё
+                      </LoadMoreButton>
+                    )}
                   </ProjectList>
                 ) : (
                   <EmptyState>
-                    <p>В этой компании пока нет проектов</p>
+                    <p>{searchQuery ? 'Ничего не найдено' : 'В этой компании пока нет проектов'}</p>
                   </EmptyState>
                 )}
                 
@@ -0,0 +1,51 @@
+#!/bin/bash
+
+# Скрипт для production-запуска бэкенда Master Plan Studio (gunicorn, несколько воркеров)
+#
+# Использование:
+#   ./start_backend_prod.sh          - запуск
+#   ./start_backend_prod.sh reload   - перезагрузка кода без простоя
+
+# Загружаем переменные окружения
+source ./load_env.sh
+
+PIDFILE=${GUNICORN_PIDFILE:-/tmp/master-plan-backend.pid}
+
+reload() {
+    if [ ! -f "$PIDFILE" ]; then
+        echo "❌ Бэкенд не запущен (нет $PIDFILE)"
+        exit 1
+    fi
+
+    OLD_PID=$(cat "$PIDFILE")
+    echo "🔄 Запуск нового мастера с обновленным кодом..."
+    # USR2: старый мастер запускает новый со свежим кодом, старые воркеры продолжают работать
+    kill -USR2 "$OLD_PID"
+
+    # Пока старый мастер жив, новый пишет свой pid в $PIDFILE.2
+    for i in $(seq 1 30); do
+        sleep 1
+        if [ -f "$PIDFILE.2" ]; then
+            echo "✅ Новый мастер запущен: $(cat "$PIDFILE.2")"
+            # Даем новым воркерам прогреть соединения
+            sleep 2
+            # WINCH останавливает старые воркеры, QUIT - старый мастер после завершения запросов
+            kill -WINCH "$OLD_PID"
+            kill -QUIT "$OLD_PID"
+            echo "✅ Старый мастер $OLD_PID завершается после обработки текущих запросов"
+            exit 0
+        fi
+    done
+
+    echo "❌ Новый мастер не запустился, старый продолжает работу"
+    exit 1
+}
+
+if [ "$1" == "reload" ]; then
+    reload
+fi
+
+echo "🚀 Запуск бэкенда на порту ${BACKEND_PORT:-5003}..."
+cd backend
+source ../venv/bin/activate
+exec gunicorn -c gunicorn.conf.py "app:create_app()"